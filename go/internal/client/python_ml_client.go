@@ -100,6 +100,34 @@ func (c *PythonMLClient) SemanticArticleSearch(req *models.SemanticSearchRequest
 	return &response, nil
 }
 
+// SearchIndexedArticles - семантический поиск по индексу на стороне Python
+func (c *PythonMLClient) SearchIndexedArticles(req *models.IndexedSearchRequest) (*models.SemanticSearchResponse, error) {
+	url := fmt.Sprintf("%s/api/semantic-search", c.baseURL)
+
+	jsonData, err := json.Marshal(req)
+	if err != nil {
+		return nil, fmt.Errorf("failed to marshal request: %w", err)
+	}
+
+	resp, err := c.httpClient.Post(url, "application/json", bytes.NewBuffer(jsonData))
+	if err != nil {
+		return nil, fmt.Errorf("failed to call Python ML service: %w", err)
+	}
+	defer resp.Body.Close()
+
+	if resp.StatusCode != http.StatusOK {
+		body, _ := io.ReadAll(resp.Body)
+		return nil, fmt.Errorf("Python ML service error: %s", string(body))
+	}
+
+	var response models.SemanticSearchResponse
+	if err := json.NewDecoder(resp.Body).Decode(&response); err != nil {
+		return nil, fmt.Errorf("failed to decode response: %w", err)
+	}
+
+	return &response, nil
+}
+
 // AnalyzeExpertsByTopic - анализ экспертов
 func (c *PythonMLClient) AnalyzeExpertsByTopic(req *models.ExpertAnalysisRequest) (*models.ExpertAnalysisResponse, error) {
 	url := fmt.Sprintf("%s/api/analyze-experts", c.baseURL)
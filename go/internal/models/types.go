@@ -46,6 +46,12 @@ type SemanticSearchRequest struct {
 	MaxResults  int32              `json:"max_results"`
 }
 
+// Поиск по серверному индексу статей: кандидаты не передаются
+type IndexedSearchRequest struct {
+	QueryVector []byte `json:"query_vector"`
+	MaxResults  int32  `json:"max_results"`
+}
+
 type SearchResult struct {
 	DocumentID      string   `json:"document_id"`
 	RelevanceScore  float32  `json:"relevance_score"`
@@ -93,11 +99,12 @@ type DepartmentAnalysisRequest struct {
 }
 
 type DepartmentAnalysis struct {
-	OrganizationID string   `json:"organization_id"`
-	StrengthScore  float32  `json:"strength_score"`
-	ExpertCount    int32    `json:"expert_count"`
-	TotalArticles  int32    `json:"total_articles"`
-	KeyAuthorIDs   []string `json:"key_author_ids"`
+	OrganizationID      string   `json:"organization_id"`
+	StrengthScore       float32  `json:"strength_score"`
+	ExpertCount         int32    `json:"expert_count"`
+	TotalArticles       int32    `json:"total_articles"`
+	KeyAuthorIDs        []string `json:"key_author_ids"`
+	UnprofiledAuthorIDs []string `json:"unprofiled_author_ids,omitempty"`
 }
 
 type DepartmentAnalysisResponse struct {
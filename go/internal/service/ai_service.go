@@ -87,11 +87,34 @@ func (s *AIService) SemanticArticleSearch(ctx context.Context, req *agentv1.Sema
 		})
 	}
 
+	// Пустой список кандидатов (например, пустой результат фильтра) - пустой ответ,
+	// а не поиск по всему индексу: для него есть отдельный SearchIndexedArticles
+	if len(httpReq.Articles) == 0 {
+		return &agentv1.SemanticSearchResponse{}, nil
+	}
+
 	httpResp, err := s.pythonClient.SemanticArticleSearch(httpReq)
 	if err != nil {
 		return nil, fmt.Errorf("Python ML service error: %w", err)
 	}
 
+	return toSemanticSearchResponse(httpResp), nil
+}
+
+// SearchIndexedArticles - поиск по серверному индексу статей Python; кандидаты из запроса не используются
+func (s *AIService) SearchIndexedArticles(ctx context.Context, req *agentv1.SemanticSearchRequest) (*agentv1.SemanticSearchResponse, error) {
+	httpResp, err := s.pythonClient.SearchIndexedArticles(&models.IndexedSearchRequest{
+		QueryVector: req.QueryVector,
+		MaxResults:  req.MaxResults,
+	})
+	if err != nil {
+		return nil, fmt.Errorf("Python ML service error: %w", err)
+	}
+
+	return toSemanticSearchResponse(httpResp), nil
+}
+
+func toSemanticSearchResponse(httpResp *models.SemanticSearchResponse) *agentv1.SemanticSearchResponse {
 	resp := &agentv1.SemanticSearchResponse{
 		TotalFound: httpResp.TotalFound,
 	}
@@ -109,7 +132,7 @@ func (s *AIService) SemanticArticleSearch(ctx context.Context, req *agentv1.Sema
 		resp.Results = append(resp.Results, resultPB)
 	}
 
-	return resp, nil
+	return resp
 }
 
 func (s *AIService) AnalyzeExpertsByTopic(ctx context.Context, req *agentv1.ExpertAnalysisRequest) (*agentv1.ExpertAnalysisResponse, error) {
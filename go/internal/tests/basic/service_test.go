@@ -1,10 +1,15 @@
 package basic
 
 import (
+	"context"
+	"encoding/json"
+	"net/http"
+	"net/http/httptest"
 	"testing"
 
 	"github.com/drobyshevv/classifier-ai-agent/internal/client"
 	"github.com/drobyshevv/classifier-ai-agent/internal/service"
+	agentv1 "github.com/drobyshevv/proto-ai-agent/gen/go/proto/ai_agent"
 )
 
 // TestServiceCreation проверяет создание сервиса
@@ -16,3 +21,60 @@ func TestServiceCreation(t *testing.T) {
 		t.Error("Service should not be nil")
 	}
 }
+
+// TestSemanticSearchEmptyCandidates проверяет, что пустой список кандидатов не превращается в поиск по индексу
+func TestSemanticSearchEmptyCandidates(t *testing.T) {
+	calls := 0
+	server := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+		calls++
+		w.Header().Set("Content-Type", "application/json")
+		w.Write([]byte(`{"results": [{"document_id": "any", "relevance_score": 0.9}], "total_found": 1}`))
+	}))
+	defer server.Close()
+
+	aiService := service.NewAIService(client.NewPythonMLClient(server.URL))
+	resp, err := aiService.SemanticArticleSearch(context.Background(), &agentv1.SemanticSearchRequest{
+		QueryVector: []byte{1, 2, 3, 4},
+		MaxResults:  5,
+	})
+
+	if err != nil {
+		t.Fatalf("unexpected error: %v", err)
+	}
+	if len(resp.Results) != 0 || resp.TotalFound != 0 {
+		t.Errorf("expected no results for empty candidates, got %d", len(resp.Results))
+	}
+	if calls != 0 {
+		t.Errorf("expected no call to Python ML service, got %d", calls)
+	}
+}
+
+// TestSearchIndexedArticles проверяет явный поиск по индексу: запрос уходит без списка статей
+func TestSearchIndexedArticles(t *testing.T) {
+	var body map[string]interface{}
+	server := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+		if r.URL.Path != "/api/semantic-search" {
+			t.Errorf("unexpected path %s", r.URL.Path)
+		}
+		json.NewDecoder(r.Body).Decode(&body)
+		w.Header().Set("Content-Type", "application/json")
+		w.Write([]byte(`{"results": [{"document_id": "doc1", "relevance_score": 0.9}], "total_found": 1}`))
+	}))
+	defer server.Close()
+
+	aiService := service.NewAIService(client.NewPythonMLClient(server.URL))
+	resp, err := aiService.SearchIndexedArticles(context.Background(), &agentv1.SemanticSearchRequest{
+		QueryVector: []byte{1, 2, 3, 4},
+		MaxResults:  5,
+	})
+
+	if err != nil {
+		t.Fatalf("unexpected error: %v", err)
+	}
+	if _, ok := body["articles"]; ok {
+		t.Error("indexed search request should not carry articles")
+	}
+	if len(resp.Results) != 1 || resp.Results[0].DocumentId != "doc1" {
+		t.Errorf("unexpected results: %v", resp.Results)
+	}
+}
@@ -0,0 +1,94 @@
+"""Recall@k и задержка IVF-поиска относительно точного перебора.
+
+Запуск из каталога python/:
+    python -m benchmarks.ann_recall --articles 200000 --nlist 1024 --nprobe 4 8 16 32
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.services.ann_index import IVFIndex
+from src.services.article_index import ArticleIndex
+
+
+def make_corpus(count: int, dimension: int, clusters: int, noise: float, rng: np.random.Generator):
+    """Синтетический корпус: тематические кластеры, заголовок и аннотация рядом с центром темы"""
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    titles = centers[labels] + noise * rng.standard_normal((count, dimension)).astype(np.float32)
+    abstracts = centers[labels] + noise * rng.standard_normal((count, dimension)).astype(np.float32)
+    return centers, titles, abstracts
+
+
+def measure(index: ArticleIndex, queries: np.ndarray, k: int, nprobe=None):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found = index.search(query, k, nprobe=nprobe)
+        latencies.append(time.perf_counter() - start)
+        results.append([r["document_id"] for r in found])
+    return results, np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=2.5, help="разброс статей вокруг центра темы")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON-файл для результатов")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers, titles, abstracts = make_corpus(args.articles, args.dimension, args.clusters, args.noise, rng)
+    ids = [f"doc{i}" for i in range(args.articles)]
+    queries = centers[rng.integers(0, args.clusters, args.queries)] \
+        + args.noise * rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+
+    exact = ArticleIndex(args.dimension, initial_capacity=args.articles)
+    exact.upsert_many(ids, titles, abstracts)
+
+    start = time.perf_counter()
+    approximate = ArticleIndex(args.dimension, initial_capacity=args.articles,
+                               ann=IVFIndex(args.dimension, nlist=args.nlist), ann_train_size=args.articles)
+    approximate.upsert_many(ids, titles, abstracts)
+    build_seconds = time.perf_counter() - start
+
+    truth, exact_ms = measure(exact, queries, args.k)
+    report = {
+        "articles": args.articles,
+        "k": args.k,
+        "nlist": args.nlist,
+        "build_seconds": round(build_seconds, 2),
+        "exact": {"p50_ms": float(np.percentile(exact_ms, 50)), "p95_ms": float(np.percentile(exact_ms, 95))},
+        "ivf": []
+    }
+    print(f"{args.articles} статей, k={args.k}, nlist={args.nlist}, построение {build_seconds:.1f} c")
+    print(f"exact        p50 {report['exact']['p50_ms']:8.2f} мс  p95 {report['exact']['p95_ms']:8.2f} мс")
+
+    for nprobe in args.nprobe:
+        found, ivf_ms = measure(approximate, queries, args.k, nprobe=nprobe)
+        recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, truth)])
+        row = {
+            "nprobe": nprobe,
+            f"recall@{args.k}": float(recall),
+            "p50_ms": float(np.percentile(ivf_ms, 50)),
+            "p95_ms": float(np.percentile(ivf_ms, 95))
+        }
+        report["ivf"].append(row)
+        print(f"nprobe={nprobe:<5} p50 {row['p50_ms']:8.2f} мс  p95 {row['p95_ms']:8.2f} мс  recall@{args.k} {recall:.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
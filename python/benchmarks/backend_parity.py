@@ -0,0 +1,131 @@
+"""Совпадение эмбеддингов и скорость бэкендов (torch, onnx, onnx-int8) на CPU.
+
+Эталон - torch (SentenceTransformer). Для остальных бэкендов считается минимальное и среднее
+косинусное сходство с эталоном по тем же текстам; оно сравнивается с допуском PARITY_MIN_COSINE.
+Сохранение ранжирования: первые --queries текстов - запросы к остальным, recall@k - доля
+эталонного топ-k (torch), найденная бэкендом. Код возврата 1, если какой-либо бэкенд вышел за допуск.
+
+Запуск из каталога python/:
+    python -m benchmarks.backend_parity --backends torch onnx onnx-int8 --texts 512 --batch-size 32
+
+Замер 2026-10-17 (--texts 512 --batch-size 32 --repeats 3, recall@10 по 64 запросам), 1 CPU, без сети.
+Модель - локальная заглушка архитектуры MiniLM-L12 (12 слоев, 384) со случайными весами и словарем
+1222 токена (--model /tmp/minilm): рабочая paraphrase-multilingual-MiniLM-L12-v2 недоступна офлайн.
+
+    бэкенд     текстов/с  мс/текст  ускорение  cos min   cos mean  recall@10
+    torch      106.4      9.40      x1.00      -         -         -
+    onnx       55.5       18.01     x0.52      1.00000   1.00000   1.0000
+    onnx-int8  139.2      7.19      x1.31      0.99983   0.99988   0.9797
+
+Оба бэкенда в допуске PARITY_MIN_COSINE. onnx на этом узле медленнее torch - включать его без
+замера на целевом железе не стоит. Качество ранжирования int8 на рабочей модели (случайные веса
+его не показывают) не подтверждено: перед переключением backend нужен прогон с --model по умолчанию.
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from src.models.backends import PARITY_MIN_COSINE, create_embedding_model
+from src.topic.intelligent_topics import extended_topics
+from src.utils.vector_utils import top_k_indices
+
+
+def make_texts(count: int, rng: np.random.Generator):
+    """Тексты разной длины из названий тематик: от одной темы до аннотации из нескольких"""
+    texts = []
+    for _ in range(count):
+        parts = rng.choice(extended_topics, size=int(rng.integers(1, 12)))
+        texts.append(". ".join(parts))
+    return texts
+
+
+def measure(model, texts, batch_size: int, repeats: int):
+    model.encode(texts[:batch_size], normalize_embeddings=True, batch_size=batch_size)  # прогрев
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings = model.encode(texts, normalize_embeddings=True, batch_size=batch_size)
+        seconds.append(time.perf_counter() - start)
+    return np.asarray(embeddings, dtype=np.float32), float(np.median(seconds))
+
+
+def ranking_recall(reference: np.ndarray, embeddings: np.ndarray, queries: int, k: int) -> float:
+    """recall@k поиска по эмбеддингам бэкенда относительно поиска по эталонным"""
+    truth = top_k_rows(reference[:queries] @ reference[queries:].T, k)
+    found = top_k_rows(embeddings[:queries] @ embeddings[queries:].T, k)
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, truth)]))
+
+
+def top_k_rows(scores: np.ndarray, k: int):
+    return [set(top_k_indices(row, k).tolist()) for row in scores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--onnx-dir", default="onnx_models")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=64, help="текстов-запросов для recall@k ранжирования")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--threads", type=int, help="intra-op потоков для onnxruntime и torch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON-файл для результатов")
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    texts = make_texts(args.texts, np.random.default_rng(args.seed))
+    models_config = {"bert_model": args.model, "device": "cpu", "onnx_dir": args.onnx_dir}
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+
+    report = {"model": args.model, "texts": args.texts, "batch_size": args.batch_size, "backends": []}
+    reference, reference_seconds = None, None
+    failed = False
+    for backend in backends:
+        model = create_embedding_model({**models_config, "backend": backend}, intra_op_threads=args.threads)
+        embeddings, seconds = measure(model, texts, args.batch_size, args.repeats)
+        row = {
+            "backend": backend,
+            "texts_per_second": args.texts / seconds,
+            "ms_per_text": 1000 * seconds / args.texts
+        }
+        if reference is None:
+            reference, reference_seconds = embeddings, seconds
+            # Обрезка токенов в ONNX должна совпадать с max_seq_length эталонной модели
+            models_config["max_length"] = model.max_seq_length
+        else:
+            cosine = np.sum(reference * embeddings, axis=1)
+            row.update({
+                "speedup": reference_seconds / seconds,
+                "min_cosine": float(cosine.min()),
+                "mean_cosine": float(cosine.mean()),
+                f"recall@{args.k}": ranking_recall(reference, embeddings, args.queries, args.k),
+                "tolerance": PARITY_MIN_COSINE[backend],
+                "within_tolerance": bool(cosine.min() >= PARITY_MIN_COSINE[backend])
+            })
+            failed |= not row["within_tolerance"]
+        report["backends"].append(row)
+
+        line = f"{backend:<10} {row['texts_per_second']:9.1f} текстов/с  {row['ms_per_text']:7.2f} мс/текст"
+        if "speedup" in row:
+            line += (f"  x{row['speedup']:.2f}  cos min {row['min_cosine']:.5f} mean {row['mean_cosine']:.5f}"
+                     f"  recall@{args.k} {row[f'recall@{args.k}']:.4f}"
+                     f"  (допуск {row['tolerance']}: {'ok' if row['within_tolerance'] else 'FAIL'})")
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
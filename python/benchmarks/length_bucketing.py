@@ -0,0 +1,120 @@
+"""Батчи по длине и бюджету токенов против фиксированного batch_size на смеси заголовков и аннотаций.
+
+Тексты - заголовки (5-15 слов) и аннотации (80-250 слов) в двух порядках: grouped - как в
+/api/analyze-articles (все заголовки, затем все аннотации), shuffled - вперемешку, как одиночные
+вызовы из разных запросов в динамическом батчере. Для каждого режима считаются доля полезных токенов (без паддинга) и время
+RuBERTModel.encode_batch; кэш эмбеддингов и динамический батчер выключены.
+
+Внимание: SentenceTransformer.encode сам сортирует тексты по длине в символах, поэтому для torch
+выигрыш фиксированного режима уже частично учтен; у ONNX-бэкенда сортировки нет.
+
+Запуск из каталога python/:
+    python -m benchmarks.length_bucketing --backend torch onnx --articles 256 --max-batch-tokens 2048 4096 8192
+"""
+import argparse
+import copy
+import json
+import time
+from itertools import product
+
+import numpy as np
+
+from benchmarks.suite import make_text, make_vocabulary
+from src.ml_service import MLService
+from src.models.batcher import plan_token_batches
+from src.models.backends import token_lengths
+from src.models.bert_model import RuBERTModel
+
+
+def make_texts(articles: int, vocabulary, order: str, rng):
+    titles = [make_text(rng, vocabulary, 5, 15) for _ in range(articles)]
+    abstracts = [make_text(rng, vocabulary, 80, 250) for _ in range(articles)]
+    texts = titles + abstracts
+    if order == "shuffled":
+        texts = [texts[i] for i in rng.permutation(len(texts))]
+    return texts
+
+
+def padding_efficiency(lengths: np.ndarray, batches) -> float:
+    """Доля реальных токенов среди посчитанных моделью (батч дополняется до самого длинного текста)"""
+    padded = sum(len(rows) * lengths[rows].max() for rows in batches)
+    return float(lengths.sum() / padded)
+
+
+def fixed_batches(count: int, batch_size: int):
+    return [np.arange(start, min(start + batch_size, count)) for start in range(0, count, batch_size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="модель вместо config['models']['bert_model']")
+    parser.add_argument("--backend", nargs="+", default=["torch"])
+    parser.add_argument("--articles", type=int, default=256)
+    parser.add_argument("--order", nargs="+", choices=["grouped", "shuffled"], default=["grouped", "shuffled"])
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-batch-tokens", type=int, nargs="+", default=[2048, 4096, 8192])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON-файл для результатов")
+    args = parser.parse_args()
+
+    base_config = MLService().config
+    vocabulary = make_vocabulary(base_config['topics']['predefined_topics'])
+    report = {"texts": 2 * args.articles, "batch_size": args.batch_size, "runs": []}
+
+    for backend in args.backend:
+        config = copy.deepcopy(base_config)
+        config['models']['backend'] = backend
+        if args.model:
+            config['models']['bert_model'] = args.model
+        config['cache']['enabled'] = False
+        config['batching']['enabled'] = False
+        config['embeddings']['batch_size'] = args.batch_size
+        bert_model = RuBERTModel(config)
+
+        for order, max_batch_tokens in product(args.order, [None] + args.max_batch_tokens):
+            if max_batch_tokens is None:
+                texts = make_texts(args.articles, vocabulary, order, np.random.default_rng(args.seed))
+                lengths = token_lengths(bert_model.embedding_model, texts)
+                reference, fixed_seconds = None, None
+            config['embeddings']['max_batch_tokens'] = max_batch_tokens
+            bert_model.encode_batch(texts[:8])  # прогрев
+            timings = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                embeddings = bert_model.encode_batch(texts)
+                timings.append(time.perf_counter() - start)
+
+            batches = fixed_batches(len(texts), args.batch_size) if max_batch_tokens is None \
+                else plan_token_batches(lengths, max_batch_tokens, args.batch_size)
+            if reference is None:
+                reference = embeddings
+            row = {
+                "backend": backend,
+                "order": order,
+                "max_batch_tokens": max_batch_tokens,
+                "batches": len(batches),
+                "padding_efficiency": padding_efficiency(lengths, batches),
+                "seconds": float(np.median(timings)),
+                "texts_per_second": len(texts) / float(np.median(timings)),
+                # Порядок строк сохраняется: эмбеддинги совпадают с фиксированным режимом
+                "min_cosine_vs_fixed": float(np.min(np.sum(reference * embeddings, axis=1)
+                                                    / np.linalg.norm(reference, axis=1)
+                                                    / np.linalg.norm(embeddings, axis=1)))
+            }
+            fixed_seconds = fixed_seconds if max_batch_tokens is not None else row["seconds"]
+            row["speedup"] = fixed_seconds / row["seconds"]
+            report["runs"].append(row)
+            mode = "фиксированный" if max_batch_tokens is None else f"бюджет {max_batch_tokens}"
+            print(f"{backend:<10} {order:<9} {mode:<16} батчей {row['batches']:4d}  полезных токенов {row['padding_efficiency']:6.1%}  "
+                  f"{row['texts_per_second']:8.1f} текст/с  x{row['speedup']:.2f}  "
+                  f"cos {row['min_cosine_vs_fixed']:.6f}")
+        bert_model.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
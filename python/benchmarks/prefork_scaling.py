@@ -0,0 +1,176 @@
+"""Память и пропускная способность prefork-сервера (src/prefork.py) для 1..N воркеров.
+
+Для каждого числа воркеров сервер запускается заново, после readiness нагружается запросами
+/api/analyze-query (тексты уникальные, чтобы не попадать в кэш эмбеддингов) с заданным числом
+параллельных клиентов. Затем из /proc/<pid>/smaps_rollup снимаются RSS, PSS, Shared и Private
+каждого воркера и родителя. PSS делит общие страницы между процессами, поэтому сумма PSS -
+реальная память сервера, а Private на воркер - цена добавления еще одного воркера.
+
+Только Linux. Запуск из каталога python/:
+    python -m benchmarks.prefork_scaling --workers 1 2 4 8 --clients 32 --duration 30 --output prefork.json
+
+Замер 2026-10-17 (--workers 1 2 4 --clients 8 --duration 20), 1 CPU, 6 ГБ RAM, без сети.
+Модель - заглушка той же архитектуры MiniLM-L12 (12 слоев, 384) со случайными весами и словарем
+1222 токена, подложенная в кэш HF под именем рабочей модели: веса ~88 МБ против ~470 МБ у
+paraphrase-multilingual-MiniLM-L12-v2, поэтому абсолютные МБ занижены, а доля общих страниц - нет.
+
+    воркеров  req/s   p50, мс  RSS воркера, МБ  Shared, МБ  PSS воркера, МБ  PSS всего, МБ
+    1         52.1    172      639              601         337              977
+    2         37.1    248      629-635          600         228-235          1003
+    4         29.8    296      626-629          600         146-149          1051
+
+Память: каждый следующий воркер добавляет ~25 МБ PSS (private 28-38 МБ) вместо полной копии
+процесса (~950 МБ RSS у родителя) - веса, матрица тематик и индекс общие. Пропускная способность
+на одном ядре не растет (воркеры делят одно CPU); критерий масштабирования 1..N не проверен и
+требует замера на многоядерном узле с рабочей моделью.
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+QUERY = "найти статьи про машинное обучение в медицинской диагностике, запрос номер {}"
+
+
+def wait_ready(port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/health/ready")
+            if connection.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def children(pid: int):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def memory(pid: int) -> dict:
+    """RSS/PSS/Shared/Private процесса в МБ"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": fields.get("Rss", 0.0),
+        "pss_mb": fields.get("Pss", 0.0),
+        "shared_mb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "private_mb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0)
+    }
+
+
+def load(port: int, clients: int, duration: float):
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+    deadline = time.monotonic() + duration
+
+    def client(index: int):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        counter = 0
+        while time.monotonic() < deadline:
+            body = json.dumps({"user_query": QUERY.format(f"{index}-{counter}"), "context": "article_search"})
+            counter += 1
+            start = time.perf_counter()
+            try:
+                connection.request("POST", "/api/analyze-query", body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[index] += 1
+                    continue
+            except OSError:
+                errors[index] += 1
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                continue
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_latencies = np.array([value for values in latencies for value in values]) * 1000
+    return {
+        "requests": int(len(all_latencies)),
+        "errors": int(sum(errors)),
+        "throughput_rps": len(all_latencies) / duration,
+        "p50_ms": float(np.percentile(all_latencies, 50)) if len(all_latencies) else None,
+        "p95_ms": float(np.percentile(all_latencies, 95)) if len(all_latencies) else None
+    }
+
+
+def run(workers: int, args) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.prefork", "--workers", str(workers), "--port", str(args.port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(args.port, args.startup_timeout):
+            raise RuntimeError(f"server with {workers} workers did not become ready")
+        # Readiness отвечает первый готовый воркер: даем прогреться остальным
+        time.sleep(args.settle)
+        load(args.port, args.clients, min(args.duration, 3.0))  # прогрев
+        result = load(args.port, args.clients, args.duration)
+
+        worker_memory = [memory(pid) for pid in children(server.pid)]
+        result.update({
+            "workers": workers,
+            "parent": memory(server.pid),
+            "per_worker": worker_memory,
+            "total_pss_mb": memory(server.pid)["pss_mb"] + sum(m["pss_mb"] for m in worker_memory),
+            "avg_worker_private_mb": float(np.mean([m["private_mb"] for m in worker_memory]))
+        })
+        return result
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--settle", type=float, default=5.0)
+    parser.add_argument("--output", help="JSON-файл для результатов")
+    args = parser.parse_args()
+
+    report = {"clients": args.clients, "duration_s": args.duration, "cpu_count": os.cpu_count(), "runs": []}
+    base = None
+    for workers in args.workers:
+        result = run(workers, args)
+        base = base or result["throughput_rps"]
+        result["scaling"] = result["throughput_rps"] / base if base else None
+        report["runs"].append(result)
+        print(f"{workers:>3} воркеров  {result['throughput_rps']:8.1f} req/s  x{result['scaling'] or 0:.2f}  "
+              f"p95 {result['p95_ms'] or 0:7.1f} мс  PSS всего {result['total_pss_mb']:8.1f} МБ  "
+              f"private/воркер {result['avg_worker_private_mb']:7.1f} МБ  ошибок {result['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
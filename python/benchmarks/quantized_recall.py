@@ -0,0 +1,104 @@
+"""Память и recall@k индекса статей с компактным хранением (float16 / int8) и точным пересчетом.
+
+Эталон - SemanticSearchService.search_articles (полный перебор по float32-векторам из запроса).
+Для каждого варианта хранения считаются байты под векторы (всего и резидентно в RAM),
+recall@k относительно эталона и задержка поиска.
+
+Запуск из каталога python/:
+    python -m benchmarks.quantized_recall --articles 50000 --storage float32 float16 int8 --rescore-factor 1 4
+"""
+import argparse
+import json
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks.ann_recall import make_corpus
+from src.services.article_index import ArticleIndex
+from src.services.semantic_search import SemanticSearchService
+from src.utils.vector_utils import vector_to_base64
+
+
+def baseline(queries, titles, abstracts, ids, k: int, dimension: int):
+    """Результаты текущего search_articles (статьи передаются в запросе base64-векторами)"""
+    service = SemanticSearchService(SimpleNamespace(config={"embeddings": {"dimension": dimension}}))
+    articles = [
+        {"document_id": document_id, "title_embedding": vector_to_base64(title),
+         "abstract_embedding": vector_to_base64(abstract)}
+        for document_id, title, abstract in zip(ids, titles, abstracts)
+    ]
+    return [[r["document_id"] for r in service.search_articles(query, articles, k)] for query in queries]
+
+
+def measure(index: ArticleIndex, queries: np.ndarray, k: int):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found = index.search(query, k)
+        latencies.append(time.perf_counter() - start)
+        results.append([r["document_id"] for r in found])
+    return results, np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=2.5, help="разброс статей вокруг центра темы")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--storage", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("--rescore-factor", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--on-disk", action="store_true", help="точные векторы в memmap-файле, а не в RAM")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON-файл для результатов")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers, titles, abstracts = make_corpus(args.articles, args.dimension, args.clusters, args.noise, rng)
+    ids = [f"doc{i}" for i in range(args.articles)]
+    queries = centers[rng.integers(0, args.clusters, args.queries)] \
+        + args.noise * rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+
+    truth = baseline(queries, titles, abstracts, ids, args.k, args.dimension)
+    float32_bytes = 2 * args.articles * args.dimension * 4
+    report = {"articles": args.articles, "k": args.k, "float32_bytes": float32_bytes, "runs": []}
+    print(f"{args.articles} статей, k={args.k}, float32-векторы: {float32_bytes / 2 ** 20:.1f} МБ")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in args.storage:
+            for rescore_factor in ([1] if storage == "float32" else args.rescore_factor):
+                index = ArticleIndex(
+                    args.dimension, initial_capacity=args.articles, storage=storage, rescore_factor=rescore_factor,
+                    full_precision_path=f"{directory}/{storage}-{rescore_factor}" if args.on_disk else None
+                )
+                index.upsert_many(ids, titles, abstracts)
+                found, latency_ms = measure(index, queries, args.k)
+                recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, truth)])
+                memory = index.memory_usage()
+                row = {
+                    "storage": storage,
+                    "rescore_factor": rescore_factor,
+                    f"recall@{args.k}": float(recall),
+                    "compact_bytes": memory["compact_bytes"],
+                    "resident_bytes": memory["resident_bytes"],
+                    "resident_saved": 1 - memory["resident_bytes"] / float32_bytes,
+                    "p50_ms": float(np.percentile(latency_ms, 50)),
+                    "p95_ms": float(np.percentile(latency_ms, 95))
+                }
+                report["runs"].append(row)
+                print(f"{storage:<8} rescore x{rescore_factor:<3} recall@{args.k} {recall:.4f}  "
+                      f"компактные {memory['compact_bytes'] / 2 ** 20:7.1f} МБ  "
+                      f"в RAM {memory['resident_bytes'] / 2 ** 20:7.1f} МБ ({row['resident_saved']:+.0%} экономии)  "
+                      f"p50 {row['p50_ms']:6.2f} мс  p95 {row['p95_ms']:6.2f} мс")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""Воспроизводимый набор бенчмарков: методы MLService и HTTP endpoint-ы на параметризуемых масштабах.
+
+Два бэкенда эмбеддингов:
+- hash - детерминированные эмбеддинги без нейросети (models.backend='hash'): замеряются накладные
+  расходы сервиса - разбор и сериализация, base64, матричный скоринг, пулы и батчер;
+- real - модель из конфига MLService (torch/onnx): сквозные цифры вместе с инференсом.
+
+Данные синтетические и зависят только от --seed: статьи, авторы с заданным числом тем на автора,
+кафедры (по --authors-per-department авторов). Кэш эмбеддингов выключается (--cache включает),
+чтобы повторные вызовы считали модель, а не попадали в кэш. Endpoint-ы вызываются в процессе
+через ASGI-транспорт httpx: сеть не участвует, но весь стек FastAPI/Starlette - да.
+
+Для каждого сценария и масштаба: p50/p95/p99/среднее, вызовы в секунду и элементы в секунду
+(статьи/авторы/кафедры за вызов). Сравнение с сохраненным результатом отмечает регрессии:
+p95 выросла или пропускная способность упала больше чем на --tolerance.
+
+Запуск из каталога python/:
+    python -m benchmarks.suite --backend hash --articles 100 1000 --authors 50 500 \\
+        --topics-per-author 5 20 --concurrency 1 8 --output bench.json
+    python -m benchmarks.suite --backend hash ... --baseline bench.json --tolerance 0.2
+    python -m benchmarks.suite --compare new.json --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+
+SCENARIO_PARAMS = ("articles", "authors", "topics_per_author", "concurrency")
+
+
+def make_vocabulary(topics):
+    words = sorted({word for topic in topics for word in topic.lower().split() if len(word) > 3})
+    return words or ["текст"]
+
+
+def make_text(rng, vocabulary, low: int, high: int) -> str:
+    return " ".join(rng.choice(vocabulary, rng.integers(low, high + 1)))
+
+
+def make_articles(count: int, vocabulary, rng):
+    return [
+        {
+            "document_id": f"doc{i}",
+            "title_ru": make_text(rng, vocabulary, 5, 10),
+            "abstract_ru": make_text(rng, vocabulary, 30, 60)
+        }
+        for i in range(count)
+    ]
+
+
+def make_authors(count: int, topics_per_author: int, topics, rng):
+    return [
+        {
+            "author_id": f"author{i}",
+            "name": f"Автор {i}",
+            "article_ids": [f"doc{i}-{j}" for j in range(topics_per_author)],
+            "article_topics": [str(topic) for topic in rng.choice(topics, topics_per_author)],
+            "department": f"dept{i // 10}"
+        }
+        for i in range(count)
+    ]
+
+
+def make_departments(authors, per_department: int):
+    departments = []
+    for start in range(0, len(authors), per_department):
+        members = authors[start:start + per_department]
+        departments.append({
+            "organization_id": f"dept{start // per_department}",
+            "name": f"Кафедра {start // per_department}",
+            "author_ids": [author["author_id"] for author in members],
+            "article_topics": [topic for author in members for topic in author["article_topics"]],
+            "research_areas": []
+        })
+    return departments
+
+
+def configure(ml_service, args):
+    """Бэкенд, кэш и логирование сервиса до первой загрузки модели"""
+    from loguru import logger
+
+    # Логи INFO на каждый вызов искажают задержки и засоряют вывод
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    bert_model = ml_service.bert_model
+    if args.backend == "hash":
+        ml_service.config['models']['backend'] = bert_model.backend = "hash"
+    if not args.cache and bert_model.embedding_cache is not None:
+        bert_model.embedding_cache.close()
+        bert_model.embedding_cache = None
+    ml_service.warmup()
+    if not ml_service.ready:
+        raise RuntimeError("model warmup failed")
+
+
+def summarize(latencies, wall_seconds: float, items_per_call: int, errors: int) -> dict:
+    latencies_ms = np.array(latencies) * 1000
+    calls = len(latencies_ms)
+    return {
+        "calls": calls,
+        "errors": errors,
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if calls else None,
+        "p95_ms": float(np.percentile(latencies_ms, 95)) if calls else None,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if calls else None,
+        "mean_ms": float(latencies_ms.mean()) if calls else None,
+        "throughput_rps": calls / wall_seconds if wall_seconds else 0.0,
+        "items_per_second": calls * items_per_call / wall_seconds if wall_seconds else 0.0
+    }
+
+
+def run_service(call, requests: int, concurrency: int, warmup: int):
+    """Вызовы метода сервиса из concurrency потоков (как из пула инференса)"""
+    for _ in range(warmup):
+        call()
+
+    def timed(_):
+        start = time.perf_counter()
+        try:
+            call()
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+    return [r for r in results if r is not None], wall, sum(r is None for r in results)
+
+
+async def run_http(client, method: str, path: str, kwargs: dict, requests: int, concurrency: int, warmup: int):
+    """Запросы к приложению с concurrency одновременными клиентами"""
+    for _ in range(warmup):
+        await client.request(method, path, **kwargs)
+
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, errors
+
+
+def service_scenarios(ml_service, data, scale):
+    """(имя, вызов, элементов за вызов) для методов MLService"""
+    from src.utils.vector_utils import vector_to_base64
+
+    articles, authors, departments = data["articles"], data["authors"], data["departments"]
+    article = articles[0]
+    query = data["query"]
+    query_vector = vector_to_base64(ml_service.bert_model.encode_text(query))
+    scenarios = []
+
+    if "articles" in scale:
+        embedded = data["embedded"]
+        scenarios += [
+            ("service.analyze_articles_topics", lambda: ml_service.analyze_articles_topics(articles), len(articles)),
+            ("service.semantic_article_search",
+             lambda: ml_service.semantic_article_search(query_vector, embedded, 10), len(articles)),
+            ("service.upsert_articles", lambda: ml_service.upsert_articles(embedded), len(articles)),
+            ("service.indexed_article_search",
+             lambda: ml_service.indexed_article_search(query_vector=query_vector, max_results=10), 1)
+        ]
+    elif "authors" in scale:
+        topic = data["topic"]
+        scenarios += [
+            ("service.analyze_experts_by_topic",
+             lambda: ml_service.analyze_experts_by_topic(topic, authors), len(authors)),
+            ("service.analyze_departments_by_topic",
+             lambda: ml_service.analyze_departments_by_topic(topic, departments), len(departments))
+        ]
+    else:
+        scenarios += [
+            ("service.analyze_article_topics",
+             lambda: ml_service.analyze_article_topics(article["document_id"], article["title_ru"],
+                                                       article["abstract_ru"]), 1),
+            ("service.analyze_user_query", lambda: ml_service.analyze_user_query(query, "article_search"), 1)
+        ]
+    return scenarios
+
+
+def http_scenarios(ml_service, data, scale):
+    """(имя, метод, путь, аргументы httpx, элементов за вызов) для endpoint-ов"""
+    from src.utils.vector_utils import vector_to_base64
+
+    articles, authors, departments = data["articles"], data["authors"], data["departments"]
+    query = data["query"]
+    query_vector = vector_to_base64(ml_service.bert_model.encode_text(query))
+
+    if "articles" in scale:
+        embedded = data["embedded"]
+        return [
+            ("http.analyze_articles", "POST", "/api/analyze-articles", {"json": {"articles": articles}}, len(articles)),
+            ("http.semantic_search", "POST", "/api/semantic-search",
+             {"json": {"query_vector": query_vector, "articles": embedded, "max_results": 10}}, len(articles)),
+            ("http.semantic_search_ndjson", "POST", "/api/semantic-search",
+             {"content": "\n".join(json.dumps(line, ensure_ascii=False) for line in
+                                   [{"query_vector": query_vector, "max_results": 10}] + embedded),
+              "headers": {"Content-Type": "application/x-ndjson"}}, len(articles)),
+            ("http.index_articles", "POST", "/api/index/articles", {"json": {"articles": embedded}}, len(articles)),
+            ("http.semantic_search_index", "POST", "/api/semantic-search",
+             {"json": {"query_vector": query_vector, "max_results": 10}}, 1)
+        ]
+    if "authors" in scale:
+        topic = data["topic"]
+        return [
+            ("http.analyze_experts", "POST", "/api/analyze-experts",
+             {"json": {"topic": topic, "authors": authors}}, len(authors)),
+            ("http.analyze_experts_ndjson", "POST", "/api/analyze-experts",
+             {"json": {"topic": topic, "authors": authors}, "headers": {"Accept": "application/x-ndjson"}},
+             len(authors)),
+            ("http.analyze_departments", "POST", "/api/analyze-departments",
+             {"json": {"topic": topic, "departments": departments}}, len(departments))
+        ]
+    article = articles[0]
+    return [
+        ("http.analyze_article", "POST", "/api/analyze-article", {"json": article}, 1),
+        ("http.analyze_query", "POST", "/api/analyze-query",
+         {"json": {"user_query": query, "context": "article_search"}}, 1),
+        ("http.health_ready", "GET", "/health/ready", {}, 1)
+    ]
+
+
+def scales(args):
+    """Масштабы: без параметров (одиночные вызовы), по числу статей, по числу авторов и тем"""
+    for concurrency in args.concurrency:
+        yield {"concurrency": concurrency}
+        for articles in args.articles:
+            yield {"articles": articles, "concurrency": concurrency}
+        for authors, topics_per_author in product(args.authors, args.topics_per_author):
+            yield {"authors": authors, "topics_per_author": topics_per_author, "concurrency": concurrency}
+
+
+def scenario_id(name: str, params: dict) -> str:
+    return name + "[" + ",".join(f"{key}={params[key]}" for key in SCENARIO_PARAMS if key in params) + "]"
+
+
+def run_suite(args) -> dict:
+    import httpx
+
+    from src.main import app, ml_service
+    from src.utils.vector_utils import vector_to_base64
+
+    configure(ml_service, args)
+    topics = list(ml_service.config['topics']['predefined_topics'])
+    vocabulary = make_vocabulary(topics)
+    results = []
+
+    async def run_http_scenarios(scenarios, params):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            rows = []
+            for name, method, path, kwargs, items in scenarios:
+                latencies, wall, errors = await run_http(
+                    client, method, path, kwargs, args.requests, params["concurrency"], args.warmup
+                )
+                rows.append((name, latencies, wall, errors, items))
+            return rows
+
+    for params in scales(args):
+        # Данные зависят только от seed и масштаба: прогоны сравнимы между собой
+        rng = np.random.default_rng([args.seed, params.get("articles", 0), params.get("authors", 0),
+                                     params.get("topics_per_author", 0)])
+        articles = make_articles(params.get("articles", 1), vocabulary, rng)
+        authors = make_authors(params.get("authors", 1), params.get("topics_per_author", 1), topics, rng)
+        data = {
+            "articles": articles,
+            "authors": authors,
+            "departments": make_departments(authors, args.authors_per_department),
+            "topic": str(rng.choice(topics)),
+            "query": make_text(rng, vocabulary, 3, 8)
+        }
+        if "articles" in params:
+            titles = ml_service.bert_model.encode_batch([a["title_ru"] for a in articles])
+            abstracts = ml_service.bert_model.encode_batch([a["abstract_ru"] for a in articles])
+            data["embedded"] = [
+                {**a, "title_embedding": vector_to_base64(t), "abstract_embedding": vector_to_base64(b)}
+                for a, t, b in zip(articles, titles, abstracts)
+            ]
+
+        rows = []
+        if "service" in args.layers:
+            for name, call, items in service_scenarios(ml_service, data, params):
+                latencies, wall, errors = run_service(call, args.requests, params["concurrency"], args.warmup)
+                rows.append((name, latencies, wall, errors, items))
+        if "http" in args.layers:
+            rows += asyncio.run(run_http_scenarios(http_scenarios(ml_service, data, params), params))
+
+        for name, latencies, wall, errors, items in rows:
+            row = {"name": name, "id": scenario_id(name, params), "params": params,
+                   "items_per_call": items, **summarize(latencies, wall, items, errors)}
+            results.append(row)
+            print(f"{row['id']:<80} p50 {row['p50_ms'] or 0:9.2f} мс  p95 {row['p95_ms'] or 0:9.2f} мс  "
+                  f"p99 {row['p99_ms'] or 0:9.2f} мс  {row['throughput_rps']:9.1f} выз/с  "
+                  f"{row['items_per_second']:10.1f} эл/с  ошибок {errors}")
+
+    ml_service.close()
+    return {"meta": environment(args), "results": results}
+
+
+def environment(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "backend": args.backend,
+        "seed": args.seed,
+        "requests": args.requests,
+        "cache": args.cache,
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Сравнение с эталоном: регрессия - p95 выше или пропускная способность ниже больше чем на tolerance"""
+    if current["meta"].get("backend") != baseline["meta"].get("backend"):
+        print(f"Внимание: бэкенды различаются ({current['meta'].get('backend')} vs "
+              f"{baseline['meta'].get('backend')}), сравнение некорректно")
+
+    reference = {row["id"]: row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        base = reference.pop(row["id"], None)
+        if base is None:
+            print(f"{row['id']:<80} нет в эталоне")
+            continue
+        if not row["p95_ms"] or not base["p95_ms"]:
+            continue
+        p95_ratio = row["p95_ms"] / base["p95_ms"]
+        throughput_ratio = row["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 1.0
+        regressed = p95_ratio > 1 + tolerance or throughput_ratio < 1 - tolerance
+        if regressed:
+            regressions.append({"id": row["id"], "p95_ratio": p95_ratio, "throughput_ratio": throughput_ratio})
+        print(f"{row['id']:<80} p95 x{p95_ratio:5.2f}  пропускная способность x{throughput_ratio:5.2f}"
+              f"{'  РЕГРЕССИЯ' if regressed else ''}")
+    for missing in reference:
+        print(f"{missing:<80} нет в текущем прогоне")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["hash", "real"], default="hash")
+    parser.add_argument("--layers", nargs="+", choices=["service", "http"], default=["service", "http"])
+    parser.add_argument("--articles", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--authors", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--topics-per-author", type=int, nargs="+", default=[5])
+    parser.add_argument("--authors-per-department", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--requests", type=int, default=30, help="замеряемых вызовов на сценарий")
+    parser.add_argument("--warmup", type=int, default=2, help="вызовов прогрева на сценарий")
+    parser.add_argument("--cache", action="store_true", help="не выключать кэш эмбеддингов")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON-файл для результатов")
+    parser.add_argument("--baseline", help="JSON-файл эталона для сравнения")
+    parser.add_argument("--compare", help="сравнить готовый JSON-файл с --baseline без прогона")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        if not args.baseline:
+            parser.error("--compare requires --baseline")
+        with open(args.compare) as f:
+            report = json.load(f)
+    else:
+        report = run_suite(args)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        print(f"Регрессий: {len(regressions)} (допуск {args.tolerance:.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
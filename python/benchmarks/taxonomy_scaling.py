@@ -0,0 +1,90 @@
+"""Иерархический скоринг тематик (домен -> область -> тема) против полного перебора на больших таксономиях.
+
+Таксономия и эмбеддинги синтетические (масштаб ГРНТИ): центры доменов, области вокруг доменов,
+темы вокруг областей; тексты - шумные копии случайных тем. Эталон - TopicIndex.match (все темы),
+recall@k - доля эталонного топ-k, найденная HierarchicalTopicIndex при заданных ширинах луча.
+
+Запуск из каталога python/:
+    python -m benchmarks.taxonomy_scaling --domains 70 --areas-per-domain 12 --topics-per-area 40 \\
+        --domain-beam 2 4 8 --area-beam 4 8 16
+"""
+import argparse
+import json
+import time
+from itertools import product
+
+import numpy as np
+
+from src.topic.taxonomy import Taxonomy
+from src.topic.topic_index import HierarchicalTopicIndex, TopicIndex
+
+
+def make_taxonomy(domains: int, areas: int, topics: int, dimension: int, spread: float, rng):
+    """Синтетические пути и эмбеддинги тем: шум уровня spread вокруг родителя"""
+    paths, vectors = [], []
+    for d in range(domains):
+        domain_center = rng.standard_normal(dimension)
+        for a in range(areas):
+            area_center = domain_center + spread * rng.standard_normal(dimension)
+            for t in range(topics):
+                paths.append((f"домен {d}", f"область {d}.{a}", f"тема {d}.{a}.{t}"))
+                vectors.append(area_center + spread * rng.standard_normal(dimension))
+    return Taxonomy(paths), np.array(vectors, dtype=np.float32)
+
+
+def measure(index: TopicIndex, texts: np.ndarray, k: int, batch_size: int):
+    results, start = [], time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        results += index.match(texts[offset:offset + batch_size], threshold=-1.0, top_k=k)
+    seconds = time.perf_counter() - start
+    return [[t["topic_name"] for t in topics] for topics in results], seconds * 1000 / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--domains", type=int, default=70)
+    parser.add_argument("--areas-per-domain", type=int, default=12)
+    parser.add_argument("--topics-per-area", type=int, default=40)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--spread", type=float, default=0.8, help="разброс потомков вокруг родителя")
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=1.0, help="шум текста вокруг его темы")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--domain-beam", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--area-beam", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON-файл для результатов")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    taxonomy, vectors = make_taxonomy(args.domains, args.areas_per_domain, args.topics_per_area,
+                                      args.dimension, args.spread, rng)
+    targets = rng.integers(0, len(taxonomy), args.texts)
+    texts = vectors[targets] + args.noise * rng.standard_normal((args.texts, args.dimension)).astype(np.float32)
+
+    truth, flat_ms = measure(TopicIndex(taxonomy.topics, vectors), texts, args.k, args.batch_size)
+    report = {"topics": len(taxonomy), "areas": len(taxonomy.areas), "domains": len(taxonomy.domains),
+              "k": args.k, "flat_ms_per_text": flat_ms, "runs": []}
+    print(f"{len(taxonomy)} тем, {len(taxonomy.areas)} областей, {len(taxonomy.domains)} доменов; "
+          f"полный перебор {flat_ms:.3f} мс/текст")
+
+    for domain_beam, area_beam in product(args.domain_beam, args.area_beam):
+        index = HierarchicalTopicIndex(taxonomy, vectors, domain_beam=domain_beam, area_beam=area_beam, min_topics=0)
+        found, ms = measure(index, texts, args.k, args.batch_size)
+        recall = float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, truth)]))
+        top1 = float(np.mean([a[:1] == b[:1] for a, b in zip(found, truth)]))
+        scored = min(domain_beam, len(taxonomy.domains)) * args.areas_per_domain + area_beam * args.topics_per_area
+        row = {"domain_beam": domain_beam, "area_beam": area_beam, f"recall@{args.k}": recall, "top1": top1,
+               "ms_per_text": ms, "speedup": flat_ms / ms, "scored_fraction": scored / len(taxonomy)}
+        report["runs"].append(row)
+        print(f"домены {domain_beam:>3}  области {area_beam:>3}  recall@{args.k} {recall:.4f}  top1 {top1:.4f}  "
+              f"{ms:7.3f} мс/текст  x{row['speedup']:.1f}  скоринг {row['scored_fraction']:.1%} узлов")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
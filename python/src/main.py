@@ -1,4 +1,9 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import heapq
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import numpy as np
 from pydantic import BaseModel
@@ -7,21 +12,14 @@ import uvicorn
 from loguru import logger
 
 from .ml_service import MLService
-
-app = FastAPI(title="AI Agent ML Service")
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+from .utils import transport
+from .utils.metrics import metrics, MetricsMiddleware
 
 class ArticleAnalysisRequest(BaseModel):
     document_id: str
     title_ru: str
     abstract_ru: str
+    author_ids: Optional[List[str]] = None  # авторы статьи для профилей экспертов
 
 class ArticleTopic(BaseModel):
     topic_name: str
@@ -30,96 +28,320 @@ class ArticleTopic(BaseModel):
 
 class ArticleAnalysisResponse(BaseModel):
     topics: List[ArticleTopic]
-    title_embedding: str  # base64 string
-    abstract_embedding: str  # base64 string
+    title_embedding: str  # base64 string (в msgpack-ответе - сырые float32-байты)
+    abstract_embedding: str  # base64 string (в msgpack-ответе - сырые float32-байты)
+
+class ArticlesAnalysisRequest(BaseModel):
+    articles: List[ArticleAnalysisRequest]
+
+class ArticleAnalysisResult(ArticleAnalysisResponse):
+    document_id: str
 
-# Инициализация ML сервиса
+class ArticlesAnalysisResponse(BaseModel):
+    results: List[ArticleAnalysisResult]
+
+# Инициализация ML сервиса (без загрузки модели)
 ml_service = MLService()
+# Блокирующие вызовы модели выполняются в пуле инференса, event loop только разбирает запросы и сериализует ответы
+inference = ml_service.executor
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Прогрев модели в фоне при старте; сохранение индекса и остановка пулов при завершении"""
+    # Прогрев не блокирует старт: liveness отвечает сразу, readiness - после прогрева
+    warmup = asyncio.ensure_future(inference.run(ml_service.warmup))
+    try:
+        yield
+    finally:
+        if not warmup.done():
+            warmup.cancel()
+        ml_service.close()
+
+app = FastAPI(title="AI Agent ML Service", lifespan=lifespan,
+              default_response_class=transport.TimedJSONResponse)
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+app.add_middleware(MetricsMiddleware)
 
 @app.post("/api/analyze-article", response_model=ArticleAnalysisResponse)
-async def analyze_article(request: ArticleAnalysisRequest):
+async def analyze_article(http_request: Request):
     """Анализ тематик статьи"""
     try:
-        result = ml_service.analyze_article_topics(
+        request = ArticleAnalysisRequest(**await transport.read_body(http_request))
+        authors = {"author_ids": request.author_ids} if request.author_ids is not None else {}
+        result = await inference.run(
+            ml_service.analyze_article_topics,
             request.document_id,
             request.title_ru,
-            request.abstract_ru
+            request.abstract_ru,
+            binary=transport.accepts_binary(http_request),
+            **authors
         )
-        return result
+        return transport.render(http_request, result)
     except Exception as e:
         logger.error(f"Error in analyze_article: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/analyze-articles", response_model=ArticlesAnalysisResponse)
+async def analyze_articles(http_request: Request):
+    """Пакетный анализ тематик статей"""
+    try:
+        request = ArticlesAnalysisRequest(**await transport.read_body(http_request))
+        result = await inference.run(
+            ml_service.analyze_articles_topics,
+            [article.model_dump(exclude_none=True) for article in request.articles],
+            binary=transport.accepts_binary(http_request)
+        )
+        return transport.render(http_request, result)
+    except Exception as e:
+        logger.error(f"Error in analyze_articles: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/analyze-query")
-async def analyze_query(request: dict):
+async def analyze_query(http_request: Request):
     """Анализ пользовательского запроса"""
     try:
-        result = ml_service.analyze_user_query(
+        request = await transport.read_body(http_request)
+        result = await inference.run(
+            ml_service.analyze_user_query,
             request["user_query"],
-            request.get("context", "article_search")
+            request.get("context", "article_search"),
+            binary=transport.accepts_binary(http_request)
         )
-        return result
+        return transport.render(http_request, result)
     except Exception as e:
         logger.error(f"Error in analyze_query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/semantic-search")
-async def semantic_search(request: dict):
+async def semantic_search(http_request: Request):
     try:
-        import base64
-        import numpy as np
+        if transport.is_ndjson_request(http_request) or transport.accepts_ndjson(http_request):
+            return await stream_semantic_search(http_request)
+
+        request = await transport.read_body(http_request)
+
+        # Без списка статей ищем по серверному индексу
+        if "articles" not in request:
+            result = await inference.run(
+                ml_service.indexed_article_search,
+                query_vector=request.get("query_vector"),
+                query_text=request.get("query_text"),
+                max_results=request.get("max_results", 10),
+                nprobe=request.get("nprobe")
+            )
+            return transport.render(http_request, result)
 
-        # 1) decode query vector
         raw_q = request.get("query_vector")
         if raw_q is None:
             raise ValueError("missing query_vector")
 
-        query_vec = np.frombuffer(base64.b64decode(raw_q), dtype=np.float32)
-
-        # 2) pass article embeddings AS BASE64
-        articles = request.get("articles", [])
-
-        return ml_service.semantic_article_search(
-            raw_q,      # base64 string
-            articles,   # unchanged
+        # Векторы (base64 или сырые байты) декодируются один раз - в MLService
+        result = await inference.run(
+            ml_service.semantic_article_search,
+            raw_q,
+            request.get("articles", []),
             request.get("max_results", 10)
         )
+        return transport.render(http_request, result)
 
     except Exception as e:
         logger.error(f"Error in semantic_search: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/index/articles")
+async def index_articles(http_request: Request):
+    """Добавление или обновление статей в индексе поиска"""
+    try:
+        request = await transport.read_body(http_request)
+        result = await inference.run(ml_service.upsert_articles, request["articles"])
+        return transport.render(http_request, result)
+    except Exception as e:
+        logger.error(f"Error in index_articles: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/index/delete")
+async def delete_indexed_articles(http_request: Request):
+    """Удаление статей из индекса поиска"""
+    try:
+        request = await transport.read_body(http_request)
+        result = await inference.run(ml_service.delete_articles, request["document_ids"])
+        return transport.render(http_request, result)
+    except Exception as e:
+        logger.error(f"Error in delete_indexed_articles: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/analyze-experts")
-async def analyze_experts(request: dict):
+async def analyze_experts(http_request: Request):
     """Анализ экспертов по теме"""
     try:
-        result = ml_service.analyze_experts_by_topic(
+        if transport.is_ndjson_request(http_request) or transport.accepts_ndjson(http_request):
+            return await stream_bulk_analysis(
+                http_request, "authors", ml_service.analyze_experts_by_topic, "experts", "expertise_score"
+            )
+
+        request = await transport.read_body(http_request)
+        # Без списка авторов эксперты ищутся по профилям, накопленным сервисом
+        result = await inference.run(
+            ml_service.analyze_experts_by_topic,
             request["topic"],
-            request["authors"]
+            request.get("authors"),
+            request.get("max_results")
         )
-        return result
+        return transport.render(http_request, result)
     except Exception as e:
         logger.error(f"Error in analyze_experts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/profiles/authors")
+async def upsert_author_profiles(http_request: Request):
+    """Добавление или обновление профилей авторов"""
+    try:
+        request = await transport.read_body(http_request)
+        result = await inference.run(ml_service.upsert_authors, request["authors"])
+        return transport.render(http_request, result)
+    except Exception as e:
+        logger.error(f"Error in upsert_author_profiles: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/profiles/departments")
+async def upsert_department_aggregates(http_request: Request):
+    """Добавление или обновление состава кафедр"""
+    try:
+        request = await transport.read_body(http_request)
+        result = await inference.run(ml_service.upsert_departments, request["departments"])
+        return transport.render(http_request, result)
+    except Exception as e:
+        logger.error(f"Error in upsert_department_aggregates: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/analyze-departments")
-async def analyze_departments(request: dict):
+async def analyze_departments(http_request: Request):
     """Анализ кафедр по теме"""
     try:
-        result = ml_service.analyze_departments_by_topic(
+        if transport.is_ndjson_request(http_request) or transport.accepts_ndjson(http_request):
+            return await stream_bulk_analysis(
+                http_request, "departments", ml_service.analyze_departments_by_topic, "departments", "strength_score"
+            )
+
+        request = await transport.read_body(http_request)
+        # Без списка кафедр используются агрегаты, накопленные сервисом
+        result = await inference.run(
+            ml_service.analyze_departments_by_topic,
             request["topic"],
-            request["departments"]
+            request.get("departments"),
+            request.get("max_results")
         )
-        return result
+        return transport.render(http_request, result)
     except Exception as e:
         logger.error(f"Error in analyze_departments: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def read_stream(http_request: Request, items_key: str):
+    """Параметры и поток элементов: NDJSON-загрузка (первая строка - параметры) или обычное тело"""
+    if transport.is_ndjson_request(http_request):
+        lines = transport.iter_ndjson(http_request)
+        try:
+            params = await lines.__anext__()
+        except StopAsyncIteration:
+            raise ValueError("empty NDJSON body, expected parameters line")
+        return params, lines
+
+    request = await transport.read_body(http_request)
+    if items_key not in request:
+        return request, None
+    return request, transport.iterate(request.pop(items_key))
+
+async def stream_bulk_analysis(http_request: Request, items_key: str, analyze, results_key: str, score_key: str):
+    """Пакетный анализ потока: вход читается батчами, ранжированный результат отдается, когда топ окончателен"""
+    params, items = await read_stream(http_request, items_key)
+    if items is None:
+        raise KeyError(items_key)
+    topic = params["topic"]
+    max_results = params.get("max_results")
+    batch_size = ml_service.config['streaming']['batch_size']
+
+    # Слияние по батчам: в памяти один батч входа и текущий топ (с max_results - не больше max_results элементов)
+    top = []
+    async for batch in transport.batches(items, batch_size):
+        result = await inference.run(analyze, topic, batch)
+        top += result[results_key]
+        if max_results is not None:
+            top = heapq.nlargest(max_results, top, key=lambda x: x[score_key])
+    if max_results is None:
+        top.sort(key=lambda x: x[score_key], reverse=True)
+
+    if transport.accepts_ndjson(http_request):
+        return transport.ndjson_response(transport.iterate(top))
+    return transport.render(http_request, {results_key: top})
+
+async def stream_semantic_search(http_request: Request):
+    """Поиск по потоку статей: вход читается батчами, результаты отдаются, когда топ-k окончателен"""
+    params, articles = await read_stream(http_request, "articles")
+    max_results = params.get("max_results", 10)
+
+    if articles is None:
+        result = await inference.run(
+            ml_service.indexed_article_search,
+            query_vector=params.get("query_vector"),
+            query_text=params.get("query_text"),
+            max_results=max_results,
+            nprobe=params.get("nprobe")
+        )
+        top = result["results"]
+    else:
+        query_vector = params.get("query_vector")
+        if query_vector is None:
+            raise ValueError("missing query_vector")
+
+        # Слияние топ-k по батчам: в памяти один батч статей и текущие max_results результатов
+        top = []
+        async for batch in transport.batches(articles, ml_service.config['streaming']['batch_size']):
+            result = await inference.run(ml_service.semantic_article_search, query_vector, batch, max_results)
+            top = heapq.nlargest(max_results, top + result["results"], key=lambda r: r["relevance_score"])
+
+    if transport.accepts_ndjson(http_request):
+        return transport.ndjson_response(transport.iterate(top))
+    return transport.render(http_request, {"results": top, "total_found": len(top)})
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    """Счетчики кэша эмбеддингов"""
+    return ml_service.get_cache_stats()
+
+@app.get("/api/batching-stats")
+async def batching_stats():
+    """Счетчики динамического батчинга эмбеддингов"""
+    return ml_service.get_batching_stats()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health():
     """Health check"""
     return {"status": "healthy", "service": "ai-agent-ml"}
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness: процесс жив и обслуживает event loop"""
+    return {"status": "alive", "service": "ai-agent-ml"}
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: модель прогрета, можно направлять трафик"""
+    if not ml_service.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "service": "ai-agent-ml"})
+    return {"status": "ready", "service": "ai-agent-ml"}
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -1,3 +1,4 @@
+import hashlib
 import numpy as np
 from loguru import logger
 from typing import List, Dict, Any
@@ -7,7 +8,13 @@ from .models.bert_model import RuBERTModel
 from .services.topic_analyzer import TopicAnalyzerService
 from .services.semantic_search import SemanticSearchService
 from .services.expert_analyzer import ExpertAnalyzerService
+from .services.inference_executor import InferenceExecutor
+from .services.query_cache import QueryResultCache
+from .services.document_store import DocumentStore, content_hash
 from .topic.intelligent_topics import extended_topics
+from .topic.taxonomy import load_taxonomy
+from .utils.vector_utils import decode_vector, encode_vector
+from .utils.metrics import metrics
 
 
 class MLService:
@@ -19,58 +26,241 @@ class MLService:
         self.config = {
             'models': {
                 'bert_model': "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-                'topic_model': "cointegrated/rubert-tiny2", 
-                'device': "cpu"
+                'device': "cpu",
+                'warmup': True,  # загрузка модели и матрицы тематик при старте (иначе - при первом запросе)
+                'backend': 'torch',  # 'torch' | 'onnx' | 'onnx-int8' (onnxruntime, CPU) | 'hash' (без модели, для бенчмарков)
+                'onnx_path': None,  # готовый ONNX-граф; иначе экспорт в onnx_dir при первом запуске
+                'onnx_dir': 'onnx_models',
+                'max_length': 128  # обрезка токенов для ONNX (как max_seq_length у модели)
             },
             'embeddings': {
                 'dimension': 384,
-                'normalize': True
+                'normalize': True,
+                'batch_size': 64,  # максимум текстов в одном проходе модели
+                'max_batch_tokens': 4096  # токенов с паддингом на проход (батчи по длине); None - по batch_size
+            },
+            'cache': {
+                'enabled': True,
+                'max_bytes': 64 * 1024 * 1024,
+                'disk_path': None  # путь к SQLite-файлу для кэша между перезапусками
+            },
+            'document_store': {
+                'path': None,  # SQLite-файл с результатами анализа статей; повторная отправка без изменения текста - без инференса
+                'model_version': None  # None - имя модели, бэкенд и отпечаток таксономии
+            },
+            'profiles': {
+                'path': None,  # .npz-файл профилей авторов
+                'departments_path': None,  # JSON-файл состава кафедр (агрегаты пересчитываются из профилей)
+                'auto_update': True,  # учитывать в профилях статьи, пришедшие с author_ids
+                'max_results': 50  # экспертов/кафедр в ответе без списка авторов/кафедр
+            },
+            'query_cache': {
+                'enabled': True,  # готовые ответы /api/analyze-query по (интерпретированный запрос, context)
+                'max_entries': 4096,
+                'ttl_seconds': 600
+            },
+            'search': {
+                'auto_index': True,  # регистрировать статьи в индексе при анализе
+                'index_path': None,  # .npz-файл индекса статей
+                'backend': 'exact',  # 'exact' | 'ivf' (приближенный поиск для больших корпусов)
+                'storage': 'float32',  # 'float32' | 'float16' | 'int8' (компактные векторы + точный пересчет)
+                'rescore_factor': 4,  # кандидатов на точный пересчет: rescore_factor * max_results
+                'full_precision_path': None,  # файл для точных векторов вместо RAM (memmap)
+                'ivf': {
+                    'nlist': 1024,  # число кластеров
+                    'nprobe': 16,  # сколько кластеров просматривать: больше - выше recall, медленнее
+                    'train_size': 50000  # обучение IVF, когда в индексе столько статей
+                }
             },
             'topics': {
-                'predefined_topics': extended_topics
+                'taxonomy_path': None,  # JSON/CSV-классификатор (ГРНТИ/УДК); None - встроенная таксономия
+                'predefined_topics': extended_topics,
+                'index_cache_size': 16,
+                'hierarchical': {
+                    'min_topics': 2000,  # меньше тем - полный перебор
+                    'domain_beam': 4,  # сколько доменов раскрывать
+                    'area_beam': 8  # сколько областей раскрывать среди областей выбранных доменов
+                }
+            },
+            'batching': {
+                'enabled': True,
+                'max_batch_size': 32,  # текстов в одном проходе модели
+                'max_wait_ms': 5.0  # сколько первый текст ждет попутчиков
+            },
+            'streaming': {
+                'batch_size': 256  # элементов NDJSON-потока на один вызов модели
+            },
+            'inference': {
+                'max_workers': 8,  # параллельных запросов; одиночные encode_text ждут общий батч
+                'intra_op_threads': None  # потоков torch на вызов (None - по умолчанию torch)
+            },
+            'metrics': {
+                'enabled': True  # гистограммы этапов и /metrics в формате Prometheus
             }
         }
+        metrics.enabled = self.config['metrics']['enabled']
         
-        self.bert_model = RuBERTModel(self.config)
+        # Модель не загружается в конструкторе: импорт приложения и тесты не ждут трансформер
+        taxonomy = load_taxonomy(self.config['topics'])
+        self.config['topics']['predefined_topics'] = taxonomy.topics
+        self.bert_model = RuBERTModel(self.config, taxonomy=taxonomy)
+        self.ready = False
         self.topic_analyzer = TopicAnalyzerService(self.bert_model)
         self.semantic_search = SemanticSearchService(self.bert_model)
         self.expert_analyzer = ExpertAnalyzerService(self.bert_model)
+        self.executor = InferenceExecutor(
+            max_workers=self.config['inference']['max_workers'],
+            intra_op_threads=self.config['inference']['intra_op_threads']
+        )
+        self.document_store = self._create_document_store(self.config['document_store'], taxonomy.topics)
+        if self.document_store is not None and len(self.semantic_search.index) == 0:
+            self.reindex_from_store()
+        query_cache_config = self.config['query_cache']
+        self.query_cache = QueryResultCache(
+            max_entries=query_cache_config['max_entries'],
+            ttl_seconds=query_cache_config['ttl_seconds']
+        ) if query_cache_config['enabled'] else None
         
         logger.info("ML сервис инициализирован")
     
-    def analyze_article_topics(self, document_id: str, title_ru: str, abstract_ru: str) -> Dict[str, Any]:
-        """Анализ тематик статьи"""
+    def _create_document_store(self, store_config: dict, topics: List[str]):
+        if not store_config.get('path'):
+            return None
+        model_version = store_config.get('model_version')
+        if model_version is None:
+            # Тематики в записях зависят и от таксономии: ее смена тоже требует пересчета
+            taxonomy_digest = hashlib.sha256("\n".join(topics).encode("utf-8")).hexdigest()[:12]
+            models_config = self.config['models']
+            model_version = f"{models_config['bert_model']}|{models_config['backend']}|{taxonomy_digest}"
+        return DocumentStore(store_config['path'], model_version)
+    
+    def warmup(self):
+        """Прогрев перед приемом трафика; после него сервис готов (readiness)"""
+        if self.config['models']['warmup']:
+            logger.info("Прогрев модели...")
+            try:
+                self.bert_model.warmup()
+            except Exception as e:
+                # Сервис остается неготовым: оркестратор не направит на него трафик
+                logger.error(f"Ошибка прогрева модели: {e}")
+                return
+        self.ready = True
+        logger.info("ML сервис готов к приему запросов")
+    
+    def analyze_article_topics(self, document_id: str, title_ru: str, abstract_ru: str,
+                               binary: bool = False, author_ids: List[str] = None) -> Dict[str, Any]:
+        """Анализ тематик статьи (binary=True - эмбеддинги сырыми float32-байтами вместо base64)"""
         logger.info(f"Анализ статьи {document_id}")
         
-        result = self.topic_analyzer.analyze_article_topics(document_id, title_ru, abstract_ru)
+        if self.document_store is not None:
+            article = {"document_id": document_id, "title_ru": title_ru, "abstract_ru": abstract_ru}
+            result = self._analyze_with_store([article], binary)[0]
+        else:
+            result = self.topic_analyzer.analyze_article_topics(document_id, title_ru, abstract_ru, binary=binary)
         
         logger.info(f"Title embedding type from topic_analyzer: {type(result['title_embedding'])}")
         logger.info(f"Abstract embedding type from topic_analyzer: {type(result['abstract_embedding'])}")
         
+        if self.config['search']['auto_index']:
+            self.semantic_search.index_embeddings(
+                [document_id],
+                decode_vector(result["title_embedding"])[None, :],
+                decode_vector(result["abstract_embedding"])[None, :]
+            )
+        if author_ids is not None:
+            self._register_authors([document_id], [author_ids], [result["topics"]])
+        
         return {
             "topics": result["topics"],
             "title_embedding": result["title_embedding"],  
             "abstract_embedding": result["abstract_embedding"]  
         }
     
-    def analyze_user_query(self, user_query: str, context: str) -> Dict[str, Any]:
-        """Анализ пользовательского запроса"""
-        logger.info(f"Анализ запроса: {user_query}")
+    def analyze_articles_topics(self, articles: List[Dict], binary: bool = False) -> Dict[str, Any]:
+        """Пакетный анализ тематик статей"""
+        logger.info(f"Пакетный анализ {len(articles)} статей")
+        
+        if self.document_store is not None:
+            results = self._analyze_with_store(articles, binary)
+        else:
+            results = self.topic_analyzer.analyze_articles_topics(articles, binary=binary)
         
-        result = self.topic_analyzer.analyze_user_query(user_query, context)
+        if self.config['search']['auto_index'] and results:
+            self.semantic_search.index_embeddings(
+                [r["document_id"] for r in results],
+                np.stack([decode_vector(r["title_embedding"]) for r in results]),
+                np.stack([decode_vector(r["abstract_embedding"]) for r in results])
+            )
+        authored = [i for i, article in enumerate(articles) if article.get("author_ids") is not None]
+        if authored:
+            self._register_authors([results[i]["document_id"] for i in authored],
+                                   [articles[i]["author_ids"] for i in authored],
+                                   [results[i]["topics"] for i in authored])
         
         return {
-            "interpreted_query": result["interpreted_query"],
-            "key_concepts": result["key_concepts"],
-            "query_vector": base64.b64encode(result["query_vector"]).decode('utf-8'),
-            "query_type": result["query_type"]
+            "results": results
         }
     
-    def semantic_article_search(self, query_vector: str, articles: List[Dict], max_results: int):
+    def _analyze_with_store(self, articles: List[Dict], binary: bool) -> List[Dict]:
+        """Анализ статей через хранилище: статьи с неизменным текстом возвращаются без инференса"""
+        hashes = [content_hash(article["title_ru"], article["abstract_ru"]) for article in articles]
+        stored = self.document_store.get_many([article["document_id"] for article in articles], hashes)
+        
+        results = [
+            None if record is None else {
+                "document_id": record["document_id"],
+                "topics": record["topics"],
+                "title_embedding": encode_vector(record["title_embedding"], binary),
+                "abstract_embedding": encode_vector(record["abstract_embedding"], binary)
+            }
+            for record in stored
+        ]
+        missing = [i for i, record in enumerate(stored) if record is None]
+        if missing:
+            computed = self.topic_analyzer.analyze_articles_topics([articles[i] for i in missing], binary=binary)
+            self.document_store.put_many(
+                [result["document_id"] for result in computed],
+                [hashes[i] for i in missing],
+                np.stack([decode_vector(result["title_embedding"]) for result in computed]),
+                np.stack([decode_vector(result["abstract_embedding"]) for result in computed]),
+                [result["topics"] for result in computed]
+            )
+            for i, result in zip(missing, computed):
+                results[i] = result
+        
+        return results
+    
+    def _register_authors(self, document_ids: List[str], author_ids: List[List[str]], topics: List[List[Dict]]):
+        """Авторство статей: в хранилище (для пересборки профилей) и в профили авторов"""
+        if self.document_store is not None:
+            self.document_store.set_authors(document_ids, author_ids)
+        if self.config['profiles']['auto_update']:
+            self.expert_analyzer.register_articles(document_ids, author_ids, topics)
+    
+    def analyze_user_query(self, user_query: str, context: str, binary: bool = False) -> Dict[str, Any]:
+        """Анализ пользовательского запроса"""
+        logger.info(f"Анализ запроса: {user_query}")
+        
+        def compute() -> Dict[str, Any]:
+            result = self.topic_analyzer.analyze_user_query(user_query, context)
+            return {
+                "interpreted_query": result["interpreted_query"],
+                "key_concepts": result["key_concepts"],
+                "query_vector": result["query_vector"] if binary else base64.b64encode(result["query_vector"]).decode('utf-8'),
+                "query_type": result["query_type"]
+            }
+        
+        if self.query_cache is None:
+            return compute()
+        # Запросы, совпадающие после интерпретации, дают один и тот же ответ
+        key = (self.topic_analyzer._interpret_query(user_query, context), context, binary)
+        return dict(self.query_cache.get_or_compute(key, compute))
+    
+    def semantic_article_search(self, query_vector, articles: List[Dict], max_results: int):
         logger.info(f"Семантический поиск по {len(articles)} статьям")
 
-        # 1) decode query vector
-        query_vec = np.frombuffer(base64.b64decode(query_vector), dtype=np.float32)
+        # 1) decode query vector (base64 из JSON или сырые байты из msgpack)
+        query_vec = decode_vector(query_vector)
 
         processed_articles = []
         for art in articles:
@@ -78,7 +268,7 @@ class MLService:
                 "document_id": art["document_id"],
                 "title_ru": art["title_ru"],
                 "abstract_ru": art["abstract_ru"],
-                # 2) RAW base64, decode later in SemanticSearchService
+                # 2) base64 / raw bytes, decode later in SemanticSearchService
                 "title_embedding": art["title_embedding"],
                 "abstract_embedding": art["abstract_embedding"]
             })
@@ -90,22 +280,155 @@ class MLService:
             "total_found": len(results)
         }
 
+    def indexed_article_search(self, query_vector=None, query_text: str = None,
+                               max_results: int = 10, nprobe: int = None) -> Dict[str, Any]:
+        """Семантический поиск по серверному индексу статей"""
+        if query_vector is not None:
+            query_vec = decode_vector(query_vector)
+        elif query_text:
+            query_vec = self.bert_model.encode_text(query_text)
+        else:
+            raise ValueError("missing query_vector or query_text")
+        
+        logger.info(f"Поиск по индексу из {len(self.semantic_search.index)} статей")
+        results = self.semantic_search.search_index(query_vec, max_results, nprobe=nprobe)
+        
+        return {
+            "results": results,
+            "total_found": len(results)
+        }
+    
+    def upsert_articles(self, articles: List[Dict]) -> Dict[str, Any]:
+        """Добавление или обновление статей в индексе поиска"""
+        indexed = self.semantic_search.index_articles(articles)
+        return {
+            "indexed": indexed,
+            "index_size": len(self.semantic_search.index)
+        }
     
-    def analyze_experts_by_topic(self, topic: str, authors: List[Dict]) -> Dict[str, Any]:
-        """Анализ экспертов по теме"""
+    def delete_articles(self, document_ids: List[str]) -> Dict[str, Any]:
+        """Удаление статей из индекса поиска"""
+        deleted = self.semantic_search.remove_articles(document_ids)
+        if self.document_store is not None:
+            self.document_store.delete_many(document_ids)
+        if self.config['profiles']['auto_update']:
+            self.expert_analyzer.remove_articles(document_ids)
+        return {
+            "deleted": deleted,
+            "index_size": len(self.semantic_search.index)
+        }
+    
+    def reindex_from_store(self) -> int:
+        """Заполнение индекса поиска эмбеддингами из хранилища статей (без инференса)"""
+        indexed = 0
+        for batch in self.document_store.export():
+            self.semantic_search.index_embeddings(
+                batch["document_ids"], batch["title_embeddings"], batch["abstract_embeddings"]
+            )
+            indexed += len(batch["document_ids"])
+        logger.info(f"Индекс восстановлен из хранилища: {indexed} статей")
+        return indexed
+    
+    def save_index(self):
+        """Сохранение индекса статей на диск (если задан index_path)"""
+        self.semantic_search.save_index()
+    
+    def prepare_fork(self):
+        """Prefork-режим: модель и индекс статей загружаются один раз в родителе и делятся воркерами"""
+        self.bert_model.prepare_fork()
+        if self.document_store is not None:
+            self.document_store.close()
+        self.semantic_search.index.share_memory()
+        # Индекс - общий read-only снимок: статьи не регистрируются в нем на лету
+        self.config['search']['auto_index'] = False
+        # Профили тоже: авторство сохраняется в хранилище, профили пересобираются офлайн
+        self.expert_analyzer.profiles.read_only = True
+        self.config['profiles']['auto_update'] = False
+    
+    def after_fork(self):
+        """Инициализация воркера после fork"""
+        # Наблюдения прогрева в родителе не относятся к воркеру
+        metrics.reset()
+        self.bert_model.after_fork()
+        if self.document_store is not None:
+            self.document_store.open()
+    
+    def close(self):
+        """Остановка: сохранение индекса и профилей, завершение пула инференса и батчера, закрытие хранилища"""
+        self.save_index()
+        self.expert_analyzer.save_profiles()
+        self.executor.shutdown()
+        self.bert_model.close()
+        if self.document_store is not None:
+            self.document_store.close()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Статистика кэшей эмбеддингов и ответов на запросы, хранилища статей"""
+        cache = self.bert_model.embedding_cache
+        return {
+            "embedding_cache": cache.stats() if cache is not None else {"enabled": False},
+            "query_cache": self.query_cache.stats() if self.query_cache is not None else {"enabled": False},
+            "document_store": self.document_store.stats() if self.document_store is not None else {"enabled": False}
+        }
+    
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """Статистика динамического батчинга: глубина очереди и размер батчей"""
+        batcher = self.bert_model.batcher
+        return {
+            "embedding_batcher": batcher.stats() if batcher is not None else {"enabled": False}
+        }
+    
+    def analyze_experts_by_topic(self, topic: str, authors: List[Dict] = None,
+                                 max_results: int = None) -> Dict[str, Any]:
+        """Анализ экспертов по теме (без списка авторов - по накопленным профилям)"""
         logger.info(f"Анализ экспертов по теме: {topic}")
         
-        experts = self.expert_analyzer.analyze_experts_by_topic(topic, authors)
+        if authors is None:
+            experts = self.expert_analyzer.analyze_experts_from_profiles(
+                topic, max_results or self.config['profiles']['max_results']
+            )
+        else:
+            experts = self.expert_analyzer.analyze_experts_by_topic(topic, authors)
         
         return {
             "experts": experts
         }
     
-    def analyze_departments_by_topic(self, topic: str, departments: List[Dict]) -> Dict[str, Any]:
-        """Анализ кафедр по теме"""
+    def upsert_authors(self, authors: List[Dict]) -> Dict[str, Any]:
+        """Добавление или обновление профилей авторов"""
+        upserted = self.expert_analyzer.upsert_authors(authors)
+        return {
+            "upserted": upserted,
+            "profile_count": len(self.expert_analyzer.profiles)
+        }
+    
+    def rebuild_author_profiles(self) -> Dict[str, Any]:
+        """Пересборка профилей авторов из хранилища статей (офлайн, например после смены модели)"""
+        if self.document_store is None:
+            raise ValueError("document store is disabled: set config['document_store']['path']")
+        return {
+            "profile_count": self.expert_analyzer.rebuild_profiles(self.document_store)
+        }
+    
+    def upsert_departments(self, departments: List[Dict]) -> Dict[str, Any]:
+        """Добавление или обновление состава кафедр"""
+        upserted = self.expert_analyzer.upsert_departments(departments)
+        return {
+            "upserted": upserted,
+            "department_count": len(self.expert_analyzer.departments)
+        }
+    
+    def analyze_departments_by_topic(self, topic: str, departments: List[Dict] = None,
+                                     max_results: int = None) -> Dict[str, Any]:
+        """Анализ кафедр по теме (без списка кафедр - по агрегатам из профилей авторов)"""
         logger.info(f"Анализ кафедр по теме: {topic}")
         
-        dept_analysis = self.expert_analyzer.analyze_departments_by_topic(topic, departments)
+        if departments is None:
+            dept_analysis = self.expert_analyzer.analyze_departments_from_aggregates(
+                topic, max_results or self.config['profiles']['max_results']
+            )
+        else:
+            dept_analysis = self.expert_analyzer.analyze_departments_by_topic(topic, departments)
         
         return {
             "departments": dept_analysis
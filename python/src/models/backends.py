@@ -0,0 +1,248 @@
+import functools
+import hashlib
+import os
+import re
+import threading
+import time
+import typing as tp
+
+import numpy as np
+from loguru import logger
+
+from src.utils.metrics import metrics
+from src.utils.vector_utils import normalize_rows
+
+try:
+    import onnxruntime as ort
+except ImportError:  # onnxruntime опционален: без него доступен только torch-бэкенд
+    ort = None
+
+BACKENDS = ("torch", "onnx", "onnx-int8", "hash")
+
+# Допустимое расхождение с torch-путем: минимальное косинусное сходство эмбеддингов одного текста
+PARITY_MIN_COSINE = {
+    "onnx": 0.9999,
+    "onnx-int8": 0.98
+}
+
+
+def create_embedding_model(models_config: dict, intra_op_threads: tp.Optional[int] = None, dimension: int = 384):
+    """Модель эмбеддингов по config['models']['backend']; у всех бэкендов интерфейс encode как у SentenceTransformer"""
+    backend = models_config.get('backend', 'torch')
+    model_name = models_config['bert_model']
+
+    if backend == "hash":
+        return HashEmbeddingModel(dimension)
+
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name, device=models_config['device'])
+        # sentence-transformers >= 6 токенизирует в preprocess, более ранние - в tokenize
+        method = "preprocess" if hasattr(model, "preprocess") else "tokenize"
+        setattr(model, method, timed_tokenization(getattr(model, method)))
+        return model
+
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddingModel(
+            model_name,
+            onnx_path=models_config.get('onnx_path') or default_onnx_path(model_name, models_config.get('onnx_dir')),
+            quantize=backend == "onnx-int8",
+            max_length=models_config.get('max_length', 128),
+            intra_op_threads=intra_op_threads
+        )
+
+    raise ValueError(f"unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+
+_tokenization = threading.local()
+
+
+def timed_tokenization(tokenize: tp.Callable) -> tp.Callable:
+    """Обертка токенизатора: время в метрику и в счетчик текущего потока"""
+    @functools.wraps(tokenize)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return tokenize(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _tokenization.seconds = getattr(_tokenization, "seconds", 0.0) + elapsed
+            metrics.observe("ml_stage_duration_seconds", elapsed, stage="tokenization")
+    return wrapper
+
+
+def take_tokenization_seconds() -> float:
+    """Время токенизации в текущем потоке с прошлого вызова (счетчик сбрасывается)"""
+    seconds = getattr(_tokenization, "seconds", 0.0)
+    _tokenization.seconds = 0.0
+    return seconds
+
+
+def token_lengths(model, texts: tp.List[str]) -> tp.Optional[np.ndarray]:
+    """Число токенов каждого текста после обрезки; None, если модель не дает токенизатор"""
+    if hasattr(model, "token_lengths"):
+        return model.token_lengths(texts)
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return None
+    return _count_tokens(tokenizer, texts, getattr(model, "max_seq_length", None))
+
+
+@timed_tokenization
+def _count_tokens(tokenizer, texts: tp.List[str], max_length: tp.Optional[int]) -> np.ndarray:
+    input_ids = tokenizer(texts, truncation=max_length is not None, max_length=max_length)["input_ids"]
+    return np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(texts))
+
+
+def default_onnx_path(model_name: str, onnx_dir: tp.Optional[str] = None) -> str:
+    return os.path.join(onnx_dir or "onnx_models", model_name.replace("/", "__") + ".onnx")
+
+
+def mean_pooling(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Среднее по токенам без паддинга (как Pooling(mean) в sentence-transformers)"""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return (summed / counts).astype(np.float32)
+
+
+def export_onnx(model_name: str, path: str, opset: int = 14):
+    """Экспорт трансформера (без пулинга) в ONNX с динамическими batch и sequence осями"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["пример текста"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Encoder(torch.nn.Module):
+        # Позиционные входы графа -> именованные аргументы forward (порядок аргументов зависит от версии transformers)
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(),
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False
+        )
+    logger.info(f"Модель {model_name} экспортирована в ONNX: {path}")
+
+
+def quantize_onnx(path: str, quantized_path: str):
+    """Динамическая int8-квантизация весов (активации квантуются на лету)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+    logger.info(f"ONNX-граф квантован в int8: {quantized_path}")
+
+
+class OnnxEmbeddingModel:
+    """Эмбеддинги через onnxruntime: токенизация, граф трансформера, mean pooling и нормализация на numpy"""
+
+    def __init__(self, model_name: str, onnx_path: str, quantize: bool = False,
+                 max_length: int = 128, intra_op_threads: tp.Optional[int] = None):
+        if ort is None:
+            raise ImportError("onnxruntime is not installed, use models.backend='torch'")
+        from transformers import AutoTokenizer
+
+        self.max_length = max_length
+        self.tokenizer = timed_tokenization(AutoTokenizer.from_pretrained(model_name))
+
+        # Граф экспортируется один раз и переиспользуется между запусками
+        if not os.path.exists(onnx_path):
+            export_onnx(model_name, onnx_path)
+        if quantize:
+            quantized_path = onnx_path[:-len(".onnx")] + ".int8.onnx" if onnx_path.endswith(".onnx") \
+                else onnx_path + ".int8"
+            if not os.path.exists(quantized_path):
+                quantize_onnx(onnx_path, quantized_path)
+            onnx_path = quantized_path
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        logger.info(f"ONNX-бэкенд эмбеддингов: {onnx_path}")
+
+    def token_lengths(self, texts: tp.List[str]) -> np.ndarray:
+        input_ids = self.tokenizer(texts, truncation=True, max_length=self.max_length)["input_ids"]
+        return np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(texts))
+
+    def encode(self, texts: tp.Union[str, tp.List[str]], normalize_embeddings: bool = True,
+               batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """Эмбеддинги текстов (сигнатура совместима с SentenceTransformer.encode)"""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+            chunks.append(mean_pooling(token_embeddings, tokens["attention_mask"]))
+
+        embeddings = np.concatenate(chunks) if chunks else np.zeros((0, 0), dtype=np.float32)
+        if normalize_embeddings:
+            embeddings = normalize_rows(embeddings)
+        return embeddings[0] if single else embeddings
+
+
+class HashEmbeddingModel:
+    """Детерминированные эмбеддинги без нейросети: сумма псевдослучайных векторов слов.
+
+    Для бенчмарков накладных расходов сервиса и тестов: одинаковый текст всегда дает один вектор,
+    тексты с общими словами близки, модель не загружается.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self._word_vector = functools.lru_cache(maxsize=65536)(self._word_vector)
+        self._tokenize = timed_tokenization(self._tokenize)
+
+    def encode(self, texts: tp.Union[str, tp.List[str]], normalize_embeddings: bool = True,
+               batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """Эмбеддинги текстов (сигнатура совместима с SentenceTransformer.encode)"""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, words in enumerate(self._tokenize(texts)):
+            for word in words:
+                embeddings[row] += self._word_vector(word)
+        if normalize_embeddings:
+            embeddings = normalize_rows(embeddings)
+        return embeddings[0] if single else embeddings
+
+    def token_lengths(self, texts: tp.List[str]) -> np.ndarray:
+        return np.fromiter((len(words) for words in self._tokenize(texts)), dtype=np.int64, count=len(texts))
+
+    @staticmethod
+    def _tokenize(texts: tp.List[str]) -> tp.List[tp.List[str]]:
+        return [re.findall(r"\w+", text.lower()) for text in texts]
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        return np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
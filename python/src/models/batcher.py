@@ -0,0 +1,138 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import typing as tp
+
+import numpy as np
+from loguru import logger
+
+from src.utils.metrics import metrics
+
+
+def plan_token_batches(lengths: tp.Sequence[int], max_batch_tokens: int,
+                       max_batch_size: int = 256) -> tp.List[np.ndarray]:
+    """Батчи по бюджету токенов: тексты близкой длины вместе, размер батча - max_batch_tokens / длина.
+
+    Тексты сортируются по убыванию длины и набираются в батч, пока число токенов с паддингом
+    (размер батча * самый длинный текст) укладывается в бюджет. Возвращает индексы исходных строк.
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(-lengths, kind="stable")
+    batches, start = [], 0
+    while start < len(order):
+        # Первый текст батча - самый длинный: он и задает паддинг
+        longest = max(int(lengths[order[start]]), 1)
+        size = min(max(max_batch_tokens // longest, 1), max_batch_size)
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+class DynamicBatcher:
+    """Динамический микробатчинг: одиночные вызовы из параллельных запросов склеиваются в один батч модели"""
+
+    def __init__(self, encode_fn: tp.Callable[[tp.List[str]], np.ndarray],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[tp.Optional[tp.Tuple[str, Future, float]]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+
+        self.batches = 0
+        self.requests = 0
+        self.max_observed_batch = 0
+        self.max_observed_queue_depth = 0
+        self.last_batch_size = 0
+
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Динамический батчинг: до {max_batch_size} текстов, ожидание до {max_wait_ms} мс")
+
+    def submit(self, text: str) -> Future:
+        """Постановка текста в очередь; результат - строка эмбеддинга в Future"""
+        if self._closed:
+            raise RuntimeError("batcher is closed")
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self.max_observed_queue_depth = max(self.max_observed_queue_depth, depth)
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        """Блокирующий вызов: ждет, пока батч с этим текстом будет посчитан"""
+        return self.submit(text).result()
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Глубина очереди и фактический размер батчей"""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_observed_queue_depth,
+                "batches": self.batches,
+                "requests": self.requests,
+                "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_observed_batch,
+                "last_batch_size": self.last_batch_size,
+                "max_batch_limit": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0
+            }
+
+    def close(self):
+        """Остановка фонового потока (уже поставленные тексты дообрабатываются)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: tp.Tuple[str, Future, float]) -> tp.Tuple[tp.List[tp.Tuple[str, Future, float]], bool]:
+        """Сбор батча: до max_batch_size элементов или до истечения max_wait с первого"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            # Отмененные вызывающим элементы в модель не отправляем
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, submitted in batch:
+                metrics.observe("ml_queue_wait_seconds", started - submitted, queue="batcher")
+            metrics.observe("ml_embedding_batch_size", len(batch), source="batcher")
+
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.last_batch_size = len(batch)
+                self.max_observed_batch = max(self.max_observed_batch, len(batch))
+
+            try:
+                embeddings = self.encode_fn([text for text, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Ошибка батча эмбеддингов: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
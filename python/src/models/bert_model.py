@@ -1,37 +1,58 @@
-import torch
 import numpy as np
-from transformers import AutoTokenizer, AutoModel
-from sentence_transformers import SentenceTransformer
 from loguru import logger
+from collections import OrderedDict
+import threading
+import time
 import typing as tp
 
+from src.topic.topic_index import TopicIndex, HierarchicalTopicIndex
+from src.topic.taxonomy import Taxonomy
+from src.models.embedding_cache import EmbeddingCache
+from src.models.batcher import DynamicBatcher, plan_token_batches
+from src.models.backends import create_embedding_model, take_tokenization_seconds, token_lengths
+from src.utils.metrics import metrics
+
 
 class RuBERTModel:
     """Класс для работы с ruBERT моделью для эмбеддингов и анализа текстов"""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, taxonomy: tp.Optional[Taxonomy] = None):
         self.config = config
-        self.embedding_model = None
-        self.topic_model = None
-        self.tokenizer = None
+        # Иерархия тематик по умолчанию; без нее - плоский список config['topics']['predefined_topics']
+        self.taxonomy = taxonomy
+        # Модель загружается при первом обращении или явным warmup()
+        self._embedding_model = None
+        self._model_lock = threading.Lock()
         self.device = config['models']['device']
-        self._load_models()
+        self.backend = config['models'].get('backend', 'torch')
+        # Кэш матриц тематик: None -> таксономия из конфига, tuple(topics) -> пользовательский список
+        self._topic_indexes: "OrderedDict[tp.Optional[tp.Tuple[str, ...]], TopicIndex]" = OrderedDict()
+        self._topic_index_cache_size = config.get('topics', {}).get('index_cache_size', 16)
+        self._topic_index_lock = threading.Lock()
+        self.embedding_cache = self._create_cache(config.get('cache', {}))
+        self.batcher = self._create_batcher(config.get('batching', {}))
+    
+    @property
+    def embedding_model(self):
+        """Модель эмбеддингов (ленивая загрузка)"""
+        if self._embedding_model is None:
+            with self._model_lock:
+                if self._embedding_model is None:
+                    self._load_models()
+        return self._embedding_model
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._embedding_model is not None
     
     def _load_models(self):
         """Загрузка моделей"""
         try:
-            logger.info("Загрузка embedding модели...")
-            self.embedding_model = SentenceTransformer(
-                self.config['models']['bert_model'],
-                device=self.device
-            )
-            
-            logger.info("Загрузка topic модели...")
-            self.topic_model = AutoModel.from_pretrained(
-                self.config['models']['topic_model']
-            )
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                self.config['models']['topic_model']
+            logger.info(f"Загрузка embedding модели (бэкенд {self.backend})...")
+            self._embedding_model = create_embedding_model(
+                self.config['models'],
+                intra_op_threads=self.config.get('inference', {}).get('intra_op_threads'),
+                dimension=self.config['embeddings']['dimension']
             )
             
             logger.info("Модели успешно загружены")
@@ -40,11 +61,73 @@ class RuBERTModel:
             logger.error(f"Ошибка загрузки моделей: {e}")
             raise
     
+    def warmup(self):
+        """Загрузка модели, пробный проход и матрица тематик из конфига"""
+        self._encode_batch(["прогрев модели"])
+        self.get_topic_index()
+    
+    def _create_cache(self, cache_config: dict) -> tp.Optional[EmbeddingCache]:
+        """Кэш эмбеддингов (отключается через config['cache']['enabled'])"""
+        if not cache_config.get('enabled', False):
+            return None
+        # Эмбеддинги int8/ONNX отличаются от torch в пределах допуска: у каждого бэкенда свое пространство ключей
+        model_name = self.config['models']['bert_model']
+        if self.backend != 'torch':
+            model_name = f"{model_name}@{self.backend}"
+        return EmbeddingCache(
+            model_name=model_name,
+            max_bytes=cache_config.get('max_bytes', 64 * 1024 * 1024),
+            disk_path=cache_config.get('disk_path'),
+            dimension=self.config['embeddings']['dimension']
+        )
+    
+    def _create_batcher(self, batching_config: dict) -> tp.Optional[DynamicBatcher]:
+        """Микробатчинг одиночных вызовов encode_text (отключается через config['batching']['enabled'])"""
+        if not batching_config.get('enabled', False):
+            return None
+        return DynamicBatcher(
+            self.encode_batch,
+            max_batch_size=batching_config.get('max_batch_size', 32),
+            max_wait_ms=batching_config.get('max_wait_ms', 5.0)
+        )
+    
+    def prepare_fork(self):
+        """Перед fork воркеров: прогрев, веса и матрицы тематик в разделяемой памяти, остановка потоков"""
+        # Сессия onnxruntime держит собственный пул потоков и не переживает fork: ONNX-воркеры грузят модель сами
+        if self.backend == 'torch':
+            self.warmup()
+            self.embedding_model.share_memory()
+            with self._topic_index_lock:
+                for topic_index in self._topic_indexes.values():
+                    topic_index.share_memory()
+        self.close()
+    
+    def after_fork(self):
+        """В воркере: собственные поток батчера и соединение с дисковым кэшем"""
+        self.batcher = self._create_batcher(self.config.get('batching', {}))
+        if self.embedding_cache is not None:
+            self.embedding_cache.open()
+    
+    def close(self):
+        """Остановка батчера и закрытие кэша"""
+        if self.batcher is not None:
+            self.batcher.close()
+            self.batcher = None
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+    
     def encode_text(self, text: str) -> np.ndarray:
         """Создание эмбеддинга для текста"""
         if not text or not text.strip():
             return np.zeros(self.config['embeddings']['dimension'])
         
+        # Параллельные запросы склеиваются в один батч модели
+        if self.batcher is not None:
+            return self.batcher.encode(text)
+        
+        if self.embedding_cache is not None:
+            return self.encode_batch([text])[0]
+        
         embedding = self.embedding_model.encode(
             text,
             normalize_embeddings=self.config['embeddings']['normalize']
@@ -56,40 +139,102 @@ class RuBERTModel:
         if not texts:
             return np.array([])
         
-        embeddings = self.embedding_model.encode(
+        # Пустые тексты дают нулевой вектор, как в encode_text
+        non_empty = [i for i, text in enumerate(texts) if text and text.strip()]
+        if len(non_empty) < len(texts):
+            embeddings = np.zeros((len(texts), self.config['embeddings']['dimension']), dtype=np.float32)
+            if non_empty:
+                embeddings[non_empty] = self.encode_batch([texts[i] for i in non_empty])
+            return embeddings
+        
+        if self.embedding_cache is None:
+            return self._encode_batch(texts)
+        
+        # Кодируем только промахи кэша (повторы внутри батча - один раз)
+        embeddings = self.embedding_cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = self._encode_batch(unique_texts)
+            self.embedding_cache.put_many(unique_texts, encoded)
+            
+            encoded_by_text = dict(zip(unique_texts, encoded))
+            for i in missing:
+                embeddings[i] = encoded_by_text[texts[i]]
+        
+        return np.stack(embeddings)
+    
+    def _encode_batch(self, texts: tp.List[str]) -> np.ndarray:
+        """Прямой проход модели без кэша"""
+        model = self.embedding_model
+        embeddings_config = self.config['embeddings']
+        batch_size = embeddings_config.get('batch_size', 32)
+        max_batch_tokens = embeddings_config.get('max_batch_tokens')
+        take_tokenization_seconds()
+        start = time.perf_counter()
+
+        lengths = token_lengths(model, texts) if max_batch_tokens and len(texts) > 1 else None
+        if lengths is None:
+            embeddings = self._encode_rows(model, texts, batch_size)
+        else:
+            # Короткие заголовки не дополняются до длины аннотаций: батчи по длине и бюджету токенов
+            embeddings = None
+            for rows in plan_token_batches(lengths, max_batch_tokens, batch_size):
+                batch = self._encode_rows(model, [texts[i] for i in rows], len(rows))
+                if embeddings is None:
+                    embeddings = np.empty((len(texts),) + batch.shape[1:], dtype=batch.dtype)
+                embeddings[rows] = batch
+
+        # Токенизация замерена оберткой токенизатора, остальное время encode - прямой проход
+        elapsed = time.perf_counter() - start
+        metrics.observe("ml_stage_duration_seconds", max(elapsed - take_tokenization_seconds(), 0.0),
+                        stage="forward_pass")
+        metrics.inc("ml_embedding_texts_total", len(texts))
+        return embeddings
+    
+    def _encode_rows(self, model, texts: tp.List[str], batch_size: int) -> np.ndarray:
+        metrics.observe("ml_embedding_batch_size", min(len(texts), batch_size), source="model")
+        return model.encode(
             texts,
             normalize_embeddings=self.config['embeddings']['normalize'],
-            batch_size=32,
+            batch_size=batch_size,
             show_progress_bar=False
         )
-        return embeddings
+    
+    def get_topic_index(self, predefined_topics: tp.List[str] = None) -> TopicIndex:
+        """Матрица эмбеддингов тематик (кодируется один раз на набор тем)"""
+        key = None if predefined_topics is None else tuple(predefined_topics)
+        with self._topic_index_lock:
+            index = self._topic_indexes.get(key)
+            if index is not None:
+                self._topic_indexes.move_to_end(key)
+                return index
+
+        if key is None:
+            taxonomy = self.taxonomy or Taxonomy.from_topics(self.config['topics']['predefined_topics'])
+            logger.info(f"Кодирование матрицы тематик ({len(taxonomy)} тем, {len(taxonomy.domains)} доменов)")
+            index = HierarchicalTopicIndex.from_taxonomy(self, taxonomy, **self.config['topics'].get('hierarchical', {}))
+        else:
+            logger.info(f"Кодирование матрицы тематик ({len(key)} тем)")
+            index = TopicIndex.build(self, list(key))
+
+        with self._topic_index_lock:
+            self._topic_indexes[key] = index
+            while len(self._topic_indexes) > self._topic_index_cache_size:
+                self._topic_indexes.popitem(last=False)
+        return index
     
     def analyze_topics(self, text: str, predefined_topics: tp.List[str] = None) -> tp.List[tp.Dict]:
         """Анализ тематик текста"""
-        if predefined_topics is None:
-            predefined_topics = self.config['topics']['predefined_topics']
-        
-        # Сравниваем текст с каждой предопределенной темой
-        text_embedding = self.encode_text(text)
-        topic_embeddings = self.encode_batch(predefined_topics)
-        
-        # Вычисляем косинусное сходство
-        similarities = self._cosine_similarity(text_embedding, topic_embeddings)
-        
-        # Формируем результаты
-        topics = []
-        for topic, similarity in zip(predefined_topics, similarities):
-            if similarity > 0.3:  # Порог релевантности
-                topic_type = "main" if similarity > 0.7 else "secondary"
-                topics.append({
-                    "topic_name": topic,
-                    "confidence": float(similarity),
-                    "topic_type": topic_type
-                })
+        return self.analyze_topics_from_embeddings(self.encode_text(text), predefined_topics)[0]
+    
+    def analyze_topics_from_embeddings(self, embeddings: np.ndarray,
+                                       predefined_topics: tp.List[str] = None) -> tp.List[tp.List[tp.Dict]]:
+        """Тематики для готовых эмбеддингов (вектор или батч строк) без повторного прохода модели"""
+        topic_index = self.get_topic_index(predefined_topics)
         
-        # Сортируем по уверенности
-        topics.sort(key=lambda x: x["confidence"], reverse=True)
-        return topics[:5]  # Возвращаем топ-5 тем
+        # Одно матричное умножение на батч, порог 0.3 и топ-5 тем на текст
+        return topic_index.match(embeddings, threshold=0.3, main_threshold=0.7, top_k=5)
     
     def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> np.ndarray:
         """Вычисление косинусного сходства"""
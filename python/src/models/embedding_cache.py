@@ -0,0 +1,148 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+import typing as tp
+
+import numpy as np
+from loguru import logger
+
+
+class EmbeddingCache:
+    """Кэш эмбеддингов по хэшу текста и имени модели: LRU в памяти + опциональный SQLite-файл"""
+
+    def __init__(self, model_name: str, max_bytes: int = 64 * 1024 * 1024,
+                 disk_path: tp.Optional[str] = None, dimension: tp.Optional[int] = None):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.dimension = dimension
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.disk_path = disk_path
+        self._disk = None
+        self.open()
+
+    def key(self, text: str) -> str:
+        """Ключ записи: sha256 от имени модели и текста"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: tp.List[str]) -> tp.List[tp.Optional[np.ndarray]]:
+        """Поиск эмбеддингов; None на месте промаха"""
+        keys = [self.key(text) for text in texts]
+        found: tp.List[tp.Optional[np.ndarray]] = [None] * len(keys)
+        missing = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                else:
+                    missing.append(i)
+
+        if missing and self._disk is not None:
+            from_disk = self._disk_get([keys[i] for i in missing])
+            if from_disk:
+                still_missing = []
+                for i in missing:
+                    vector = from_disk.get(keys[i])
+                    if vector is None:
+                        still_missing.append(i)
+                    else:
+                        found[i] = vector
+                with self._lock:
+                    self.disk_hits += len(missing) - len(still_missing)
+                    for key, vector in from_disk.items():
+                        self._remember(key, vector)
+                missing = still_missing
+
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return found
+
+    def put_many(self, texts: tp.List[str], embeddings: np.ndarray):
+        """Сохранение эмбеддингов в память и на диск"""
+        entries = []
+        for text, embedding in zip(texts, embeddings):
+            vector = np.array(embedding, dtype=np.float32)
+            vector.setflags(write=False)
+            entries.append((self.key(text), vector))
+
+        with self._lock:
+            for key, vector in entries:
+                self._remember(key, vector)
+
+        if self._disk is not None:
+            with self._lock:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in entries]
+                )
+                self._disk.commit()
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Счетчики для подбора размера кэша"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": self._disk is not None
+            }
+
+    def open(self):
+        """Подключение к SQLite-файлу (соединение не переживает fork: воркеры открывают свое)"""
+        if self.disk_path and self._disk is None:
+            self._disk = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._disk.commit()
+            logger.info(f"Дисковый кэш эмбеддингов: {self.disk_path}")
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Вставка в LRU с вытеснением по бюджету байтов (вызывается под блокировкой)"""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+
+        while self._memory_bytes > self.max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _disk_get(self, keys: tp.List[str]) -> tp.Dict[str, np.ndarray]:
+        result = {}
+        # Ограничение SQLite на число параметров в запросе
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._disk.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+            for key, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                if self.dimension is None or vector.shape[0] == self.dimension:
+                    result[key] = vector
+        return result
@@ -0,0 +1,115 @@
+"""Многопроцессный режим: модель загружается один раз в родителе, воркеры создаются через fork.
+
+Родитель прогревает модель (веса, матрица тематик), переносит веса torch (share_memory),
+матрицу тематик и индекс статей в разделяемую память, открывает слушающий сокет и форкает
+N воркеров uvicorn на этом сокете. Веса и матрицы в воркерах не копируются: страницы общие.
+
+Ограничения:
+- индекс статей в воркерах - read-only снимок (auto_index выключается, запись возвращает ошибку);
+  обновлять его нужно офлайн и перезапускать сервер с search.index_path;
+- бэкенды onnx/onnx-int8 не прогреваются в родителе (сессия onnxruntime не переживает fork),
+  каждый воркер загружает свою копию графа при первом запросе.
+
+Запуск из каталога python/:
+    python -m src.prefork --workers 4 --port 8000
+
+Замер RSS/PSS по воркерам и масштабирования пропускной способности - benchmarks/prefork_scaling.py.
+"""
+import argparse
+import os
+import signal
+import socket
+
+import uvicorn
+from loguru import logger
+
+from src.main import app, ml_service
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Общий слушающий сокет: соединения распределяет ядро между воркерами"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def set_torch_threads(threads: int):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def spawn_worker(sock: socket.socket, worker_id: int, threads: int) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+
+    exit_code = 0
+    try:
+        set_torch_threads(threads)
+        ml_service.after_fork()
+        logger.info(f"Воркер {worker_id} (pid {os.getpid()}): intra-op потоков {threads}")
+        config = uvicorn.Config(app, log_level="info", lifespan="on")
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as e:
+        logger.error(f"Воркер {worker_id} завершился с ошибкой: {e}")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Потоки intra-op на воркер: из конфига или поровну делим ядра между воркерами
+    threads = ml_service.config['inference']['intra_op_threads'] \
+        or max(1, (os.cpu_count() or 1) // args.workers)
+
+    sock = bind_socket(args.host, args.port)
+    # Прогрев в родителе однопоточный: пул OpenMP, созданный до fork, в воркерах не работает
+    set_torch_threads(1)
+    ml_service.prepare_fork()
+    logger.info(f"Модель загружена в родителе (pid {os.getpid()}), запуск {args.workers} воркеров")
+
+    workers = {spawn_worker(sock, worker_id, threads): worker_id for worker_id in range(args.workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        worker_id = workers.pop(pid, None)
+        if worker_id is None:
+            continue
+        if not stopping:
+            logger.warning(f"Воркер {worker_id} (pid {pid}) завершился (статус {status}), перезапуск")
+            workers[spawn_worker(sock, worker_id, threads)] = worker_id
+
+    sock.close()
+    logger.info("Все воркеры остановлены")
+
+
+if __name__ == "__main__":
+    main()
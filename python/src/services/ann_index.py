@@ -0,0 +1,145 @@
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+from src.utils.vector_utils import normalize_rows, top_k_indices
+
+
+class IVFIndex:
+    """Приближенный поиск (IVF): грубый квантователь k-means + инвертированные списки строк индекса"""
+
+    def __init__(self, dimension: int, nlist: int = 1024, nprobe: int = 16,
+                 train_iterations: int = 10, max_train_points: int = 256, seed: int = 0):
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        # Размер обучающей выборки: max_train_points векторов на кластер
+        self.max_train_points = max_train_points
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists: List[set] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray):
+        """Обучение центроидов сферическим k-means и распределение всех строк по спискам"""
+        vectors = normalize_rows(vectors)
+        rng = np.random.default_rng(self.seed)
+        nlist = min(self.nlist, len(vectors))
+
+        sample_size = min(len(vectors), nlist * self.max_train_points)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(self.train_iterations):
+            assignments = self._nearest(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=nlist)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+            sums = np.zeros_like(centroids)
+            non_empty = counts > 0
+            sums[non_empty] = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+            # Пустые кластеры пересеиваются случайными точками выборки
+            empty = np.flatnonzero(~non_empty)
+            if len(empty):
+                sums[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+            centroids = normalize_rows(sums)
+
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._lists = [set() for _ in range(nlist)]
+        self._list_arrays = [None] * nlist
+        self._assignments = np.full(0, -1, dtype=np.int32)
+        self.assign(np.arange(len(vectors)), vectors)
+        logger.info(f"IVF индекс обучен: {nlist} списков, {len(vectors)} векторов")
+
+    def assign(self, rows: np.ndarray, vectors: np.ndarray):
+        """Добавление или переназначение строк индекса"""
+        if not self.is_trained:
+            return
+        rows = np.asarray(rows, dtype=np.int64)
+        self._ensure_size(int(rows.max()) + 1 if len(rows) else 0)
+
+        lists = self._nearest(normalize_rows(vectors), self.centroids)
+        for row, new_list in zip(rows.tolist(), lists.tolist()):
+            self._set_assignment(row, new_list)
+
+    def move(self, source_row: int, target_row: int):
+        """Перенос строки (индекс статей заполняет дырку после удаления последней строкой)"""
+        if not self.is_trained or source_row >= len(self._assignments):
+            return
+        list_id = int(self._assignments[source_row])
+        self._set_assignment(source_row, -1)
+        if target_row != source_row:
+            self._set_assignment(target_row, list_id)
+
+    def remove(self, row: int):
+        """Удаление строки из инвертированных списков"""
+        if self.is_trained and row < len(self._assignments):
+            self._set_assignment(row, -1)
+
+    def probe(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Строки-кандидаты из nprobe ближайших к запросу списков"""
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        closest = top_k_indices(self.centroids @ query, nprobe)
+        candidates = [self._list_array(int(list_id)) for list_id in closest]
+        return np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+
+    def state(self) -> dict:
+        """Состояние для сохранения вместе с индексом статей"""
+        return {
+            "ivf_centroids": self.centroids,
+            "ivf_assignments": self._assignments
+        }
+
+    def restore(self, centroids: np.ndarray, assignments: np.ndarray):
+        """Восстановление обученного состояния без переобучения"""
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._lists = [set() for _ in range(len(self.centroids))]
+        self._list_arrays = [None] * len(self.centroids)
+        self._assignments = np.full(len(assignments), -1, dtype=np.int32)
+        for row, list_id in enumerate(np.asarray(assignments).tolist()):
+            if list_id >= 0:
+                self._set_assignment(row, list_id)
+
+    def _set_assignment(self, row: int, list_id: int):
+        previous = int(self._assignments[row]) if row < len(self._assignments) else -1
+        if previous == list_id:
+            return
+        if previous >= 0:
+            self._lists[previous].discard(row)
+            self._list_arrays[previous] = None
+        if list_id >= 0:
+            self._ensure_size(row + 1)
+            self._lists[list_id].add(row)
+            self._list_arrays[list_id] = None
+        self._assignments[row] = list_id
+
+    def _list_array(self, list_id: int) -> np.ndarray:
+        array = self._list_arrays[list_id]
+        if array is None:
+            array = np.fromiter(self._lists[list_id], dtype=np.int64, count=len(self._lists[list_id]))
+            self._list_arrays[list_id] = array
+        return array
+
+    def _ensure_size(self, size: int):
+        if size > len(self._assignments):
+            grown = np.full(max(size, 2 * len(self._assignments)), -1, dtype=np.int32)
+            grown[:len(self._assignments)] = self._assignments
+            self._assignments = grown
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """Ближайший центроид для каждой строки (по частям, чтобы не строить полную матрицу N x nlist)"""
+        result = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            result[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return result
@@ -0,0 +1,240 @@
+import os
+from typing import List, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+from src.services.ann_index import IVFIndex
+from src.services.quantization import QuantizedMatrix, STORAGE_TYPES
+from src.utils.vector_utils import normalize_rows, top_k_indices
+from src.utils.rwlock import ReadWriteLock
+from src.utils.shared_memory import to_shared
+from src.utils.metrics import metrics
+
+
+class ArticleIndex:
+    """Индекс эмбеддингов статей в непрерывных float32-матрицах (заголовки и аннотации)"""
+
+    def __init__(self, dimension: int, initial_capacity: int = 1024,
+                 title_weight: float = 0.6, abstract_weight: float = 0.4,
+                 ann: Optional[IVFIndex] = None, ann_train_size: int = 50000,
+                 storage: str = "float32", rescore_factor: int = 4,
+                 full_precision_path: Optional[str] = None):
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"unknown storage '{storage}', expected one of {STORAGE_TYPES}")
+        self.dimension = dimension
+        self.title_weight = title_weight
+        self.abstract_weight = abstract_weight
+        # Опциональный приближенный поиск: обучается автоматически, когда статей становится ann_train_size
+        self.ann = ann
+        self.ann_train_size = ann_train_size
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # float16/int8: поиск идет по компактной взвешенной сумме векторов, точные float32-векторы
+        # нужны только для пересчета короткого списка (rescore_factor * max_results кандидатов)
+        # и могут лежать в файле на диске (full_precision_path), а не в RAM
+        self.storage = storage
+        self.rescore_factor = rescore_factor
+        self.full_precision_path = full_precision_path
+        if storage != "float32" and not full_precision_path:
+            # Компактная матрица добавляется к точным векторам в RAM: экономится только полоса сканирования
+            logger.warning(f"storage='{storage}' без search.full_precision_path: точные float32-векторы "
+                           f"остаются в RAM, и память индекса растет, а не уменьшается")
+        self._titles = self._allocate("titles", initial_capacity)
+        self._abstracts = self._allocate("abstracts", initial_capacity)
+        self._compact = QuantizedMatrix(dimension, initial_capacity, storage) if storage != "float32" else None
+        # Поиски идут параллельно (пул инференса), монопольно - только запись
+        self._lock = ReadWriteLock()
+        # Снимок в разделяемой памяти (prefork): запись из одного воркера не дошла бы до остальных
+        self.read_only = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self._rows
+
+    def upsert(self, document_id: str, title_embedding: np.ndarray, abstract_embedding: np.ndarray):
+        """Добавление или обновление одной статьи"""
+        self.upsert_many([document_id], np.asarray(title_embedding)[None, :],
+                         np.asarray(abstract_embedding)[None, :])
+
+    def upsert_many(self, document_ids: List[str], title_embeddings: np.ndarray, abstract_embeddings: np.ndarray):
+        """Добавление или обновление пачки статей; векторы нормализуются при записи"""
+        self._check_writable()
+        titles = normalize_rows(title_embeddings)
+        abstracts = normalize_rows(abstract_embeddings)
+        if titles.shape[1] != self.dimension or abstracts.shape[1] != self.dimension:
+            raise ValueError(f"expected embeddings of dimension {self.dimension}")
+
+        with self._lock.write():
+            rows = []
+            for document_id in document_ids:
+                row = self._rows.get(document_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._ids.append(document_id)
+                    self._rows[document_id] = row
+                rows.append(row)
+
+            self._ensure_capacity(len(self._ids))
+            self._titles[rows] = titles
+            self._abstracts[rows] = abstracts
+            if self._compact is not None:
+                self._compact.set_rows(rows, self._combined(rows))
+
+            if self.ann is not None:
+                if self.ann.is_trained:
+                    self.ann.assign(np.array(rows), self._combined(rows))
+                elif len(self._ids) >= self.ann_train_size:
+                    self.train_ann()
+
+    def delete(self, document_id: str) -> bool:
+        """Удаление статьи: последняя строка переносится на место удаленной"""
+        self._check_writable()
+        with self._lock.write():
+            row = self._rows.pop(document_id, None)
+            if row is None:
+                return False
+
+            last = len(self._ids) - 1
+            if self.ann is not None:
+                self.ann.remove(row)
+                self.ann.move(last, row)
+            if row != last:
+                moved_id = self._ids[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+                self._titles[row] = self._titles[last]
+                self._abstracts[row] = self._abstracts[last]
+                if self._compact is not None:
+                    self._compact.move_row(last, row)
+            self._ids.pop()
+            return True
+
+    def search(self, query_vector: np.ndarray, max_results: int = 10,
+               nprobe: Optional[int] = None) -> List[Dict]:
+        """Взвешенное косинусное сходство с запросом и топ-k (через IVF, если он обучен)"""
+        query = normalize_rows(query_vector)[0]
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"expected query vector of dimension {self.dimension}")
+
+        with self._lock.read(), metrics.timer("ml_stage_duration_seconds", stage="similarity"):
+            candidates = self.ann.probe(query, nprobe) if self.ann is not None and self.ann.is_trained else None
+            if self._compact is not None:
+                # Первый проход по компактным векторам, точный пересчет только для короткого списка
+                approximate = self._compact.dot(query, count=len(self._ids), rows=candidates)
+                shortlist = top_k_indices(approximate, max_results * self.rescore_factor)
+                candidates = shortlist if candidates is None else candidates[shortlist]
+
+            rows = candidates if candidates is not None else slice(0, len(self._ids))
+            scores = (self.title_weight * (self._titles[rows] @ query)
+                      + self.abstract_weight * (self._abstracts[rows] @ query))
+
+            top = top_k_indices(scores, max_results)
+            return [
+                {
+                    "document_id": self._ids[candidates[i] if candidates is not None else i],
+                    "relevance_score": float(scores[i])
+                }
+                for i in top
+            ]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Байты под векторы: компактная матрица для поиска и точные векторы (в RAM или в файле)"""
+        with self._lock.read():
+            full_precision = self._titles.nbytes + self._abstracts.nbytes
+            compact = self._compact.nbytes if self._compact is not None else 0
+            on_disk = isinstance(self._titles, np.memmap)
+            return {
+                "storage": self.storage,
+                "full_precision_bytes": full_precision,
+                "full_precision_on_disk": on_disk,
+                "compact_bytes": compact,
+                "resident_bytes": compact + (0 if on_disk else full_precision)
+            }
+
+    def share_memory(self):
+        """Перенос матриц в разделяемую память; индекс становится read-only"""
+        with self._lock.write():
+            count = len(self._ids)
+            # Файловые memmap-матрицы уже отображены MAP_SHARED
+            if not isinstance(self._titles, np.memmap):
+                self._titles = to_shared(self._titles[:max(count, 1)])
+                self._abstracts = to_shared(self._abstracts[:max(count, 1)])
+            if self._compact is not None:
+                self._compact.share_memory()
+            self.read_only = True
+
+    def train_ann(self):
+        """(Пере)обучение IVF на текущем содержимом индекса"""
+        with self._lock.write():
+            if self.ann is None or not self._ids:
+                return
+            self.ann.train(self._combined(np.arange(len(self._ids))))
+
+    def save(self, path: str):
+        """Сохранение индекса в .npz"""
+        with self._lock.read():
+            count = len(self._ids)
+            tmp_path = f"{path}.tmp.npz"
+            arrays = {
+                "ids": np.array(self._ids, dtype=str),
+                "titles": self._titles[:count],
+                "abstracts": self._abstracts[:count]
+            }
+            if self.ann is not None and self.ann.is_trained:
+                arrays.update(self.ann.state())
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, path)
+        logger.info(f"Индекс статей сохранен: {path} ({count} статей)")
+
+    @classmethod
+    def load(cls, path: str, dimension: Optional[int] = None, **kwargs) -> "ArticleIndex":
+        """Загрузка индекса из .npz (вместе с обученным IVF, если он сохранен)"""
+        data = np.load(path)
+        titles = data["titles"]
+        # IVF подключается после заливки векторов: сохраненное распределение восстанавливается без переобучения
+        ann = kwargs.pop("ann", None)
+        index = cls(dimension or titles.shape[1], initial_capacity=max(len(titles), 1), **kwargs)
+        if len(titles):
+            index.upsert_many([str(i) for i in data["ids"]], titles, data["abstracts"])
+        if ann is not None:
+            if "ivf_centroids" in data:
+                ann.restore(data["ivf_centroids"], data["ivf_assignments"])
+            index.ann = ann
+            if not ann.is_trained and len(index) >= index.ann_train_size:
+                index.train_ann()
+        logger.info(f"Индекс статей загружен: {path} ({len(index)} статей)")
+        return index
+
+    def _combined(self, rows) -> np.ndarray:
+        """Взвешенная сумма векторов: скалярное произведение с ней равно итоговой релевантности"""
+        return self.title_weight * self._titles[rows] + self.abstract_weight * self._abstracts[rows]
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("article index is a read-only shared snapshot")
+
+    def _ensure_capacity(self, size: int):
+        capacity = self._titles.shape[0]
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        self._titles = self._allocate("titles", new_capacity, self._titles)
+        self._abstracts = self._allocate("abstracts", new_capacity, self._abstracts)
+        if self._compact is not None:
+            self._compact.grow(new_capacity)
+
+    def _allocate(self, name: str, capacity: int, previous: Optional[np.ndarray] = None) -> np.ndarray:
+        """Матрица точных векторов: в RAM или файловый memmap рядом с full_precision_path"""
+        if not self.full_precision_path:
+            matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        else:
+            path = f"{self.full_precision_path}.{name}.f32"
+            tmp_path = f"{path}.tmp"
+            matrix = np.memmap(tmp_path, dtype=np.float32, mode="w+", shape=(capacity, self.dimension))
+            os.replace(tmp_path, path)
+        if previous is not None:
+            matrix[:len(previous)] = previous
+        return matrix
@@ -0,0 +1,242 @@
+import json
+import os
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.utils.vector_utils import normalize_rows
+
+
+class AuthorProfiles:
+    """Профили авторов: сумма нормализованных векторов тем их статей и счетчики тем.
+
+    Средняя косинусная близость тем автора к запросу равна скалярному произведению запроса
+    на сумму векторов, деленному на число тем, поэтому оценка всех авторов - одно умножение
+    матрицы (авторы x dimension) на вектор. Профили обновляются инкрементально: при смене темы
+    статьи из суммы вычитается вектор старой темы и прибавляется вектор новой.
+
+    Записи автора - темы по ключам: document_id для статей, учтенных через add_article, и "#i"
+    для набора тем, переданного целиком (article_topics не сопоставлены article_ids).
+    """
+
+    def __init__(self, dimension: int, encode: Callable[[List[str]], np.ndarray], initial_capacity: int = 1024):
+        self.dimension = dimension
+        self._encode = encode
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._sums = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._counts = np.zeros(initial_capacity, dtype=np.int64)
+        self._entries: List[Dict[str, str]] = []
+        self._topic_counts: List[Counter] = []
+        self._article_ids: List[List[str]] = []
+        self._document_authors: Dict[str, Set[str]] = {}
+        self._topic_vectors: Dict[str, np.ndarray] = {}
+        self._listeners: List[Callable[[str, List[Tuple[str, str]], List[Tuple[str, str]]], None]] = []
+        # Общая блокировка с подписчиками (агрегаты кафедр): изменения доходят до них атомарно
+        self.lock = self._lock = threading.RLock()
+        # Prefork: обновление в одном воркере не дошло бы до остальных
+        self.read_only = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, author_id: str) -> bool:
+        return author_id in self._rows
+
+    def upsert_author(self, author_id: str, article_ids: List[str], article_topics: List[str]):
+        """Замена профиля автора целиком: набор тем его статей, как в запросе (списки могут быть разной длины)"""
+        self._check_writable()
+        # Темы не сопоставляются статьям: каждая переданная тема учитывается один раз, как в запросе
+        entries = {f"#{i}": topic for i, topic in enumerate(article_topics) if topic}
+        self._prepare(entries.values())
+
+        with self._lock:
+            row = self._row(author_id)
+            for document_id in self._article_ids[row]:
+                self._unlink(document_id, author_id)
+            self._replace(row, entries)
+            self._article_ids[row] = list(dict.fromkeys(article_ids))
+            for document_id in self._article_ids[row]:
+                self._document_authors.setdefault(document_id, set()).add(author_id)
+
+    def add_article(self, document_id: str, author_ids: List[str], topic: Optional[str]):
+        """Статья с авторами и главной темой; повторный вызов заменяет прежний вклад статьи"""
+        self._check_writable()
+        self._prepare([topic] if topic else [])
+
+        with self._lock:
+            authors = set(author_ids)
+            for author_id in self._document_authors.get(document_id, set()) - authors:
+                row = self._rows[author_id]
+                self._replace(row, {key: t for key, t in self._entries[row].items() if key != document_id})
+                self._article_ids[row] = [a for a in self._article_ids[row] if a != document_id]
+
+            for author_id in author_ids:
+                row = self._row(author_id)
+                entries = dict(self._entries[row])
+                if topic:
+                    entries[document_id] = topic
+                else:
+                    entries.pop(document_id, None)
+                self._replace(row, entries)
+                if document_id not in self._article_ids[row]:
+                    self._article_ids[row].append(document_id)
+
+            if authors:
+                self._document_authors[document_id] = authors
+            else:
+                self._document_authors.pop(document_id, None)
+
+    def add_articles(self, document_ids: List[str], author_ids: List[List[str]], topics: List[Optional[str]]):
+        """Пачка статей: новые темы кодируются одним батчем"""
+        self._prepare(topic for topic in topics if topic)
+        for document_id, authors, topic in zip(document_ids, author_ids, topics):
+            self.add_article(document_id, authors, topic)
+
+    def remove_article(self, document_id: str):
+        self.add_article(document_id, [], None)
+
+    def subscribe(self, listener: Callable[[str, List[Tuple[str, str]], List[Tuple[str, str]]], None]):
+        """Подписка на изменения профилей: listener(author_id, added, removed) с парами (ключ, тема) под блокировкой"""
+        self._listeners.append(listener)
+
+    def row(self, author_id: str) -> Optional[int]:
+        return self._rows.get(author_id)
+
+    def entries(self, author_id: str) -> Dict[str, str]:
+        """Записи автора: ключ статьи -> тема (пусто для неизвестного автора)"""
+        with self._lock:
+            row = self._rows.get(author_id)
+            return dict(self._entries[row]) if row is not None else {}
+
+    def topic_vector(self, topic: str) -> np.ndarray:
+        """Нормализованный эмбеддинг темы (кодируется при первом обращении)"""
+        vector = self._topic_vectors.get(topic)
+        if vector is None:
+            self._prepare([topic])
+            vector = self._topic_vectors[topic]
+        return vector
+
+    def mean_similarities(self, query_vector: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Средняя близость тем каждого автора к запросу и число тем (строки - в порядке добавления)"""
+        query = normalize_rows(query_vector)[0]
+        with self._lock:
+            count = len(self._ids)
+            counts = self._counts[:count].copy()
+            sums = self._sums[:count] @ query
+        return np.divide(sums, counts, out=np.zeros(count), where=counts > 0), counts
+
+    def author(self, row: int) -> Dict:
+        """Данные автора в формате запроса /api/analyze-experts"""
+        with self._lock:
+            return {
+                "author_id": self._ids[row],
+                "article_ids": list(self._article_ids[row]),
+                "article_topics": list(self._topic_counts[row].elements())
+            }
+
+    def topic_article_count(self, row: int, query_vector: np.ndarray, min_similarity: float) -> int:
+        """Число тем автора, близких к запросу"""
+        with self._lock:
+            topic_counts = dict(self._topic_counts[row])
+        if not topic_counts:
+            return 0
+        query = normalize_rows(query_vector)[0]
+        similarities = np.stack([self.topic_vector(topic) for topic in topic_counts]) @ query
+        return int(sum(count for count, similarity in zip(topic_counts.values(), similarities)
+                       if similarity > min_similarity))
+
+    def save(self, path: str):
+        """Сохранение в .npz: суммы векторов и записи авторов (векторы тем пересчитываются по кэшу эмбеддингов)"""
+        with self._lock:
+            count = len(self._ids)
+            tmp_path = f"{path}.tmp.npz"
+            np.savez(
+                tmp_path,
+                ids=np.array(self._ids, dtype=str),
+                sums=self._sums[:count],
+                counts=self._counts[:count],
+                authors=np.array(json.dumps(
+                    [{"entries": entries, "article_ids": article_ids}
+                     for entries, article_ids in zip(self._entries, self._article_ids)],
+                    ensure_ascii=False
+                ))
+            )
+            os.replace(tmp_path, path)
+        logger.info(f"Профили авторов сохранены: {path} ({count} авторов)")
+
+    @classmethod
+    def load(cls, path: str, encode: Callable[[List[str]], np.ndarray]) -> "AuthorProfiles":
+        data = np.load(path)
+        sums = data["sums"]
+        profiles = cls(sums.shape[1], encode, initial_capacity=max(len(sums), 1))
+        profiles._sums[:len(sums)] = sums
+        profiles._counts[:len(sums)] = data["counts"]
+        for author_id, author in zip(data["ids"], json.loads(str(data["authors"]))):
+            author_id = str(author_id)
+            profiles._rows[author_id] = len(profiles._ids)
+            profiles._ids.append(author_id)
+            profiles._entries.append(author["entries"])
+            profiles._topic_counts.append(Counter(author["entries"].values()))
+            profiles._article_ids.append(author["article_ids"])
+            for document_id in author["article_ids"]:
+                profiles._document_authors.setdefault(document_id, set()).add(author_id)
+        logger.info(f"Профили авторов загружены: {path} ({len(profiles)} авторов)")
+        return profiles
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("author profiles are a read-only snapshot in prefork mode")
+
+    def _row(self, author_id: str) -> int:
+        """Строка автора (новый автор получает пустой профиль; вызывается под блокировкой)"""
+        row = self._rows.get(author_id)
+        if row is not None:
+            return row
+        row = len(self._ids)
+        if row >= self._sums.shape[0]:
+            self._sums = np.concatenate([self._sums, np.zeros_like(self._sums)])
+            self._counts = np.concatenate([self._counts, np.zeros_like(self._counts)])
+        self._rows[author_id] = row
+        self._ids.append(author_id)
+        self._entries.append({})
+        self._topic_counts.append(Counter())
+        self._article_ids.append([])
+        return row
+
+    def _replace(self, row: int, entries: Dict[str, str]):
+        """Новые записи автора: к сумме применяется только разница с прежними (под блокировкой)"""
+        previous = self._entries[row]
+        removed = [(key, topic) for key, topic in previous.items() if entries.get(key) != topic]
+        added = [(key, topic) for key, topic in entries.items() if previous.get(key) != topic]
+        for _, topic in added:
+            self._sums[row] += self.topic_vector(topic)
+        for _, topic in removed:
+            self._sums[row] -= self.topic_vector(topic)
+        if not entries:
+            # Сброс накопленной ошибки округления
+            self._sums[row] = 0.0
+        self._entries[row] = entries
+        self._counts[row] = len(entries)
+        self._topic_counts[row].update(topic for _, topic in added)
+        self._topic_counts[row].subtract(topic for _, topic in removed)
+        self._topic_counts[row] = +self._topic_counts[row]
+        for listener in self._listeners:
+            listener(self._ids[row], added, removed)
+
+    def _unlink(self, document_id: str, author_id: str):
+        authors = self._document_authors.get(document_id)
+        if authors is not None:
+            authors.discard(author_id)
+            if not authors:
+                del self._document_authors[document_id]
+
+    def _prepare(self, topics):
+        """Кодирование новых тем одним батчем до захвата блокировки"""
+        missing = list(dict.fromkeys(topic for topic in topics if topic not in self._topic_vectors))
+        if missing:
+            for topic, vector in zip(missing, normalize_rows(self._encode(missing))):
+                self._topic_vectors[topic] = vector
@@ -0,0 +1,184 @@
+import json
+import os
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.services.author_profiles import AuthorProfiles
+from src.utils.vector_utils import normalize_rows
+
+
+class DepartmentAggregates:
+    """Агрегаты кафедр поверх профилей авторов: гистограмма тем статей и сумма векторов тем.
+
+    Строка кафедры - свертка профилей ее авторов по различным статьям: статья нескольких
+    авторов кафедры учитывается один раз (пары (статья, тема) хранятся со счетчиком ссылок).
+    Изменения профилей приходят подпиской и применяются дельтой только к кафедрам автора,
+    поэтому запрос по кафедрам - одно умножение гистограмм (кафедры x темы) на маску близких
+    к запросу тем вместо разбора списков тем. Столбец темы, по которой не осталось статей ни
+    в одной кафедре, освобождается и переиспользуется: ширина гистограммы ограничена числом
+    тем с живыми статьями, а не всеми вариантами написания тем за время работы.
+    """
+
+    def __init__(self, profiles: AuthorProfiles, initial_capacity: int = 256, initial_topics: int = 256):
+        self.dimension = profiles.dimension
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._members: List[List[str]] = []
+        self._articles: List[Counter] = []
+        self._author_departments: Dict[str, Set[int]] = {}
+        self._columns: Dict[str, int] = {}
+        self._column_topics: List[Optional[str]] = []
+        self._free_columns: List[int] = []
+        self._column_totals = np.zeros(initial_topics, dtype=np.int64)
+        self._topic_vectors = np.zeros((initial_topics, self.dimension), dtype=np.float32)
+        self._histogram = np.zeros((initial_capacity, initial_topics), dtype=np.int64)
+        self._sums = np.zeros((initial_capacity, self.dimension), dtype=np.float32)
+        self.attach(profiles)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def attach(self, profiles: AuthorProfiles):
+        """Подключение к (новым) профилям авторов и пересчет всех кафедр"""
+        self.profiles = profiles
+        self._lock = profiles.lock
+        profiles.subscribe(self._on_author_change)
+        with self._lock:
+            for row in range(len(self._ids)):
+                self._roll_up(row)
+
+    def upsert_department(self, organization_id: str, author_ids: List[str]):
+        """Добавление кафедры или замена ее состава"""
+        if self.profiles.read_only:
+            raise RuntimeError("department aggregates are a read-only snapshot in prefork mode")
+        with self._lock:
+            row = self._rows.get(organization_id)
+            if row is None:
+                row = len(self._ids)
+                self._grow_rows(row + 1)
+                self._rows[organization_id] = row
+                self._ids.append(organization_id)
+                self._members.append([])
+                self._articles.append(Counter())
+            for author_id in self._members[row]:
+                self._author_departments[author_id].discard(row)
+            self._members[row] = list(dict.fromkeys(author_ids))
+            for author_id in self._members[row]:
+                self._author_departments.setdefault(author_id, set()).add(row)
+            self._roll_up(row)
+
+    def members(self, row: int) -> Tuple[str, List[str]]:
+        with self._lock:
+            return self._ids[row], list(self._members[row])
+
+    def topic_statistics(self, query_vector: np.ndarray, min_similarity: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Число статей по близким к запросу темам, всего статей и близость центроида к запросу по кафедрам"""
+        query = normalize_rows(query_vector)[0]
+        with self._lock:
+            count, topics = len(self._ids), len(self._column_topics)
+            histogram = self._histogram[:count, :topics]
+            close = (self._topic_vectors[:topics] @ query > min_similarity).astype(np.int64)
+            topic_articles = histogram @ close
+            total_articles = histogram.sum(axis=1)
+            sums = self._sums[:count] @ query
+        centroid_similarity = np.divide(sums, total_articles, out=np.zeros(count), where=total_articles > 0)
+        return topic_articles, total_articles, centroid_similarity
+
+    def save(self, path: str):
+        """Сохранение состава кафедр (гистограммы пересчитываются из профилей при загрузке)"""
+        with self._lock:
+            departments = dict(zip(self._ids, self._members))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(departments, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logger.info(f"Состав кафедр сохранен: {path} ({len(departments)} кафедр)")
+
+    def load(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            departments = json.load(f)
+        for organization_id, author_ids in departments.items():
+            self.upsert_department(organization_id, author_ids)
+        logger.info(f"Состав кафедр загружен: {path} ({len(departments)} кафедр)")
+
+    def _roll_up(self, row: int):
+        """Пересчет строки кафедры из профилей ее авторов (под блокировкой)"""
+        self._articles[row] = Counter()
+        previous = np.flatnonzero(self._histogram[row, :len(self._column_topics)])
+        self._column_totals -= self._histogram[row]
+        self._histogram[row] = 0
+        self._sums[row] = 0.0
+        for author_id in self._members[row]:
+            for key, topic in self.profiles.entries(author_id).items():
+                self._count_article(row, self._article_key(author_id, key), topic, 1)
+        for column in previous:
+            self._release_if_empty(int(column))
+
+    def _on_author_change(self, author_id: str, added: List[Tuple[str, str]], removed: List[Tuple[str, str]]):
+        """Дельта профиля автора в строки его кафедр (вызывается под блокировкой профилей)"""
+        rows = self._author_departments.get(author_id)
+        if not rows:
+            return
+        for items, sign in ((removed, -1), (added, 1)):
+            for key, topic in items:
+                article_key = self._article_key(author_id, key)
+                for row in rows:
+                    self._count_article(row, article_key, topic, sign)
+
+    @staticmethod
+    def _article_key(author_id: str, key: str) -> Hashable:
+        """Ключ статьи в кафедре: темы без статьи ("#i") принадлежат только своему автору"""
+        return (author_id, key) if key.startswith("#") else key
+
+    def _count_article(self, row: int, article_key: Hashable, topic: str, sign: int):
+        """Ссылка автора на пару (статья, тема): в гистограмму попадает только первая"""
+        articles = self._articles[row]
+        articles[article_key, topic] += sign
+        references = articles[article_key, topic]
+        if references <= 0:
+            del articles[article_key, topic]
+        if (sign > 0 and references == 1) or (sign < 0 and references == 0):
+            column = self._column(topic)
+            self._histogram[row, column] += sign
+            self._column_totals[column] += sign
+            self._sums[row] += sign * self.profiles.topic_vector(topic)
+            if sign < 0:
+                self._release_if_empty(column)
+
+    def _column(self, topic: str) -> int:
+        column = self._columns.get(topic)
+        if column is None:
+            if self._free_columns:
+                column = self._free_columns.pop()
+                self._column_topics[column] = topic
+            else:
+                column = len(self._column_topics)
+                self._column_topics.append(topic)
+            if column >= self._topic_vectors.shape[0]:
+                self._topic_vectors = np.concatenate([self._topic_vectors, np.zeros_like(self._topic_vectors)])
+                self._histogram = np.concatenate([self._histogram, np.zeros_like(self._histogram)], axis=1)
+                self._column_totals = np.concatenate([self._column_totals, np.zeros_like(self._column_totals)])
+            self._topic_vectors[column] = self.profiles.topic_vector(topic)
+            self._columns[topic] = column
+        return column
+
+    def _release_if_empty(self, column: int):
+        """Освобождение столбца темы, по которой не осталось статей ни в одной кафедре"""
+        if self._column_totals[column] == 0 and self._column_topics[column] is not None:
+            del self._columns[self._column_topics[column]]
+            self._column_topics[column] = None
+            self._topic_vectors[column] = 0.0
+            self._free_columns.append(column)
+
+    def column_count(self) -> int:
+        """Число занятых столбцов гистограммы (тем со статьями)"""
+        with self._lock:
+            return len(self._columns)
+
+    def _grow_rows(self, size: int):
+        if size > self._histogram.shape[0]:
+            self._histogram = np.concatenate([self._histogram, np.zeros_like(self._histogram)])
+            self._sums = np.concatenate([self._sums, np.zeros_like(self._sums)])
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import typing as tp
+
+import numpy as np
+from loguru import logger
+
+
+def content_hash(title: str, abstract: str) -> str:
+    """Хэш текста статьи: метаданные вне заголовка и аннотации на него не влияют"""
+    return hashlib.sha256(f"{title}\0{abstract}".encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    """Хранилище результатов анализа статей в SQLite: эмбеддинги, тематики, хэш текста и версия модели.
+
+    Запись считается актуальной, только если совпадают и хэш текста, и версия модели;
+    иначе статья анализируется заново и запись перезаписывается.
+    """
+
+    def __init__(self, path: str, model_version: str):
+        self.path = path
+        self.model_version = model_version
+        self._db = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.open()
+
+    def open(self):
+        """Подключение к файлу (соединение не переживает fork: воркеры открывают свое)"""
+        if self._db is not None:
+            return
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL: воркеры читают, пока один из них пишет
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "document_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, model_version TEXT NOT NULL, "
+            "title_embedding BLOB NOT NULL, abstract_embedding BLOB NOT NULL, topics TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        # Авторство хранится отдельно от результатов анализа: оно меняется без изменения текста
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS authorships ("
+            "document_id TEXT NOT NULL, author_id TEXT NOT NULL, PRIMARY KEY (document_id, author_id))"
+        )
+        self._db.commit()
+        logger.info(f"Хранилище статей: {self.path} ({len(self)} записей)")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def get_many(self, document_ids: tp.List[str], hashes: tp.List[str]) -> tp.List[tp.Optional[tp.Dict[str, tp.Any]]]:
+        """Сохраненные результаты; None, если статьи нет, текст изменился или запись от другой модели"""
+        rows = {}
+        # Ограничение SQLite на число параметров в запросе
+        for start in range(0, len(document_ids), 500):
+            chunk = list(dict.fromkeys(document_ids[start:start + 500]))
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                for row in self._db.execute(
+                    "SELECT document_id, content_hash, model_version, title_embedding, abstract_embedding, topics "
+                    f"FROM documents WHERE document_id IN ({placeholders})", chunk
+                ):
+                    rows[row[0]] = row
+
+        found, hits, stale = [], 0, 0
+        for document_id, expected_hash in zip(document_ids, hashes):
+            row = rows.get(document_id)
+            if row is None:
+                found.append(None)
+            elif row[1] != expected_hash or row[2] != self.model_version:
+                stale += 1
+                found.append(None)
+            else:
+                hits += 1
+                found.append({
+                    "document_id": document_id,
+                    "topics": json.loads(row[5]),
+                    "title_embedding": np.frombuffer(row[3], dtype=np.float32),
+                    "abstract_embedding": np.frombuffer(row[4], dtype=np.float32)
+                })
+
+        with self._lock:
+            self.hits += hits
+            self.stale += stale
+            self.misses += len(document_ids) - hits
+        return found
+
+    def put_many(self, document_ids: tp.List[str], hashes: tp.List[str], title_embeddings: np.ndarray,
+                 abstract_embeddings: np.ndarray, topics: tp.List[tp.List[tp.Dict]]):
+        """Запись результатов анализа одной транзакцией"""
+        now = time.time()
+        rows = [
+            (document_id, hashes[i], self.model_version,
+             np.ascontiguousarray(title_embeddings[i], dtype=np.float32).tobytes(),
+             np.ascontiguousarray(abstract_embeddings[i], dtype=np.float32).tobytes(),
+             json.dumps(topics[i], ensure_ascii=False), now)
+            for i, document_id in enumerate(document_ids)
+        ]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def delete_many(self, document_ids: tp.List[str]) -> int:
+        keys = [(document_id,) for document_id in document_ids]
+        with self._lock:
+            deleted = self._db.executemany("DELETE FROM documents WHERE document_id = ?", keys).rowcount
+            self._db.executemany("DELETE FROM authorships WHERE document_id = ?", keys)
+            self._db.commit()
+        return deleted
+
+    def set_authors(self, document_ids: tp.List[str], author_ids: tp.List[tp.List[str]]):
+        """Замена списков авторов статей"""
+        with self._lock:
+            self._db.executemany("DELETE FROM authorships WHERE document_id = ?",
+                                 [(document_id,) for document_id in document_ids])
+            self._db.executemany(
+                "INSERT OR IGNORE INTO authorships VALUES (?, ?)",
+                [(document_id, author_id) for document_id, authors in zip(document_ids, author_ids)
+                 for author_id in authors]
+            )
+            self._db.commit()
+
+    def authorships(self) -> tp.Dict[str, tp.List[str]]:
+        """Авторы всех статей: document_id -> [author_id]"""
+        result: tp.Dict[str, tp.List[str]] = {}
+        with self._lock:
+            for document_id, author_id in self._db.execute(
+                "SELECT document_id, author_id FROM authorships ORDER BY rowid"
+            ):
+                result.setdefault(document_id, []).append(author_id)
+        return result
+
+    def export(self, batch_size: int = 10000, with_topics: bool = False) -> tp.Iterator[tp.Dict[str, tp.Any]]:
+        """Выгрузка для переиндексации пачками: document_ids и матрицы эмбеддингов текущей версии модели.
+
+        Векторы пачки собираются одним np.frombuffer по склеенным BLOB, без разбора построчно.
+        """
+        columns = "rowid, document_id, title_embedding, abstract_embedding" + (", topics" if with_topics else "")
+        last_rowid = -1
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT {columns} FROM documents WHERE model_version = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (self.model_version, last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            batch = {
+                "document_ids": [row[1] for row in rows],
+                "title_embeddings": np.frombuffer(b"".join(row[2] for row in rows), dtype=np.float32).reshape(len(rows), -1),
+                "abstract_embeddings": np.frombuffer(b"".join(row[3] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+            }
+            if with_topics:
+                batch["topics"] = [json.loads(row[4]) for row in rows]
+            yield batch
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Счетчики повторных отправок без пересчета"""
+        documents = len(self)
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "documents": documents,
+                "model_version": self.model_version
+            }
@@ -1,31 +1,133 @@
-from typing import List, Dict
+import os
+from typing import List, Dict, Tuple, Optional
 import numpy as np
 from loguru import logger
 from collections import Counter
 
+from src.services.author_profiles import AuthorProfiles
+from src.services.department_aggregates import DepartmentAggregates
+from src.utils.vector_utils import normalize_rows, top_k_indices
+from src.utils.metrics import metrics
+
 
 class ExpertAnalyzerService:
     """Сервис анализа экспертов и кафедр"""
     
     def __init__(self, bert_model):
         self.bert_model = bert_model
+        self.profiles_config = bert_model.config.get('profiles', {})
+        self.profiles = self._create_profiles()
+        self.departments = DepartmentAggregates(self.profiles)
+        departments_path = self.profiles_config.get('departments_path')
+        if departments_path and os.path.exists(departments_path):
+            self.departments.load(departments_path)
+    
+    def _create_profiles(self) -> AuthorProfiles:
+        """Профили авторов (загружаются с диска, если файл есть)"""
+        path = self.profiles_config.get('path')
+        if path and os.path.exists(path):
+            return AuthorProfiles.load(path, self.bert_model.encode_batch)
+        return AuthorProfiles(self.bert_model.config['embeddings']['dimension'], self.bert_model.encode_batch)
+    
+    def upsert_authors(self, authors: List[Dict]) -> int:
+        """Добавление или замена профилей авторов по их темам статей"""
+        for author in authors:
+            self.profiles.upsert_author(author["author_id"], author.get("article_ids", []),
+                                        author.get("article_topics", []))
+        return len(authors)
+    
+    def register_articles(self, document_ids: List[str], author_ids: List[List[str]], topics: List[List[Dict]]):
+        """Учет проанализированных статей в профилях их авторов (главная тема статьи)"""
+        self.profiles.add_articles(
+            document_ids, author_ids, [article_topics[0]["topic_name"] if article_topics else None
+                                       for article_topics in topics]
+        )
+    
+    def remove_articles(self, document_ids: List[str]):
+        for document_id in document_ids:
+            self.profiles.remove_article(document_id)
+    
+    def rebuild_profiles(self, document_store) -> int:
+        """Пересборка профилей из хранилища статей: авторы и главная тема каждой статьи"""
+        if self.profiles.read_only:
+            # Новые профили появились бы только в этом воркере; пересборка - офлайн, до fork
+            raise RuntimeError("author profiles are a read-only snapshot in prefork mode, rebuild them offline")
+        authorships = document_store.authorships()
+        profiles = AuthorProfiles(self.bert_model.config['embeddings']['dimension'], self.bert_model.encode_batch)
+        for batch in document_store.export(with_topics=True):
+            linked = [i for i, document_id in enumerate(batch["document_ids"]) if document_id in authorships]
+            profiles.add_articles(
+                [batch["document_ids"][i] for i in linked],
+                [authorships[batch["document_ids"][i]] for i in linked],
+                [batch["topics"][i][0]["topic_name"] if batch["topics"][i] else None for i in linked]
+            )
+        self.profiles = profiles
+        self.departments.attach(profiles)
+        logger.info(f"Профили авторов пересобраны из хранилища: {len(profiles)} авторов")
+        return len(profiles)
+    
+    def upsert_departments(self, departments: List[Dict]) -> int:
+        """Добавление кафедр или замена их состава авторов"""
+        for department in departments:
+            self.departments.upsert_department(department["organization_id"], department.get("author_ids", []))
+        return len(departments)
+    
+    def save_profiles(self, path: Optional[str] = None):
+        """Сохранение профилей авторов и состава кафедр на диск"""
+        if self.profiles.read_only:
+            return
+        path = path or self.profiles_config.get('path')
+        if path:
+            self.profiles.save(path)
+        departments_path = self.profiles_config.get('departments_path')
+        if departments_path:
+            self.departments.save(departments_path)
+    
+    def analyze_experts_from_profiles(self, topic: str, max_results: int = 50) -> List[Dict]:
+        """Эксперты по теме из профилей: одно умножение матрицы профилей на вектор темы и top-k"""
+        logger.info(f"Анализ экспертов по теме из {len(self.profiles)} профилей: {topic}")
+        
+        topic_vector = self.bert_model.encode_text(topic)
+        with metrics.timer("ml_stage_duration_seconds", stage="similarity"):
+            expertise_scores = self._author_expertise(topic_vector)
+            rows = top_k_indices(expertise_scores, max_results)
+        
+        experts = []
+        for row in rows:
+            if expertise_scores[row] <= 0.3:  # Порог экспертизы
+                break
+            author = self.profiles.author(row)
+            experts.append({
+                "author_id": author["author_id"],
+                "expertise_score": float(expertise_scores[row]),
+                "topic_article_count": self.profiles.topic_article_count(row, topic_vector, 0.5),
+                "total_citations": self._estimate_citations(author),
+                "last_activity_year": self._get_last_activity(author),
+                "related_topics": self._get_related_topics(author, topic)
+            })
+        return experts
     
     def analyze_experts_by_topic(self, topic: str, authors: List[Dict]) -> List[Dict]:
         """Анализ экспертов по теме"""
         logger.info(f"Анализ экспертов по теме: {topic}")
         
         topic_vector = self.bert_model.encode_text(topic)
-        experts = []
         
-        for author in authors:
+        # Уникальные темы всех авторов кодируются одним батчем, дальше - gather по авторам
+        valid_authors, unique_topics, topic_ids, lengths = self._collect_topics(authors, "author_id")
+        similarities = self._topic_similarities(topic_vector, unique_topics)[topic_ids]
+        
+        expertise_scores = self._calculate_expertise_scores(similarities, lengths)
+        article_counts = self._count_topic_articles(similarities, lengths)
+        
+        experts = []
+        for author, expertise_score, article_count in zip(valid_authors, expertise_scores, article_counts):
             try:
-                expertise_score = self._calculate_expertise_score(author, topic, topic_vector)
-                
                 if expertise_score > 0.3:  # Порог экспертизы
                     experts.append({
                         "author_id": author["author_id"],
                         "expertise_score": float(expertise_score),
-                        "topic_article_count": self._count_topic_articles(author, topic),
+                        "topic_article_count": int(article_count),
                         "total_citations": self._estimate_citations(author),
                         "last_activity_year": self._get_last_activity(author),
                         "related_topics": self._get_related_topics(author, topic)
@@ -39,25 +141,60 @@ class ExpertAnalyzerService:
         experts.sort(key=lambda x: x["expertise_score"], reverse=True)
         return experts
     
+    def analyze_departments_from_aggregates(self, topic: str, max_results: int = 50) -> List[Dict]:
+        """Кафедры по теме из агрегатов: гистограммы тем и профили авторов, без разбора списков тем"""
+        logger.info(f"Анализ кафедр по теме из {len(self.departments)} агрегатов: {topic}")
+        
+        topic_vector = self.bert_model.encode_text(topic)
+        with metrics.timer("ml_stage_duration_seconds", stage="similarity"):
+            author_scores = self._author_expertise(topic_vector)
+            article_counts, lengths, centroid_similarity = self.departments.topic_statistics(topic_vector, 0.5)
+            strength_scores = self._calculate_department_strengths(article_counts, lengths)
+            # Сила ограничена 1.0: равные оценки различаются близостью центроида кафедры к теме
+            order = np.lexsort((-centroid_similarity, -strength_scores))
+        
+        departments_analysis = []
+        for row in order[:max_results]:
+            if strength_scores[row] <= 0.2:  # Порог значимости
+                break
+            organization_id, author_ids = self.departments.members(row)
+            department = {"organization_id": organization_id, "author_ids": author_ids}
+            departments_analysis.append({
+                "organization_id": organization_id,
+                "strength_score": float(strength_scores[row]),
+                "expert_count": self._count_experts_in_department(department, author_scores),
+                "total_articles": int(article_counts[row]),
+                "key_author_ids": self._get_key_authors(department, author_scores),
+                "unprofiled_author_ids": self._get_unprofiled_authors(department, author_scores)
+            })
+        return departments_analysis
+    
     def analyze_departments_by_topic(self, topic: str, departments: List[Dict]) -> List[Dict]:
         """Анализ кафедр по теме"""
         logger.info(f"Анализ кафедр по теме: {topic}")
         
+        topic_vector = self.bert_model.encode_text(topic)
+        
+        # Один проход: запрос кодируется один раз, уникальные темы кафедр - батчем
+        valid_departments, unique_topics, topic_ids, lengths = self._collect_topics(departments, "organization_id")
+        similarities = self._topic_similarities(topic_vector, unique_topics)[topic_ids]
+        
+        article_counts = self._count_topic_articles(similarities, lengths)
+        strength_scores = self._calculate_department_strengths(article_counts, lengths)
+        author_scores = self._author_expertise(topic_vector)
+        
         departments_analysis = []
         
-        for dept in departments:
+        for dept, strength_score, total_articles in zip(valid_departments, strength_scores, article_counts):
             try:
-                strength_score = self._calculate_department_strength(dept, topic)
-                expert_count = self._count_experts_in_department(dept, topic)
-                total_articles = self._count_department_articles(dept, topic)
-                
                 if strength_score > 0.2:  # Порог значимости
                     departments_analysis.append({
                         "organization_id": dept["organization_id"],
-                        "strength_score": strength_score,
-                        "expert_count": expert_count,
-                        "total_articles": total_articles,
-                        "key_author_ids": self._get_key_authors(dept, topic)
+                        "strength_score": float(strength_score),
+                        "expert_count": self._count_experts_in_department(dept, author_scores),
+                        "total_articles": int(total_articles),
+                        "key_author_ids": self._get_key_authors(dept, author_scores),
+                        "unprofiled_author_ids": self._get_unprofiled_authors(dept, author_scores)
                     })
                     
             except Exception as e:
@@ -68,40 +205,58 @@ class ExpertAnalyzerService:
         departments_analysis.sort(key=lambda x: x["strength_score"], reverse=True)
         return departments_analysis
     
-    def _calculate_expertise_score(self, author: Dict, topic: str, topic_vector: np.ndarray) -> float:
-        """Вычисление оценки экспертизы автора"""
-        # Анализируем темы статей автора
-        article_topics = author.get("article_topics", [])
-        
-        if not article_topics:
-            return 0.0
+    def _collect_topics(self, items: List[Dict], id_key: str) -> Tuple[List[Dict], List[str], np.ndarray, np.ndarray]:
+        """Сбор тем по авторам/кафедрам: уникальные строки + плоский массив индексов и длины сегментов"""
+        topic_index: Dict[str, int] = {}
+        valid_items = []
+        topic_ids = []
+        lengths = []
         
-        # Вычисляем сходство тем автора с целевой темой
-        topic_similarities = []
-        for author_topic in article_topics:
-            author_topic_vector = self.bert_model.encode_text(author_topic)
-            similarity = self.bert_model._cosine_similarity(topic_vector, author_topic_vector)
-            topic_similarities.append(similarity)
-        
-        # Усредненное сходство + бонус за количество статей
-        avg_similarity = np.mean(topic_similarities) if topic_similarities else 0.0
-        article_count_bonus = min(len(article_topics) * 0.1, 0.3)  # Максимум +0.3 за много статей
+        for item in items:
+            try:
+                if id_key not in item:
+                    raise KeyError(id_key)
+                item_topic_ids = [topic_index.setdefault(t, len(topic_index)) for t in item.get("article_topics", [])]
+            except Exception as e:
+                logger.error(f"Ошибка разбора {id_key}={item.get(id_key)}: {e}")
+                continue
+            
+            valid_items.append(item)
+            topic_ids.extend(item_topic_ids)
+            lengths.append(len(item_topic_ids))
         
-        return min(avg_similarity + article_count_bonus, 1.0)
+        return valid_items, list(topic_index), np.array(topic_ids, dtype=np.int64), np.array(lengths, dtype=np.int64)
     
-    def _count_topic_articles(self, author: Dict, topic: str) -> int:
-        """Подсчет статей автора по теме"""
-        article_topics = author.get("article_topics", [])
-        topic_vector = self.bert_model.encode_text(topic)
+    def _topic_similarities(self, topic_vector: np.ndarray, topics: List[str]) -> np.ndarray:
+        """Косинусное сходство целевой темы со списком тем (один батч кодирования)"""
+        if not topics:
+            return np.empty(0, dtype=np.float32)
         
-        count = 0
-        for author_topic in article_topics:
-            author_topic_vector = self.bert_model.encode_text(author_topic)
-            similarity = self.bert_model._cosine_similarity(topic_vector, author_topic_vector)
-            if similarity > 0.5:
-                count += 1
+        topic_embeddings = self.bert_model.encode_batch(topics)
+        with metrics.timer("ml_stage_duration_seconds", stage="similarity"):
+            return normalize_rows(topic_embeddings) @ normalize_rows(topic_vector)[0]
+    
+    def _segment_sums(self, values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Суммы по сегментам плоского массива (пустые сегменты дают 0)"""
+        segments = np.repeat(np.arange(len(lengths)), lengths)
+        return np.bincount(segments, weights=values, minlength=len(lengths))
+    
+    def _calculate_expertise_scores(self, similarities: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Оценки экспертизы авторов по сходству их тем с целевой темой"""
+        sums = self._segment_sums(similarities, lengths)
+        avg_similarity = np.divide(sums, lengths, out=np.zeros(len(lengths)), where=lengths > 0)
+        return self._expertise_from_similarity(avg_similarity, lengths)
+    
+    def _expertise_from_similarity(self, avg_similarity: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Усредненное сходство + бонус за количество статей"""
+        article_count_bonus = np.minimum(lengths * 0.1, 0.3)  # Максимум +0.3 за много статей
         
-        return count
+        scores = np.minimum(avg_similarity + article_count_bonus, 1.0)
+        return np.where(lengths > 0, scores, 0.0)
+    
+    def _count_topic_articles(self, similarities: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Подсчет статей авторов по теме"""
+        return self._segment_sums((similarities > 0.5).astype(np.float64), lengths).astype(np.int64)
     
     def _estimate_citations(self, author: Dict) -> int:
         """Оценка цитирований (упрощенно)"""
@@ -121,40 +276,41 @@ class ExpertAnalyzerService:
         topic_counts = Counter(other_topics)
         return [topic for topic, _ in topic_counts.most_common(3)]
     
-    def _calculate_department_strength(self, department: Dict, topic: str) -> float:
-        """Вычисление силы кафедры в теме"""
-        all_topics = department.get("article_topics", [])
-        topic_count = sum(1 for dept_topic in all_topics 
-                         if self.bert_model._cosine_similarity(
-                             self.bert_model.encode_text(dept_topic),
-                             self.bert_model.encode_text(topic)
-                         ) > 0.5)
-        
-        total_topics = len(all_topics)
-        if total_topics == 0:
-            return 0.0
-        
+    def _calculate_department_strengths(self, topic_counts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Сила кафедр в теме по числу статей, близких к теме"""
         # Доля статей по теме + бонус за абсолютное количество
-        topic_ratio = topic_count / total_topics
-        count_bonus = min(topic_count * 0.05, 0.3)  # Максимум +0.3
-        
-        return min(topic_ratio + count_bonus, 1.0)
-    
-    def _count_experts_in_department(self, department: Dict, topic: str) -> int:
-        """Подсчет экспертов в кафедре"""
-        author_ids = department.get("author_ids", [])
-        return min(len(author_ids) // 2, 10)  # Заглушка
-    
-    def _count_department_articles(self, department: Dict, topic: str) -> int:
-        """Подсчет статей кафедры по теме"""
-        all_topics = department.get("article_topics", [])
-        return sum(1 for dept_topic in all_topics 
-                  if self.bert_model._cosine_similarity(
-                      self.bert_model.encode_text(dept_topic),
-                      self.bert_model.encode_text(topic)
-                  ) > 0.5)
-    
-    def _get_key_authors(self, department: Dict, topic: str) -> List[str]:
-        """Получение ключевых авторов кафедры"""
-        author_ids = department.get("author_ids", [])
-        return author_ids[:3]  # Берем первых трех авторов
\ No newline at end of file
+        topic_ratio = np.divide(topic_counts, lengths, out=np.zeros(len(lengths)), where=lengths > 0)
+        count_bonus = np.minimum(topic_counts * 0.05, 0.3)  # Максимум +0.3
+        
+        strengths = np.minimum(topic_ratio + count_bonus, 1.0)
+        return np.where(lengths > 0, strengths, 0.0)
+    
+    def _author_expertise(self, topic_vector: np.ndarray) -> np.ndarray:
+        """Оценки экспертизы всех авторов с профилями (строки профилей)"""
+        avg_similarity, lengths = self.profiles.mean_similarities(topic_vector)
+        return self._expertise_from_similarity(avg_similarity, lengths)
+    
+    def _member_scores(self, department: Dict, author_scores: np.ndarray) -> Dict[str, float]:
+        """Оценки экспертизы авторов кафедры, у которых есть профиль"""
+        scores = {}
+        for author_id in department.get("author_ids", []):
+            row = self.profiles.row(author_id)
+            if row is not None and row < len(author_scores):
+                scores[author_id] = float(author_scores[row])
+        return scores
+    
+    def _count_experts_in_department(self, department: Dict, author_scores: np.ndarray) -> int:
+        """Подсчет экспертов в кафедре: авторы с оценкой выше порога экспертизы"""
+        return sum(1 for score in self._member_scores(department, author_scores).values() if score > 0.3)
+    
+    def _get_key_authors(self, department: Dict, author_scores: np.ndarray) -> List[str]:
+        """Ключевые авторы кафедры: три автора с наибольшей экспертизой по теме"""
+        scores = self._member_scores(department, author_scores)
+        ranked = sorted((author_id for author_id, score in scores.items() if score > 0),
+                        key=lambda author_id: scores[author_id], reverse=True)
+        return ranked[:3]
+    
+    def _get_unprofiled_authors(self, department: Dict, author_scores: np.ndarray) -> List[str]:
+        """Авторы кафедры без профиля: не оцениваются и не входят в expert_count и key_author_ids"""
+        scores = self._member_scores(department, author_scores)
+        return [author_id for author_id in dict.fromkeys(department.get("author_ids", [])) if author_id not in scores]
\ No newline at end of file
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from src.utils.metrics import metrics
+
+
+class InferenceExecutor:
+    """Ограниченный пул потоков для блокирующего инференса: event loop только ожидает результат"""
+
+    def __init__(self, max_workers: int = 2, intra_op_threads: Optional[int] = None):
+        self.max_workers = max_workers
+        self.intra_op_threads = intra_op_threads
+
+        # Потоки intra-op torch общие для процесса: задаем так, чтобы workers * threads ~ число ядер
+        if intra_op_threads:
+            try:
+                import torch
+                torch.set_num_threads(intra_op_threads)
+            except ImportError:  # без torch (например, ONNX-бэкенд) настраивать нечего
+                pass
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        logger.info(f"Пул инференса: {max_workers} потоков, intra-op потоков torch: {intra_op_threads or 'по умолчанию'}")
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Выполнение блокирующего вызова в пуле; корутина не блокирует event loop"""
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+
+        def call():
+            metrics.observe("ml_queue_wait_seconds", time.perf_counter() - submitted, queue="executor")
+            return func(*args, **kwargs)
+
+        return await loop.run_in_executor(self._pool, call)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,70 @@
+from typing import Optional
+
+import numpy as np
+
+from src.utils.shared_memory import to_shared
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+
+class QuantizedMatrix:
+    """Компактные строки для первого прохода поиска: float16 или int8 с масштабом на строку"""
+
+    def __init__(self, dimension: int, capacity: int, storage: str = "int8", chunk_size: int = 16384):
+        if storage not in ("float16", "int8"):
+            raise ValueError(f"unsupported storage '{storage}', expected float16 or int8")
+        self.dimension = dimension
+        self.storage = storage
+        # Скоринг по частям: промежуточная float32-копия не больше chunk_size строк
+        self.chunk_size = chunk_size
+        self._rows = np.zeros((capacity, dimension), dtype=np.float16 if storage == "float16" else np.int8)
+        self._scales = np.ones(capacity, dtype=np.float32) if storage == "int8" else None
+
+    @property
+    def nbytes(self) -> int:
+        return self._rows.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+
+    def set_rows(self, rows, vectors: np.ndarray):
+        """Запись строк; int8 - симметричная скалярная квантизация, масштаб max|v| / 127"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.storage == "float16":
+            self._rows[rows] = vectors.astype(np.float16)
+            return
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        self._rows[rows] = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        self._scales[rows] = scales
+
+    def move_row(self, source: int, target: int):
+        self._rows[target] = self._rows[source]
+        if self._scales is not None:
+            self._scales[target] = self._scales[source]
+
+    def dot(self, query: np.ndarray, count: Optional[int] = None, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Приближенные скалярные произведения с запросом: для первых count строк или для rows"""
+        query = np.asarray(query, dtype=np.float32)
+        total = len(rows) if rows is not None else count
+        scores = np.empty(total, dtype=np.float32)
+        for start in range(0, total, self.chunk_size):
+            selection = rows[start:start + self.chunk_size] if rows is not None \
+                else slice(start, min(start + self.chunk_size, total))
+            chunk = self._rows[selection].astype(np.float32) @ query
+            if self._scales is not None:
+                chunk *= self._scales[selection]
+            scores[start:start + len(chunk)] = chunk
+        return scores
+
+    def share_memory(self):
+        """Перенос в разделяемую память (prefork-режим)"""
+        self._rows = to_shared(self._rows)
+        if self._scales is not None:
+            self._scales = to_shared(self._scales)
+
+    def grow(self, capacity: int):
+        rows = np.zeros((capacity, self.dimension), dtype=self._rows.dtype)
+        rows[:len(self._rows)] = self._rows
+        self._rows = rows
+        if self._scales is not None:
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[:len(self._scales)] = self._scales
+            self._scales = scales
@@ -0,0 +1,88 @@
+import threading
+import time
+import typing as tp
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class QueryResultCache:
+    """Кэш готовых ответов на запросы: LRU с ограничением по числу записей, TTL и single-flight.
+
+    Одновременные промахи по одному ключу считаются один раз: первый вызов вычисляет ответ,
+    остальные ждут его результат (или его исключение).
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 600.0,
+                 clock: tp.Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[tp.Hashable, tp.Tuple[float, tp.Any]]" = OrderedDict()
+        self._inflight: tp.Dict[tp.Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: tp.Hashable, compute: tp.Callable[[], tp.Any]) -> tp.Any:
+        """Ответ из кэша или результат compute(); ошибки не кэшируются"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.collapsed += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Счетчики попаданий, схлопнутых промахов и вытеснений"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "collapsed": self.collapsed,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds
+            }
@@ -1,14 +1,93 @@
-import base64
+import os
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
 from loguru import logger
 
+from src.services.article_index import ArticleIndex
+from src.services.ann_index import IVFIndex
+from src.utils.vector_utils import decode_vector, normalize_rows, top_k_indices
+from src.utils.metrics import metrics
+
 
 class SemanticSearchService:
     """Сервис семантического поиска"""
     
     def __init__(self, bert_model):
         self.bert_model = bert_model
+        self.search_config = bert_model.config.get('search', {})
+        self.index = self._create_index()
+    
+    def _create_index(self) -> ArticleIndex:
+        """Серверный индекс статей (загружается с диска, если файл есть)"""
+        dimension = self.bert_model.config['embeddings']['dimension']
+        options = {
+            'storage': self.search_config.get('storage', 'float32'),
+            'rescore_factor': self.search_config.get('rescore_factor', 4),
+            'full_precision_path': self.search_config.get('full_precision_path')
+        }
+        if self.search_config.get('backend', 'exact') == 'ivf':
+            ivf_config = self.search_config.get('ivf', {})
+            options['ann'] = IVFIndex(
+                dimension,
+                nlist=ivf_config.get('nlist', 1024),
+                nprobe=ivf_config.get('nprobe', 16)
+            )
+            options['ann_train_size'] = ivf_config.get('train_size', 50000)
+        
+        index_path = self.search_config.get('index_path')
+        if index_path and os.path.exists(index_path):
+            return ArticleIndex.load(index_path, dimension, **options)
+        return ArticleIndex(dimension, **options)
+    
+    def index_articles(self, articles: List[Dict]) -> int:
+        """Регистрация статей в индексе: по готовым эмбеддингам (base64 или сырые байты) или по текстам"""
+        if not articles:
+            return 0
+        
+        dimension = self.index.dimension
+        titles = np.zeros((len(articles), dimension), dtype=np.float32)
+        abstracts = np.zeros((len(articles), dimension), dtype=np.float32)
+        
+        to_encode = []
+        with metrics.timer("ml_stage_duration_seconds", stage="base64_decode"):
+            for i, article in enumerate(articles):
+                if article.get("title_embedding") and article.get("abstract_embedding"):
+                    titles[i] = decode_vector(article["title_embedding"])
+                    abstracts[i] = decode_vector(article["abstract_embedding"])
+                else:
+                    to_encode.append(i)
+        
+        if to_encode:
+            texts = [articles[i].get("title_ru", "") for i in to_encode] + \
+                    [articles[i].get("abstract_ru", "") for i in to_encode]
+            encoded = self.bert_model.encode_batch(texts)
+            titles[to_encode] = encoded[:len(to_encode)]
+            abstracts[to_encode] = encoded[len(to_encode):]
+        
+        self.index.upsert_many([article["document_id"] for article in articles], titles, abstracts)
+        return len(articles)
+    
+    def index_embeddings(self, document_ids: List[str], title_embeddings: np.ndarray, abstract_embeddings: np.ndarray):
+        """Регистрация уже посчитанных эмбеддингов (из анализа статей)"""
+        self.index.upsert_many(document_ids, title_embeddings, abstract_embeddings)
+    
+    def remove_articles(self, document_ids: List[str]) -> int:
+        """Удаление статей из индекса"""
+        return sum(1 for document_id in document_ids if self.index.delete(document_id))
+    
+    def search_index(self, query_vector: np.ndarray, max_results: int = 10,
+                     nprobe: Optional[int] = None) -> List[Dict]:
+        """Поиск по серверному индексу: одно матричное умножение на запрос (или на кандидатов IVF)"""
+        results = self.index.search(query_vector, max_results, nprobe=nprobe)
+        for result in results:
+            result["matched_concepts"] = self._extract_matched_concepts(result, result["relevance_score"])
+        return results
+    
+    def save_index(self, path: Optional[str] = None):
+        """Сохранение индекса на диск"""
+        path = path or self.search_config.get('index_path')
+        if path and not self.index.read_only:
+            self.index.save(path)
     
     def _normalize(self, v):
         norm = np.linalg.norm(v)
@@ -18,41 +97,58 @@ class SemanticSearchService:
         # normalize query
         query_vector = self._normalize(query_vector.astype(np.float32))
 
-        results = []
+        if not articles:
+            return []
 
-        for article in articles:
-            try:
-                title_vec = np.frombuffer(
-                    base64.b64decode(article["title_embedding"]),
-                    dtype=np.float32
-                )
-                abstract_vec = np.frombuffer(
-                    base64.b64decode(article["abstract_embedding"]),
-                    dtype=np.float32
-                )
+        # Все эмбеддинги кандидатов - в два буфера (N, D); битые строки пропускаются
+        with metrics.timer("ml_stage_duration_seconds", stage="base64_decode"):
+            decoded, title_vecs, abstract_vecs = self._decode_embeddings(articles, query_vector.shape[0])
+        if not decoded:
+            return []
 
-                # CRITICAL FIX
-                title_vec = self._normalize(title_vec)
-                abstract_vec = self._normalize(abstract_vec)
+        with metrics.timer("ml_stage_duration_seconds", stage="similarity"):
+            title_vecs = normalize_rows(title_vecs)
+            abstract_vecs = normalize_rows(abstract_vecs)
 
-                title_sim = float(np.dot(query_vector, title_vec))
-                abstract_sim = float(np.dot(query_vector, abstract_vec))
+            relevance = 0.6 * (title_vecs @ query_vector) + 0.4 * (abstract_vecs @ query_vector)
 
-                relevance = 0.6 * title_sim + 0.4 * abstract_sim
+            top = top_k_indices(relevance, max_results)
+        return [
+            {
+                "document_id": decoded[i]["document_id"],
+                "relevance_score": float(relevance[i]),
+                "matched_concepts": self._extract_matched_concepts(decoded[i], float(relevance[i]))
+            }
+            for i in top
+        ]
 
-                results.append({
-                    "document_id": article["document_id"],
-                    "relevance_score": relevance
-                })
+    def _decode_embeddings(self, articles: List[Dict], dimension: int):
+        """Декодирование эмбеддингов статей (base64 или сырые байты) в непрерывные float32-буферы"""
+        title_vecs = np.empty((len(articles), dimension), dtype=np.float32)
+        abstract_vecs = np.empty((len(articles), dimension), dtype=np.float32)
+        decoded = []
+
+        for article in articles:
+            try:
+                row = len(decoded)
+                if "document_id" not in article:
+                    raise KeyError("document_id")
+                title_vecs[row] = self._decode_vector(article["title_embedding"], dimension)
+                abstract_vecs[row] = self._decode_vector(article["abstract_embedding"], dimension)
+                decoded.append(article)
 
             except Exception as e:
                 logger.error(f"Error processing {article.get('document_id')}: {e}")
 
-        results.sort(key=lambda x: x["relevance_score"], reverse=True)
-        return results[:max_results]
+        count = len(decoded)
+        return decoded, title_vecs[:count], abstract_vecs[:count]
 
+    def _decode_vector(self, value, dimension: int) -> np.ndarray:
+        vector = decode_vector(value)
+        if vector.shape[0] != dimension:
+            raise ValueError(f"expected {dimension} values, got {vector.shape[0]}")
+        return vector
 
-    
     def _vector_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
         """Вычисление косинусного сходства между векторами"""
         dot_product = np.dot(vec1, vec2)
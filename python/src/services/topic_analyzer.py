@@ -1,8 +1,7 @@
 from typing import List, Dict
-import numpy as np
 from loguru import logger
 
-from src.utils.vector_utils import vector_to_base64
+from src.utils.vector_utils import encode_vector
 
 
 class TopicAnalyzerService:
@@ -11,21 +10,18 @@ class TopicAnalyzerService:
     def __init__(self, bert_model):
         self.bert_model = bert_model
     
-    def analyze_article_topics(self, document_id: str, title_ru: str, abstract_ru: str) -> Dict:
+    def analyze_article_topics(self, document_id: str, title_ru: str, abstract_ru: str, binary: bool = False) -> Dict:
         """Анализ тематик статьи"""
         logger.info(f"Анализ тематик для статьи {document_id}")
         
-        # Анализ тем по заголовку и аннотации
-        title_topics = self.bert_model.analyze_topics(title_ru)
-        abstract_topics = self.bert_model.analyze_topics(abstract_ru)
+        # Заголовок и аннотация - один батч из двух текстов; векторы идут и в скоринг тем, и в ответ
+        embeddings = self.bert_model.encode_batch([title_ru, abstract_ru])
+        title_topics, abstract_topics = self.bert_model.analyze_topics_from_embeddings(embeddings)
+        title_embedding, abstract_embedding = embeddings
         
         # Объединяем и усредняем уверенность
         combined_topics = self._combine_topics(title_topics, abstract_topics)
         
-        # Создаем эмбеддинги
-        title_embedding = self.bert_model.encode_text(title_ru)
-        abstract_embedding = self.bert_model.encode_text(abstract_ru)
-        
         # ЛОГИ ДЛЯ ДЕБАГА
         logger.info(f"Title: '{title_ru}'")
         logger.info(f"Abstract: '{abstract_ru}'")
@@ -35,20 +31,46 @@ class TopicAnalyzerService:
         logger.info(f"Abstract embedding sample: {abstract_embedding[:5]}")
         
         
-        title_b64 = vector_to_base64(title_embedding)
-        abstract_b64 = vector_to_base64(abstract_embedding)
+        # base64 для JSON, сырые float32-байты для msgpack
+        title_encoded = encode_vector(title_embedding, binary)
+        abstract_encoded = encode_vector(abstract_embedding, binary)
         
-        logger.info(f"Title base64 length: {len(title_b64)}")
-        logger.info(f"Abstract base64 length: {len(abstract_b64)}")
-        logger.info(f"Title base64 preview: {title_b64[:50]}...")
-        logger.info(f"Abstract base64 preview: {abstract_b64[:50]}...")
+        logger.info(f"Title encoded length: {len(title_encoded)}")
+        logger.info(f"Abstract encoded length: {len(abstract_encoded)}")
+        logger.info(f"Title encoded preview: {title_encoded[:50]}...")
+        logger.info(f"Abstract encoded preview: {abstract_encoded[:50]}...")
         
         return {
             "topics": combined_topics,
-            "title_embedding": title_b64, 
-            "abstract_embedding": abstract_b64 
+            "title_embedding": title_encoded, 
+            "abstract_embedding": abstract_encoded 
         }
     
+    def analyze_articles_topics(self, articles: List[Dict], binary: bool = False) -> List[Dict]:
+        """Пакетный анализ тематик статей: все заголовки и аннотации кодируются батчами"""
+        logger.info(f"Пакетный анализ тематик для {len(articles)} статей")
+        
+        if not articles:
+            return []
+        
+        count = len(articles)
+        texts = [article["title_ru"] for article in articles] + [article["abstract_ru"] for article in articles]
+        embeddings = self.bert_model.encode_batch(texts)
+        
+        # Одно матричное умножение на всю пачку текстов
+        text_topics = self.bert_model.analyze_topics_from_embeddings(embeddings)
+        
+        results = []
+        for i, article in enumerate(articles):
+            results.append({
+                "document_id": article["document_id"],
+                "topics": self._combine_topics(text_topics[i], text_topics[count + i]),
+                "title_embedding": encode_vector(embeddings[i], binary),
+                "abstract_embedding": encode_vector(embeddings[count + i], binary)
+            })
+        
+        return results
+    
     def analyze_user_query(self, user_query: str, context: str = "article_search") -> Dict:
         """Анализ пользовательского запроса"""
         logger.info(f"Анализ запроса: '{user_query}' в контексте: {context}")
@@ -1,110 +1,132 @@
-extended_topics = [
-    # Компьютерные науки и ИИ
-    "искусственный интеллект", "машинное обучение", "нейронные сети",
-    "глубокое обучение", "компьютерное зрение", "обработка естественного языка", 
-    "большие данные", "data science", "кибербезопасность", "блокчейн",
-    "интернет вещей", "облачные вычисления", "робототехника", "алгоритмы",
-    "программное обеспечение", "базы данных", "информационные системы",
-    "автоматизированное проектирование", "компьютерное моделирование",
-    "веб разработка", "мобильные приложения", "криптография",
-    "распределенные системы", "искусственные иммунные системы",
-    
-    # Медицина и биология
-    "медицинская диагностика", "биоинформатика", "генетика", "геномика",
-    "молекулярная биология", "клеточные технологии", "иммунология",
-    "фармакология", "вирусология", "онкология", "кардиология", "нейробиология",
-    "клинические исследования", "биомедицинская инженерия", "генная инженерия",
-    "биотехнологии", "транскриптомика", "протеомика", "метаболомика",
-    "медицинская визуализация", "телемедицина", "персонализированная медицина",
-    
-    # Инженерия и строительство
-    "строительные конструкции", "геодезические измерения", "инженерные системы",
-    "гражданское строительство", "архитектурное проектирование", "городское планирование",
-    "дорожное строительство", "транспортные системы", "водоснабжение",
-    "энергетические системы", "машиностроение", "авиационная техника",
-    "нефтегазовое оборудование", "трубопроводные системы", "гидравлические системы",
-    "теплоэнергетика", "электротехника", "мехатроника", "роботизированные системы",
-    "строительные материалы", "композитные конструкции", "сейсмостойкое строительство",
-    
-    # Математика и физика
-    "математическое моделирование", "теория вероятностей", "статистика",
-    "дифференциальные уравнения", "численные методы", "оптимизация",
-    "теоретическая физика", "квантовая физика", "астрофизика", "оптика",
-    "механика", "термодинамика", "электродинамика", "ядерная физика",
-    "физика плазмы", "нанофизика", "физика конденсированного состояния",
-    "математический анализ", "теория управления", "функциональный анализ",
-    
-    # Экономика и управление
-    "экономический анализ", "финансовый менеджмент", "управление проектами",
-    "стратегическое планирование", "маркетинг", "бизнес-аналитика",
-    "инвестиционный анализ", "управление рисками", "логистика",
-    "предпринимательство", "корпоративное управление", "менеджмент качества",
-    "региональная экономика", "инновационная экономика", "цифровая экономика",
-    "финансовые рынки", "банковское дело", "страхование", "налогообложение",
-    "государственное управление", "муниципальное управление",
-    
-    # Химия и материаловедение
-    "органическая химия", "неорганическая химия", "аналитическая химия",
-    "биохимия", "материаловедение", "наноматериалы", "полимерные материалы",
-    "композитные материалы", "катализ", "электрохимия", "фармацевтическая химия",
-    "квантовая химия", "физическая химия", "коллоидная химия",
-    "строительные материалы", "металловедение", "керамические материалы",
-    "коррозия материалов", "термическая обработка", "плазменные технологии",
-    
-    # Экология и безопасность
-    "экологический мониторинг", "устойчивое развитие", "энергоэффективность",
-    "переработка отходов", "охрана окружающей среды", "пожарная безопасность",
-    "техногенная безопасность", "радиационная безопасность", "экологический аудит",
-    "рациональное природопользование", "зеленые технологии", "возобновляемая энергетика",
-    "изменение климата", "экологическая экспертиза", "промышленная экология",
-    "очистка сточных вод", "рекультивация земель", "экологический менеджмент",
-    
-    # Образование и социальные науки
-    "педагогические технологии", "дистанционное обучение", "управление образованием",
-    "психологические исследования", "социологические исследования",
-    "когнитивные науки", "лингвистика", "философия науки", "история науки",
-    "культурология", "политология", "юриспруденция", "социальная психология",
-    "профессиональное образование", "инновации в образовании", "цифровая педагогика",
-    
-    # Сельское хозяйство и пищевые технологии
-    "агрономия", "растениеводство", "животноводство", "почвоведение",
-    "сельскохозяйственная техника", "пищевые технологии", "биотехнологии в сельском хозяйстве",
-    "агроэкология", "точное земледелие", "селекция растений", "защита растений",
-    
-    # Землеустройство и кадастр
-    "земельный кадастр", "государственная регистрация недвижимости",
-    "геодезические работы", "картография", "мониторинг земель",
-    "землеустройство", "оценка недвижимости", "территориальное планирование",
-    
-    # Туризм и рекреация
-    "туристический менеджмент", "гостиничный бизнес", "рекреационная география",
-    "спортивный менеджмент", "фитнес индустрия", "курортология",
-    
-    # Нанотехнологии
-    "наноматериалы", "наноэлектроника", "наномедицина", "нанофотоника",
-    "молекулярная нанотехнология", "наносенсоры",
-    
-    # Космические технологии
-    "аэрокосмическая техника", "спутниковые технологии", "дистанционное зондирование",
-    "космическая навигация", "ракетостроение",
-    
-    # Транспорт и логистика
-    "транспортные системы", "логистика цепей поставок", "управление транспортом",
-    "интеллектуальные транспортные системы", "городская мобильность",
-    
-    # Энергетика
-    "альтернативная энергетика", "ядерная энергетика", "теплоэнергетика",
-    "энергосберегающие технологии", "умные энергосистемы",
-    
-    # Психология и нейронауки
-    "когнитивная психология", "нейропсихология", "клиническая психология",
-    "организационная психология", "психофизиология",
-    
-    # Архитектура и дизайн
-    "архитектурное проектирование", "ландшафтная архитектура", "урбанистика",
-    "дизайн интерьеров", "средовой дизайн",
-    
-    # Филология и литература
-    "литературоведение", "лингвистика текста", "переводоведение",
-    "компаративистика", "дискурс анализ"
-]
\ No newline at end of file
+# Встроенная таксономия: домен -> темы (для полного классификатора - config['topics']['taxonomy_path'])
+topic_groups = {
+    "Компьютерные науки и ИИ": [
+        "искусственный интеллект", "машинное обучение", "нейронные сети",
+        "глубокое обучение", "компьютерное зрение", "обработка естественного языка",
+        "большие данные", "data science", "кибербезопасность", "блокчейн",
+        "интернет вещей", "облачные вычисления", "робототехника", "алгоритмы",
+        "программное обеспечение", "базы данных", "информационные системы",
+        "автоматизированное проектирование", "компьютерное моделирование",
+        "веб разработка", "мобильные приложения", "криптография",
+        "распределенные системы", "искусственные иммунные системы"
+    ],
+    
+    "Медицина и биология": [
+        "медицинская диагностика", "биоинформатика", "генетика", "геномика",
+        "молекулярная биология", "клеточные технологии", "иммунология",
+        "фармакология", "вирусология", "онкология", "кардиология", "нейробиология",
+        "клинические исследования", "биомедицинская инженерия", "генная инженерия",
+        "биотехнологии", "транскриптомика", "протеомика", "метаболомика",
+        "медицинская визуализация", "телемедицина", "персонализированная медицина"
+    ],
+    
+    "Инженерия и строительство": [
+        "строительные конструкции", "геодезические измерения", "инженерные системы",
+        "гражданское строительство", "архитектурное проектирование", "городское планирование",
+        "дорожное строительство", "транспортные системы", "водоснабжение",
+        "энергетические системы", "машиностроение", "авиационная техника",
+        "нефтегазовое оборудование", "трубопроводные системы", "гидравлические системы",
+        "теплоэнергетика", "электротехника", "мехатроника", "роботизированные системы",
+        "строительные материалы", "композитные конструкции", "сейсмостойкое строительство"
+    ],
+    
+    "Математика и физика": [
+        "математическое моделирование", "теория вероятностей", "статистика",
+        "дифференциальные уравнения", "численные методы", "оптимизация",
+        "теоретическая физика", "квантовая физика", "астрофизика", "оптика",
+        "механика", "термодинамика", "электродинамика", "ядерная физика",
+        "физика плазмы", "нанофизика", "физика конденсированного состояния",
+        "математический анализ", "теория управления", "функциональный анализ"
+    ],
+    
+    "Экономика и управление": [
+        "экономический анализ", "финансовый менеджмент", "управление проектами",
+        "стратегическое планирование", "маркетинг", "бизнес-аналитика",
+        "инвестиционный анализ", "управление рисками", "логистика",
+        "предпринимательство", "корпоративное управление", "менеджмент качества",
+        "региональная экономика", "инновационная экономика", "цифровая экономика",
+        "финансовые рынки", "банковское дело", "страхование", "налогообложение",
+        "государственное управление", "муниципальное управление"
+    ],
+    
+    "Химия и материаловедение": [
+        "органическая химия", "неорганическая химия", "аналитическая химия",
+        "биохимия", "материаловедение", "наноматериалы", "полимерные материалы",
+        "композитные материалы", "катализ", "электрохимия", "фармацевтическая химия",
+        "квантовая химия", "физическая химия", "коллоидная химия",
+        "строительные материалы", "металловедение", "керамические материалы",
+        "коррозия материалов", "термическая обработка", "плазменные технологии"
+    ],
+    
+    "Экология и безопасность": [
+        "экологический мониторинг", "устойчивое развитие", "энергоэффективность",
+        "переработка отходов", "охрана окружающей среды", "пожарная безопасность",
+        "техногенная безопасность", "радиационная безопасность", "экологический аудит",
+        "рациональное природопользование", "зеленые технологии", "возобновляемая энергетика",
+        "изменение климата", "экологическая экспертиза", "промышленная экология",
+        "очистка сточных вод", "рекультивация земель", "экологический менеджмент"
+    ],
+    
+    "Образование и социальные науки": [
+        "педагогические технологии", "дистанционное обучение", "управление образованием",
+        "психологические исследования", "социологические исследования",
+        "когнитивные науки", "лингвистика", "философия науки", "история науки",
+        "культурология", "политология", "юриспруденция", "социальная психология",
+        "профессиональное образование", "инновации в образовании", "цифровая педагогика"
+    ],
+    
+    "Сельское хозяйство и пищевые технологии": [
+        "агрономия", "растениеводство", "животноводство", "почвоведение",
+        "сельскохозяйственная техника", "пищевые технологии", "биотехнологии в сельском хозяйстве",
+        "агроэкология", "точное земледелие", "селекция растений", "защита растений"
+    ],
+    
+    "Землеустройство и кадастр": [
+        "земельный кадастр", "государственная регистрация недвижимости",
+        "геодезические работы", "картография", "мониторинг земель",
+        "землеустройство", "оценка недвижимости", "территориальное планирование"
+    ],
+    
+    "Туризм и рекреация": [
+        "туристический менеджмент", "гостиничный бизнес", "рекреационная география",
+        "спортивный менеджмент", "фитнес индустрия", "курортология"
+    ],
+    
+    "Нанотехнологии": [
+        "наноматериалы", "наноэлектроника", "наномедицина", "нанофотоника",
+        "молекулярная нанотехнология", "наносенсоры"
+    ],
+    
+    "Космические технологии": [
+        "аэрокосмическая техника", "спутниковые технологии", "дистанционное зондирование",
+        "космическая навигация", "ракетостроение"
+    ],
+    
+    "Транспорт и логистика": [
+        "транспортные системы", "логистика цепей поставок", "управление транспортом",
+        "интеллектуальные транспортные системы", "городская мобильность"
+    ],
+    
+    "Энергетика": [
+        "альтернативная энергетика", "ядерная энергетика", "теплоэнергетика",
+        "энергосберегающие технологии", "умные энергосистемы"
+    ],
+    
+    "Психология и нейронауки": [
+        "когнитивная психология", "нейропсихология", "клиническая психология",
+        "организационная психология", "психофизиология"
+    ],
+    
+    "Архитектура и дизайн": [
+        "архитектурное проектирование", "ландшафтная архитектура", "урбанистика",
+        "дизайн интерьеров", "средовой дизайн"
+    ],
+    
+    "Филология и литература": [
+        "литературоведение", "лингвистика текста", "переводоведение",
+        "компаративистика", "дискурс анализ"
+    ]
+}
+
+# Плоский список тем без повторов (тема из нескольких групп - в первой)
+extended_topics = list(dict.fromkeys(topic for topics in topic_groups.values() for topic in topics))
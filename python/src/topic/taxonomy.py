@@ -0,0 +1,153 @@
+import csv
+import json
+import os
+import re
+import typing as tp
+from collections import OrderedDict
+
+import numpy as np
+from loguru import logger
+
+from src.topic.intelligent_topics import extended_topics, topic_groups
+
+# (домен, область, тема)
+TopicPath = tp.Tuple[str, str, str]
+
+
+def normalize_topic(name: str) -> str:
+    """Ключ дедупликации: регистр, ё/е и лишние пробелы не различаются"""
+    return re.sub(r"\s+", " ", name.strip().lower().replace("ё", "е"))
+
+
+class Taxonomy:
+    """Иерархия тематик домен -> область -> тема без повторов.
+
+    Темы хранятся сгруппированными по областям, области - по доменам: узлу соответствует
+    непрерывный диапазон строк (area_offsets, domain_offsets), что позволяет оценивать ветки срезами.
+    """
+
+    def __init__(self, paths: tp.Iterable[TopicPath]):
+        tree: "OrderedDict[str, OrderedDict[str, tp.List[str]]]" = OrderedDict()
+        names: tp.Dict[str, str] = {}
+        seen = set()
+        duplicates = 0
+        for domain, area, topic in paths:
+            topic = topic.strip()
+            key = normalize_topic(topic)
+            if not key:
+                continue
+            # Тема в нескольких ветках остается в первой: у листа один родитель
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            domain = names.setdefault("d:" + normalize_topic(domain), domain.strip())
+            area = names.setdefault("a:" + normalize_topic(domain) + "/" + normalize_topic(area), area.strip())
+            tree.setdefault(domain, OrderedDict()).setdefault(area, []).append(topic)
+        if duplicates:
+            logger.info(f"Таксономия: пропущено {duplicates} повторов тем")
+
+        self.domains: tp.List[str] = list(tree)
+        self.areas: tp.List[str] = []
+        self.topics: tp.List[str] = []
+        self.area_domain: tp.List[int] = []
+        area_offsets, domain_offsets = [0], [0]
+        for domain_id, areas in enumerate(tree.values()):
+            for area, topics in areas.items():
+                self.areas.append(area)
+                self.area_domain.append(domain_id)
+                self.topics.extend(topics)
+                area_offsets.append(len(self.topics))
+            domain_offsets.append(len(self.areas))
+        self.area_offsets = np.array(area_offsets, dtype=np.int64)
+        self.domain_offsets = np.array(domain_offsets, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def paths(self) -> tp.List[TopicPath]:
+        return [
+            (self.domains[self.area_domain[area_id]], self.areas[area_id], self.topics[topic_id])
+            for area_id in range(len(self.areas))
+            for topic_id in range(self.area_offsets[area_id], self.area_offsets[area_id + 1])
+        ]
+
+    @classmethod
+    def from_topics(cls, topics: tp.Iterable[str], domain: str = "Тематики") -> "Taxonomy":
+        """Плоский список: один домен и одна область"""
+        return cls((domain, domain, topic) for topic in topics)
+
+    @classmethod
+    def from_groups(cls, groups: tp.Mapping[str, tp.Union[tp.Mapping[str, tp.List[str]], tp.List[str]]]) -> "Taxonomy":
+        """{домен: {область: [темы]}} или {домен: [темы]} (область совпадает с доменом)"""
+        return cls(_group_paths(groups))
+
+    @classmethod
+    def from_codes(cls, nodes: tp.Iterable[tp.Tuple[str, str]]) -> "Taxonomy":
+        """Классификатор с иерархическими кодами (ГРНТИ "20.19.21", УДК "004.8"): пары (код, название).
+
+        Первый уровень кода - домен, второй - область, листья любой глубины - темы.
+        Узел без потомков (например, область без тем) сам становится темой.
+        """
+        names = OrderedDict((code.strip().rstrip("."), name) for code, name in nodes if code and name)
+        parents = {code.rsplit(".", 1)[0] for code in names if "." in code}
+        paths = []
+        for code, name in names.items():
+            if code in parents:
+                continue
+            parts = code.split(".")
+            domain = names.get(parts[0], name)
+            area = names.get(".".join(parts[:2]), domain) if len(parts) > 1 else domain
+            paths.append((domain, area, name))
+        return cls(paths)
+
+    @classmethod
+    def load(cls, path: str) -> "Taxonomy":
+        """Загрузка из файла: JSON (вложенные группы или узлы с кодами) или CSV/TSV с заголовком.
+
+        CSV: колонки domain, area, topic либо code, name.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in (".json", ".csv", ".tsv"):
+            raise ValueError(f"unsupported taxonomy format '{extension}', expected .json, .csv or .tsv")
+        with open(path, encoding="utf-8", newline="") as f:
+            if extension == ".json":
+                data = json.load(f)
+                if isinstance(data, dict):
+                    taxonomy = cls.from_groups(data)
+                else:
+                    taxonomy = cls.from_codes((str(node["code"]), node["name"]) for node in data)
+            else:
+                rows = list(csv.DictReader(f, delimiter="\t" if extension == ".tsv" else ","))
+                columns = set(rows[0]) if rows else set()
+                if {"code", "name"} <= columns:
+                    taxonomy = cls.from_codes((row["code"], row["name"]) for row in rows)
+                elif {"domain", "topic"} <= columns:
+                    taxonomy = cls((row["domain"], row.get("area") or row["domain"], row["topic"]) for row in rows)
+                else:
+                    raise ValueError(f"taxonomy CSV needs columns code,name or domain,area,topic: {path}")
+
+        logger.info(f"Таксономия {path}: {len(taxonomy.domains)} доменов, {len(taxonomy.areas)} областей, "
+                    f"{len(taxonomy)} тем")
+        return taxonomy
+
+
+def _group_paths(groups) -> tp.Iterator[TopicPath]:
+    for domain, children in groups.items():
+        if isinstance(children, tp.Mapping):
+            for area, topics in children.items():
+                for topic in topics:
+                    yield domain, area, topic
+        else:
+            for topic in children:
+                yield domain, domain, topic
+
+
+def load_taxonomy(topics_config: dict) -> Taxonomy:
+    """Таксономия из config['topics']: файл taxonomy_path или встроенные группы тематик"""
+    if topics_config.get('taxonomy_path'):
+        return Taxonomy.load(topics_config['taxonomy_path'])
+    topics = topics_config.get('predefined_topics', extended_topics)
+    if list(topics) == extended_topics:
+        return Taxonomy.from_groups(topic_groups)
+    return Taxonomy.from_topics(topics)
@@ -0,0 +1,143 @@
+import numpy as np
+import typing as tp
+
+from src.utils.vector_utils import normalize_rows
+from src.utils.shared_memory import to_shared
+from src.utils.metrics import metrics
+from src.topic.taxonomy import Taxonomy
+
+
+class TopicIndex:
+    """Предвычисленная матрица эмбеддингов тематик для векторного скоринга текстов"""
+
+    def __init__(self, topics: tp.List[str], embeddings: np.ndarray):
+        self.topics = list(topics)
+        # (T, D), строки нормализованы -> косинусное сходство сводится к скалярному произведению
+        self.matrix = np.ascontiguousarray(normalize_rows(embeddings), dtype=np.float32)
+
+    @classmethod
+    def build(cls, bert_model, topics: tp.List[str]) -> "TopicIndex":
+        """Кодирование таксономии одним батчем"""
+        return cls(topics, bert_model.encode_batch(list(topics)))
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def share_memory(self):
+        """Перенос матрицы в разделяемую память (prefork-режим)"""
+        self.matrix = to_shared(self.matrix)
+
+    def score(self, embeddings: np.ndarray) -> np.ndarray:
+        """Косинусное сходство (N, T) для батча эмбеддингов текстов"""
+        return normalize_rows(embeddings) @ self.matrix.T
+
+    def match(self, embeddings: np.ndarray, threshold: float = 0.3,
+              main_threshold: float = 0.7, top_k: int = 5) -> tp.List[tp.List[tp.Dict]]:
+        """Топ-k релевантных тематик для каждой строки батча эмбеддингов"""
+        with metrics.timer("ml_stage_duration_seconds", stage="similarity"):
+            return self._match(embeddings, threshold, main_threshold, top_k)
+
+    def _match(self, embeddings: np.ndarray, threshold: float,
+               main_threshold: float, top_k: int) -> tp.List[tp.List[tp.Dict]]:
+        return self._select(self.score(embeddings), None, threshold, main_threshold, top_k)
+
+    def _select(self, similarities: np.ndarray, columns: tp.Optional[np.ndarray], threshold: float,
+                main_threshold: float, top_k: int) -> tp.List[tp.List[tp.Dict]]:
+        """Топ-k по строкам; columns[i, j] - номер темы в столбце j (None - номер столбца)"""
+        masked = np.where(similarities > threshold, similarities, -np.inf)
+
+        width = masked.shape[1]
+        k = min(top_k, width)
+        if k < width:
+            top = np.argpartition(-masked, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(width), (masked.shape[0], 1))
+        top_scores = np.take_along_axis(masked, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        if columns is not None:
+            top = np.take_along_axis(columns, top, axis=1)
+
+        results = []
+        for row_idx, row_scores in zip(top, top_scores):
+            topics = []
+            for idx, similarity in zip(row_idx, row_scores):
+                if not np.isfinite(similarity):
+                    break
+                topics.append({
+                    "topic_name": self.topics[idx],
+                    "confidence": float(similarity),
+                    "topic_type": "main" if similarity > main_threshold else "secondary"
+                })
+            results.append(topics)
+        return results
+
+
+class HierarchicalTopicIndex(TopicIndex):
+    """Матрица тематик с иерархией: сначала домены, затем лучшие области, темы только в раскрытых ветках.
+
+    Домены и области представлены нормализованными центроидами своих тем (отдельно не кодируются).
+    Для небольших таксономий (меньше min_topics тем) полный перебор дешевле и точнее - он и используется.
+    """
+
+    def __init__(self, taxonomy: Taxonomy, embeddings: np.ndarray, domain_beam: int = 4,
+                 area_beam: int = 8, min_topics: int = 2000):
+        super().__init__(taxonomy.topics, embeddings)
+        self.taxonomy = taxonomy
+        self.domain_beam = domain_beam
+        self.area_beam = area_beam
+        self.min_topics = min_topics
+
+        dimension = self.matrix.shape[1]
+        if len(self.topics):
+            area_sums = np.add.reduceat(self.matrix, taxonomy.area_offsets[:-1], axis=0)
+            domain_sums = np.add.reduceat(area_sums, taxonomy.domain_offsets[:-1], axis=0)
+        else:
+            area_sums = domain_sums = np.zeros((0, dimension), dtype=np.float32)
+        self.area_matrix = np.ascontiguousarray(normalize_rows(area_sums).reshape(-1, dimension))
+        self.domain_matrix = np.ascontiguousarray(normalize_rows(domain_sums).reshape(-1, dimension))
+
+    @classmethod
+    def from_taxonomy(cls, bert_model, taxonomy: Taxonomy, **options) -> "HierarchicalTopicIndex":
+        """Кодирование тем таксономии одним батчем"""
+        return cls(taxonomy, bert_model.encode_batch(list(taxonomy.topics)), **options)
+
+    def share_memory(self):
+        super().share_memory()
+        self.area_matrix = to_shared(self.area_matrix)
+        self.domain_matrix = to_shared(self.domain_matrix)
+
+    def _match(self, embeddings: np.ndarray, threshold: float,
+               main_threshold: float, top_k: int) -> tp.List[tp.List[tp.Dict]]:
+        if len(self.topics) < self.min_topics:
+            return super()._match(embeddings, threshold, main_threshold, top_k)
+
+        queries = normalize_rows(embeddings)
+        domains = _top_rows(queries @ self.domain_matrix.T, self.domain_beam)
+        candidates = []
+        for query, row_domains in zip(queries, domains):
+            areas = _expand(self.taxonomy.domain_offsets, row_domains)
+            areas = areas[_top_rows((self.area_matrix[areas] @ query)[None, :], self.area_beam)[0]]
+            candidates.append(_expand(self.taxonomy.area_offsets, areas))
+
+        # Кандидаты строк разной длины: дополнение -inf, чтобы отбор топ-k остался векторным
+        similarities = np.full((len(queries), max(map(len, candidates))), -np.inf, dtype=np.float32)
+        columns = np.zeros(similarities.shape, dtype=np.int64)
+        for row, (query, topic_ids) in enumerate(zip(queries, candidates)):
+            similarities[row, :len(topic_ids)] = self.matrix[topic_ids] @ query
+            columns[row, :len(topic_ids)] = topic_ids
+        return self._select(similarities, columns, threshold, main_threshold, top_k)
+
+
+def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Индексы k лучших столбцов в каждой строке (без сортировки)"""
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+
+
+def _expand(offsets: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Дочерние узлы (непрерывные диапазоны offsets[n]:offsets[n + 1]) для набора узлов"""
+    return np.concatenate([np.arange(offsets[n], offsets[n + 1]) for n in nodes])
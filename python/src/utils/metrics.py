@@ -0,0 +1,206 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class MetricsRegistry:
+    """Метрики в формате Prometheus: у каждого потока своя шарда, запись без блокировок.
+
+    Блокировка берется только при первой записи нового потока (регистрация шарды) и при сборе
+    /metrics. Сборщик читает шарды, в которые потоки продолжают писать: под GIL отдельные
+    операции атомарны, в худшем случае наблюдение попадет в следующий сбор.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple, list]] = []
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Tuple[str, tuple]] = {}
+        self._counters: Dict[str, str] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict[Tuple, float]]]] = {}
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self._histograms[name] = (help_text, tuple(buckets))
+
+    def counter(self, name: str, help_text: str):
+        self._counters[name] = help_text
+
+    def gauge(self, name: str, help_text: str, collect: Callable[[], Dict[Tuple, float]]):
+        """Значение считается при сборе: collect() -> {(("label", "value"), ...): число}"""
+        self._gauges[name] = (help_text, collect)
+
+    def observe(self, name: str, value: float, **labels):
+        """Наблюдение в гистограмму"""
+        if not self.enabled:
+            return
+        shard = self._shard()
+        key = (name, tuple(labels.items()))
+        buckets = self._histograms[name][1]
+        state = shard.get(key)
+        if state is None:
+            # [счетчики по корзинам..., +Inf, сумма]
+            state = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        state[bisect.bisect_left(buckets, value)] += 1
+        state[-1] += value
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Увеличение счетчика"""
+        if not self.enabled:
+            return
+        shard = self._shard()
+        key = (name, tuple(labels.items()))
+        shard[key] = shard.get(key, 0) + value
+
+    def timer(self, name: str, **labels) -> "Timer":
+        """Контекстный менеджер: длительность блока в гистограмму name"""
+        return Timer(self, name, labels)
+
+    def histogram_sum(self, name: str, **labels) -> Tuple[float, int]:
+        """Сумма и число наблюдений гистограммы по всем шардам (с фильтром по меткам)"""
+        wanted = set(labels.items())
+        total, count = 0.0, 0
+        for (metric, series_labels), state in self._snapshot():
+            if metric == name and wanted <= set(series_labels):
+                total += state[-1]
+                count += sum(state[:-1])
+        return total, count
+
+    def counter_value(self, name: str) -> float:
+        return sum(value for key, value in self._snapshot() if key[0] == name)
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus (exposition format 0.0.4)"""
+        merged: Dict[Tuple, object] = {}
+        for key, state in self._snapshot():
+            if isinstance(state, list):
+                current = merged.get(key)
+                merged[key] = list(state) if current is None else [a + b for a, b in zip(current, state)]
+            else:
+                merged[key] = merged.get(key, 0) + state
+
+        lines = []
+        for name, (help_text, buckets) in self._histograms.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (metric, labels), state in sorted(merged.items(), key=lambda item: str(item[0])):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), state[:-1]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(state[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+        for name, help_text in self._counters.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (metric, labels), value in sorted(merged.items(), key=lambda item: str(item[0])):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        for name, (help_text, collect) in self._gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for labels, value in collect().items():
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def _shard(self) -> Dict[Tuple, list]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshot(self):
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # Копия ключей: поток-владелец может добавить новую серию во время сбора
+            for key in list(shard):
+                yield key, shard[key]
+
+
+class Timer:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry: MetricsRegistry, name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: полное время запроса (включая потоковую отдачу) по шаблону пути endpoint"""
+
+    def __init__(self, app, registry: "MetricsRegistry" = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Шаблон маршрута, а не сырой путь: число серий не растет от параметров запроса
+            route = scope.get("route")
+            self.registry.observe("ml_http_request_duration_seconds", time.perf_counter() - start,
+                                  endpoint=getattr(route, "path", "unmatched"))
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
+
+metrics.histogram("ml_http_request_duration_seconds", "Время обработки запроса по endpoint")
+metrics.histogram("ml_stage_duration_seconds",
+                  "Время этапов: json_parse, base64_decode, tokenization, forward_pass, similarity, serialization")
+metrics.histogram("ml_queue_wait_seconds", "Ожидание в очереди: пул инференса (executor) и динамический батчер")
+metrics.histogram("ml_embedding_batch_size", "Размер батча, переданного в модель эмбеддингов", SIZE_BUCKETS)
+metrics.counter("ml_embedding_texts_total", "Тексты, прошедшие через модель эмбеддингов")
+
+
+def _throughput() -> Dict[Tuple, float]:
+    """Производительность модели во время работы: тексты / суммарное время прямого прохода"""
+    seconds, _ = metrics.histogram_sum("ml_stage_duration_seconds", stage="forward_pass")
+    texts = metrics.counter_value("ml_embedding_texts_total")
+    return {(): texts / seconds if seconds else 0.0}
+
+
+metrics.gauge("ml_embedding_throughput_texts_per_second",
+              "Текстов в секунду за время прямого прохода модели (по всем вызовам)", _throughput)
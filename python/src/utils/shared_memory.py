@@ -0,0 +1,14 @@
+import mmap
+
+import numpy as np
+
+
+def to_shared(array: np.ndarray) -> np.ndarray:
+    """Копия массива в анонимной разделяемой памяти (MAP_SHARED): после fork страницы общие для всех процессов"""
+    array = np.ascontiguousarray(array)
+    if array.nbytes == 0:
+        return array
+    buffer = mmap.mmap(-1, array.nbytes)
+    shared = np.frombuffer(buffer, dtype=array.dtype).reshape(array.shape)
+    shared[...] = array
+    return shared
@@ -0,0 +1,132 @@
+import json
+from typing import Any, AsyncIterator, Iterable, List
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from loguru import logger
+
+from src.utils.metrics import metrics
+
+try:
+    import msgpack
+except ImportError:  # msgpack опционален: без него доступен только JSON/base64
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+
+
+def is_binary_request(request: Request) -> bool:
+    """Тело запроса в msgpack (векторы - сырые float32-байты)"""
+    content_type = request.headers.get("content-type", "")
+    return any(media_type in content_type for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def accepts_binary(request: Request) -> bool:
+    """Клиент принимает msgpack-ответ"""
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+async def read_body(request: Request) -> Any:
+    """Разбор тела запроса по Content-Type: msgpack или JSON"""
+    body = await request.body()
+    if is_binary_request(request):
+        if msgpack is None:
+            raise ValueError("msgpack is not installed, send application/json")
+        with metrics.timer("ml_stage_duration_seconds", stage="json_parse"):
+            return msgpack.unpackb(body, raw=False)
+    with metrics.timer("ml_stage_duration_seconds", stage="json_parse"):
+        return json.loads(body) if body else {}
+
+
+def render(request: Request, payload: Any) -> Any:
+    """Ответ в формате, который запросил клиент (Accept); по умолчанию - JSON"""
+    if accepts_binary(request):
+        with metrics.timer("ml_stage_duration_seconds", stage="serialization"):
+            content = msgpack.packb(payload, use_bin_type=True)
+        return Response(content=content, media_type=MSGPACK_MEDIA_TYPES[0])
+    return payload
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON-ответ по умолчанию с замером сериализации"""
+
+    def render(self, content: Any) -> bytes:
+        with metrics.timer("ml_stage_duration_seconds", stage="serialization"):
+            return super().render(content)
+
+
+def is_ndjson_request(request: Request) -> bool:
+    """Тело запроса - NDJSON-поток: первая строка - параметры, дальше по элементу на строку"""
+    content_type = request.headers.get("content-type", "")
+    return any(media_type in content_type for media_type in NDJSON_MEDIA_TYPES)
+
+
+def accepts_ndjson(request: Request) -> bool:
+    """Клиент принимает потоковый NDJSON-ответ"""
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in NDJSON_MEDIA_TYPES)
+
+
+async def iter_ndjson(request: Request) -> AsyncIterator[Any]:
+    """Построчный разбор тела по мере получения: в памяти только недочитанная строка"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                with metrics.timer("ml_stage_duration_seconds", stage="json_parse"):
+                    item = json.loads(line)
+                yield item
+    if buffer.strip():
+        with metrics.timer("ml_stage_duration_seconds", stage="json_parse"):
+            item = json.loads(buffer)
+        yield item
+
+
+async def iterate(items: Iterable[Any]) -> AsyncIterator[Any]:
+    """Обычный список как асинхронный поток (тело уже прочитано целиком)"""
+    for item in items:
+        yield item
+
+
+async def batches(items: AsyncIterator[Any], size: int) -> AsyncIterator[List[Any]]:
+    """Группировка потока элементов в батчи"""
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class NDJSONResponse(StreamingResponse):
+    """NDJSON-ответ, который пишется, пока еще читается тело запроса.
+
+    StreamingResponse параллельно слушает receive() в ожидании разрыва соединения и забирал бы
+    у обработчика куски тела, поэтому здесь только отправка; разрыв проявится ошибкой send.
+    """
+
+    media_type = NDJSON_MEDIA_TYPES[0]
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+def ndjson_response(items: AsyncIterator[Any]) -> NDJSONResponse:
+    """Поток результатов по строке JSON; ошибка после начала ответа - последней строкой {"error": ...}"""
+    async def lines():
+        try:
+            async for item in items:
+                with metrics.timer("ml_stage_duration_seconds", stage="serialization"):
+                    line = json.dumps(item, ensure_ascii=False) + "\n"
+                yield line
+        except Exception as e:
+            logger.error(f"Ошибка потокового ответа: {e}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+
+    return NDJSONResponse(lines())
@@ -13,7 +13,44 @@ def base64_to_vector(base64_str: str, dtype=np.float32) -> np.ndarray:
     return np.frombuffer(bytes_data, dtype=dtype)
 
 
+def encode_vector(vector: np.ndarray, binary: bool = False):
+    """Вектор для ответа: сырые float32-байты (msgpack) или base64-строка (JSON)"""
+    data = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+    return data if binary else base64.b64encode(data).decode('utf-8')
+
+
+def decode_vector(value, dtype=np.float32) -> np.ndarray:
+    """Вектор из запроса: сырые байты читаются без копирования, строки - как base64"""
+    if isinstance(value, np.ndarray):
+        return value.astype(dtype, copy=False)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=dtype)
+    return base64_to_vector(value, dtype)
+
+
 def normalize_vector(vector: np.ndarray) -> np.ndarray:
     """Нормализует вектор к единичной длине"""
     norm = np.linalg.norm(vector)
-    return vector / norm if norm > 0 else vector
\ No newline at end of file
+    return vector / norm if norm > 0 else vector
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Построчно нормализует матрицу к единичной длине (нулевые строки остаются нулевыми)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Индексы k наибольших значений по убыванию (argpartition + сортировка только топа)"""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -10,6 +10,7 @@ from src.services.expert_analyzer import ExpertAnalyzerService
 from src.services.semantic_search import SemanticSearchService
 from src.services.topic_analyzer import TopicAnalyzerService
 from src.models.bert_model import RuBERTModel
+from src.topic.topic_index import TopicIndex
 
 
 @pytest.fixture
@@ -25,8 +26,9 @@ def mock_bert_model():
     
     # Используем реалистичную размерность (например, 384 для sentence-transformers)
     embedding_dim = 384
+    mock_model.config = {'embeddings': {'dimension': embedding_dim, 'normalize': True}}
     mock_model.encode_text.return_value = np.random.rand(embedding_dim).astype(np.float32)
-    mock_model.encode_batch.return_value = np.random.rand(2, embedding_dim).astype(np.float32)
+    mock_model.encode_batch.side_effect = lambda texts: np.random.rand(len(texts), embedding_dim).astype(np.float32)
     
     # Мок анализа тем
     mock_model.analyze_topics.return_value = [
@@ -34,6 +36,16 @@ def mock_bert_model():
         {"topic_name": "анализ данных", "confidence": 0.6, "topic_type": "secondary"}
     ]
     
+    mock_model.analyze_topics_from_embeddings.side_effect = lambda embeddings, predefined_topics=None: [
+        list(mock_model.analyze_topics.return_value) for _ in range(np.atleast_2d(embeddings).shape[0])
+    ]
+    
+    # Матрица тематик для батчевого скоринга
+    mock_model.get_topic_index.return_value = TopicIndex(
+        ["машинное обучение", "анализ данных"],
+        np.random.rand(2, embedding_dim).astype(np.float32)
+    )
+    
     # Мок косинусного сходства
     mock_model._cosine_similarity.return_value = 0.75
     
@@ -64,6 +76,15 @@ def ml_service(mock_bert_model):
     return MLService()
 
 
+@pytest.fixture
+def hash_ml_service():
+    """ML сервис с hash-бэкендом: полный конвейер без загрузки модели из сети"""
+    service = MLService()
+    service.config['models']['backend'] = service.bert_model.backend = "hash"
+    yield service
+    service.close()
+
+
 @pytest.fixture
 def sample_article_data():
     """Пример данных статьи"""
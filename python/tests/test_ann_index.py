@@ -0,0 +1,64 @@
+# tests/test_ann_index.py
+import numpy as np
+
+from src.services.ann_index import IVFIndex
+from src.services.article_index import ArticleIndex
+
+
+def _clustered(rng, count, dimension=16, clusters=8):
+    centers = rng.standard_normal((clusters, dimension))
+    labels = rng.integers(0, clusters, count)
+    return centers, centers[labels] + 0.1 * rng.standard_normal((count, dimension))
+
+
+class TestIVFIndex:
+    """Тесты приближенного поиска IVF"""
+    
+    def test_full_probe_matches_exact_search(self):
+        """Тест: при nprobe = nlist результат совпадает с точным перебором"""
+        rng = np.random.default_rng(0)
+        centers, vectors = _clustered(rng, 400)
+        ids = [f"doc{i}" for i in range(400)]
+        
+        exact = ArticleIndex(16)
+        exact.upsert_many(ids, vectors, vectors)
+        approximate = ArticleIndex(16, ann=IVFIndex(16, nlist=8, nprobe=2), ann_train_size=100)
+        approximate.upsert_many(ids, vectors, vectors)
+        
+        assert approximate.ann.is_trained
+        query = centers[3]
+        expected = [r["document_id"] for r in exact.search(query, 10)]
+        assert [r["document_id"] for r in approximate.search(query, 10, nprobe=8)] == expected
+    
+    def test_incremental_insert_and_delete(self):
+        """Тест добавления и удаления после обучения"""
+        rng = np.random.default_rng(1)
+        centers, vectors = _clustered(rng, 200)
+        index = ArticleIndex(16, ann=IVFIndex(16, nlist=8, nprobe=8), ann_train_size=200)
+        index.upsert_many([f"doc{i}" for i in range(200)], vectors, vectors)
+        
+        index.upsert("new", centers[5], centers[5])
+        assert index.search(centers[5], 1)[0]["document_id"] == "new"
+        
+        index.delete("new")
+        index.delete("doc0")
+        found = [r["document_id"] for r in index.search(centers[5], 200)]
+        assert "new" not in found
+        assert "doc0" not in found
+        assert len(found) == 199
+    
+    def test_save_and_load_keeps_ivf(self, tmp_path):
+        """Тест сохранения обученного IVF вместе с индексом"""
+        rng = np.random.default_rng(2)
+        centers, vectors = _clustered(rng, 300)
+        index = ArticleIndex(16, ann=IVFIndex(16, nlist=8, nprobe=2), ann_train_size=300)
+        index.upsert_many([f"doc{i}" for i in range(300)], vectors, vectors)
+        path = str(tmp_path / "index.npz")
+        
+        index.save(path)
+        loaded = ArticleIndex.load(path, ann=IVFIndex(16, nlist=8, nprobe=2), ann_train_size=300)
+        
+        assert loaded.ann.is_trained
+        assert np.allclose(loaded.ann.centroids, index.ann.centroids)
+        assert [r["document_id"] for r in loaded.search(centers[1], 5)] == \
+            [r["document_id"] for r in index.search(centers[1], 5)]
@@ -0,0 +1,141 @@
+# tests/test_article_index.py
+import threading
+
+import pytest
+import numpy as np
+from loguru import logger
+
+from src.services.article_index import ArticleIndex
+
+
+def _unit(dimension, axis):
+    vector = np.zeros(dimension, dtype=np.float32)
+    vector[axis] = 1.0
+    return vector
+
+
+class TestArticleIndex:
+    """Тесты серверного индекса статей"""
+    
+    def test_search_ranks_by_weighted_similarity(self):
+        """Тест ранжирования по взвешенному сходству заголовка и аннотации"""
+        index = ArticleIndex(4, initial_capacity=1)
+        index.upsert("title_match", _unit(4, 0), _unit(4, 1))
+        index.upsert("abstract_match", _unit(4, 1), _unit(4, 0))
+        index.upsert("no_match", _unit(4, 2), _unit(4, 3))
+        
+        results = index.search(_unit(4, 0), max_results=2)
+        
+        assert [r["document_id"] for r in results] == ["title_match", "abstract_match"]
+        assert results[0]["relevance_score"] == pytest.approx(0.6)
+        assert results[1]["relevance_score"] == pytest.approx(0.4)
+    
+    def test_upsert_overwrites_existing(self):
+        """Тест обновления статьи"""
+        index = ArticleIndex(4)
+        index.upsert("doc", _unit(4, 0), _unit(4, 0))
+        index.upsert("doc", _unit(4, 1), _unit(4, 1))
+        
+        assert len(index) == 1
+        assert index.search(_unit(4, 1), max_results=1)[0]["relevance_score"] == pytest.approx(1.0)
+    
+    def test_delete_moves_last_row(self):
+        """Тест удаления статьи"""
+        index = ArticleIndex(4)
+        for axis in range(3):
+            index.upsert(f"doc{axis}", _unit(4, axis), _unit(4, axis))
+        
+        assert index.delete("doc0")
+        assert not index.delete("doc0")
+        assert len(index) == 2
+        assert index.search(_unit(4, 2), max_results=1)[0]["document_id"] == "doc2"
+    
+    def test_searches_do_not_block_each_other(self):
+        """Тест: поиск не ждет другого чтения, а запись ждет его завершения"""
+        index = ArticleIndex(4)
+        index.upsert("doc", _unit(4, 0), _unit(4, 0))
+        results, written = [], threading.Event()
+
+        with index._lock.read():
+            reader = threading.Thread(target=lambda: results.append(index.search(_unit(4, 0))))
+            reader.start()
+            reader.join(5)
+            writer = threading.Thread(target=lambda: (index.upsert("new", _unit(4, 1), _unit(4, 1)), written.set()))
+            writer.start()
+            assert not written.wait(0.1)
+
+        writer.join(5)
+        assert results[0][0]["document_id"] == "doc"
+        assert written.is_set() and "new" in index
+
+    def test_save_and_load(self, tmp_path):
+        """Тест сохранения индекса на диск"""
+        rng = np.random.default_rng(0)
+        index = ArticleIndex(8)
+        index.upsert_many(["a", "b", "c"], rng.random((3, 8)), rng.random((3, 8)))
+        query = rng.random(8)
+        path = str(tmp_path / "index.npz")
+        
+        index.save(path)
+        loaded = ArticleIndex.load(path)
+        
+        expected = index.search(query, 3)
+        actual = loaded.search(query, 3)
+        
+        assert len(loaded) == 3
+        assert [r["document_id"] for r in actual] == [r["document_id"] for r in expected]
+        assert [r["relevance_score"] for r in actual] == pytest.approx([r["relevance_score"] for r in expected])
+    
+    def test_share_memory_makes_index_read_only(self):
+        """Тест снимка в разделяемой памяти: поиск работает, запись запрещена"""
+        index = ArticleIndex(4)
+        index.upsert("a", _unit(4, 0), _unit(4, 0))
+        index.upsert("b", _unit(4, 1), _unit(4, 1))
+        
+        index.share_memory()
+        
+        assert index.search(_unit(4, 1), max_results=1)[0]["document_id"] == "b"
+        with pytest.raises(RuntimeError):
+            index.upsert("c", _unit(4, 2), _unit(4, 2))
+        with pytest.raises(RuntimeError):
+            index.delete("a")
+    
+    @pytest.mark.parametrize("storage", ["float16", "int8"])
+    def test_quantized_storage_rescores_exactly(self, storage, tmp_path):
+        """Тест компактного хранения: ранжирование и точные оценки как у float32"""
+        rng = np.random.default_rng(0)
+        titles = rng.standard_normal((200, 16)).astype(np.float32)
+        abstracts = rng.standard_normal((200, 16)).astype(np.float32)
+        ids = [f"doc{i}" for i in range(200)]
+        query = titles[7]
+        
+        exact = ArticleIndex(16)
+        exact.upsert_many(ids, titles, abstracts)
+        compact = ArticleIndex(16, initial_capacity=8, storage=storage, rescore_factor=4,
+                               full_precision_path=str(tmp_path / "vectors"))
+        compact.upsert_many(ids, titles, abstracts)
+        compact.delete("doc199")
+        exact.delete("doc199")
+        
+        expected = exact.search(query, max_results=5)
+        found = compact.search(query, max_results=5)
+        
+        assert [r["document_id"] for r in found] == [r["document_id"] for r in expected]
+        assert found[0]["relevance_score"] == pytest.approx(expected[0]["relevance_score"], abs=1e-6)
+        
+        memory = compact.memory_usage()
+        assert memory["full_precision_on_disk"]
+        assert memory["resident_bytes"] == memory["compact_bytes"]
+    
+    def test_compact_storage_without_disk_vectors_warns(self):
+        """Тест предупреждения: компактное хранение без full_precision_path не экономит RAM"""
+        messages = []
+        sink = logger.add(messages.append, level="WARNING")
+        try:
+            ArticleIndex(16, storage="int8")
+            ArticleIndex(16, storage="float32")
+        finally:
+            logger.remove(sink)
+        
+        assert len(messages) == 1
+        assert "full_precision_path" in messages[0]
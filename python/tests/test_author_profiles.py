@@ -0,0 +1,146 @@
+# tests/test_author_profiles.py
+import hashlib
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src.models.bert_model import RuBERTModel
+from src.services.author_profiles import AuthorProfiles
+from src.services.document_store import DocumentStore, content_hash
+from src.services.expert_analyzer import ExpertAnalyzerService
+
+DIMENSION = 16
+
+
+def _vector(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+
+
+def _encode(texts):
+    return np.stack([_vector(text) for text in texts])
+
+
+@pytest.fixture
+def expert_service():
+    """Сервис экспертов с детерминированными эмбеддингами"""
+    bert_model = Mock(spec=RuBERTModel)
+    bert_model.config = {'embeddings': {'dimension': DIMENSION}}
+    bert_model.encode_text.side_effect = _vector
+    bert_model.encode_batch.side_effect = _encode
+    return ExpertAnalyzerService(bert_model)
+
+
+AUTHORS = [
+    {"author_id": "a1", "article_ids": ["d1", "d2"], "article_topics": ["нейронные сети", "машинное обучение"]},
+    {"author_id": "a2", "article_ids": ["d3"], "article_topics": ["биохимия"]},
+    {"author_id": "a3", "article_ids": ["d4", "d5", "d6"],
+     "article_topics": ["машинное обучение", "машинное обучение", "анализ данных"]}
+]
+
+
+class TestAuthorProfiles:
+    """Тесты профилей авторов"""
+
+    def test_same_ranking_as_request_authors(self, expert_service):
+        """Тест: оценки по профилям совпадают с оценками по переданным авторам"""
+        expert_service.upsert_authors(AUTHORS)
+
+        for topic in ["машинное обучение", "биохимия", "нейронные сети"]:
+            expected = expert_service.analyze_experts_by_topic(topic, AUTHORS)
+            actual = expert_service.analyze_experts_from_profiles(topic)
+
+            assert [e["author_id"] for e in actual] == [e["author_id"] for e in expected]
+            for a, b in zip(actual, expected):
+                assert a["expertise_score"] == pytest.approx(b["expertise_score"], abs=1e-5)
+                assert a["topic_article_count"] == b["topic_article_count"]
+                assert a["total_citations"] == b["total_citations"]
+                assert sorted(a["related_topics"]) == sorted(b["related_topics"])
+
+    def test_incremental_updates_match_fresh_profile(self):
+        """Тест: смена темы и авторов статьи дает тот же профиль, что и построение с нуля"""
+        profiles = AuthorProfiles(DIMENSION, _encode)
+        profiles.add_articles(["d1", "d2"], [["a1"], ["a1", "a2"]], ["тема 1", "тема 2"])
+        profiles.add_article("d2", ["a2"], "тема 3")
+        profiles.add_article("d1", ["a1"], "тема 4")
+
+        fresh = AuthorProfiles(DIMENSION, _encode)
+        fresh.add_articles(["d1", "d2"], [["a1"], ["a2"]], ["тема 4", "тема 3"])
+
+        query = _vector("запрос")
+        for similarities, expected in zip(profiles.mean_similarities(query), fresh.mean_similarities(query)):
+            np.testing.assert_allclose(similarities, expected, atol=1e-5)
+        assert profiles.author(0)["article_ids"] == ["d1"]
+
+        profiles.remove_article("d1")
+        assert profiles.mean_similarities(query)[1][0] == 0
+
+    def test_unaligned_article_topics(self, expert_service):
+        """Тест: темы не сопоставлены статьям (как в AuthorArticles из Go) - учитывается каждая тема"""
+        authors = [
+            {"author_id": "expert_001", "article_ids": ["cv_paper_1", "cv_paper_2"],
+             "article_topics": ["компьютерное зрение", "нейронные сети", "обработка изображений"]},
+            {"author_id": "author_ml", "article_ids": ["ml_paper_1"],
+             "article_topics": ["машинное обучение", "нейронные сети"]},
+            {"author_id": "a3", "article_ids": [], "article_topics": ["биохимия", "биохимия"]}
+        ]
+        assert expert_service.upsert_authors(authors) == 3
+
+        for topic in ["компьютерное зрение", "нейронные сети", "биохимия"]:
+            expected = expert_service.analyze_experts_by_topic(topic, authors)
+            actual = expert_service.analyze_experts_from_profiles(topic)
+
+            assert [e["author_id"] for e in actual] == [e["author_id"] for e in expected]
+            for a, b in zip(actual, expected):
+                assert a["expertise_score"] == pytest.approx(b["expertise_score"], abs=1e-5)
+                assert a["topic_article_count"] == b["topic_article_count"]
+                assert a["total_citations"] == b["total_citations"]
+        assert expert_service.profiles.author(0)["article_ids"] == ["cv_paper_1", "cv_paper_2"]
+
+        # Повторная отправка заменяет набор тем целиком
+        expert_service.upsert_authors([{"author_id": "expert_001", "article_ids": [], "article_topics": ["биохимия"]}])
+        assert expert_service.profiles.mean_similarities(_vector("биохимия"))[1][0] == 1
+
+    def test_save_and_load(self, tmp_path):
+        """Тест сохранения и загрузки профилей"""
+        path = str(tmp_path / "profiles.npz")
+        profiles = AuthorProfiles(DIMENSION, _encode, initial_capacity=1)
+        for author in AUTHORS:
+            profiles.upsert_author(author["author_id"], author["article_ids"], author["article_topics"])
+        profiles.save(path)
+
+        loaded = AuthorProfiles.load(path, _encode)
+        query = _vector("машинное обучение")
+
+        assert len(loaded) == 3
+        np.testing.assert_allclose(loaded.mean_similarities(query)[0], profiles.mean_similarities(query)[0])
+        assert loaded.author(2) == profiles.author(2)
+
+        # После загрузки статьи заменяют прежний вклад
+        loaded.add_article("d4", ["a3"], "биохимия")
+        assert loaded.topic_article_count(2, _vector("биохимия"), 0.5) == 1
+
+    def test_rebuild_from_document_store(self, expert_service, tmp_path):
+        """Тест пересборки профилей из хранилища статей"""
+        store = DocumentStore(str(tmp_path / "documents.sqlite"), "model")
+        vectors = np.zeros((2, DIMENSION), dtype=np.float32)
+        store.put_many(["d1", "d2"], [content_hash("t", "a")] * 2, vectors, vectors,
+                       [[{"topic_name": "машинное обучение"}], [{"topic_name": "биохимия"}]])
+        store.set_authors(["d1", "d2"], [["a1", "a2"], ["a2"]])
+
+        assert expert_service.rebuild_profiles(store) == 2
+
+        experts = expert_service.analyze_experts_from_profiles("машинное обучение")
+        assert experts[0]["author_id"] == "a1"
+        assert experts[0]["expertise_score"] == pytest.approx(1.0)
+
+    def test_rebuild_refused_for_read_only_profiles(self, expert_service, tmp_path):
+        """Тест: read-only снимок профилей (prefork) не пересобирается в воркере"""
+        store = DocumentStore(str(tmp_path / "documents.sqlite"), "model")
+        expert_service.profiles.read_only = True
+        profiles = expert_service.profiles
+
+        with pytest.raises(RuntimeError):
+            expert_service.rebuild_profiles(store)
+        assert expert_service.profiles is profiles
@@ -0,0 +1,51 @@
+# tests/test_backends.py
+import pytest
+import numpy as np
+
+from src.models.backends import create_embedding_model, default_onnx_path, mean_pooling
+
+
+class TestEmbeddingBackends:
+    """Тесты бэкендов инференса эмбеддингов"""
+    
+    def test_mean_pooling_ignores_padding(self):
+        """Тест mean pooling: паддинг не влияет на эмбеддинг"""
+        token_embeddings = np.array([
+            [[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]],
+            [[5.0, 5.0], [0.0, 0.0], [0.0, 0.0]]
+        ], dtype=np.float32)
+        attention_mask = np.array([[1, 1, 0], [1, 0, 0]])
+        
+        pooled = mean_pooling(token_embeddings, attention_mask)
+        
+        np.testing.assert_allclose(pooled, [[2.0, 3.0], [5.0, 5.0]])
+        assert pooled.dtype == np.float32
+    
+    def test_mean_pooling_empty_mask(self):
+        """Тест mean pooling без токенов: нулевой вектор вместо деления на ноль"""
+        pooled = mean_pooling(np.ones((1, 2, 3), dtype=np.float32), np.zeros((1, 2)))
+        
+        assert np.all(np.isfinite(pooled))
+    
+    def test_default_onnx_path(self):
+        """Тест пути к экспортированному графу"""
+        path = default_onnx_path("sentence-transformers/model", "onnx_models")
+        
+        assert path.endswith("sentence-transformers__model.onnx")
+    
+    def test_unknown_backend(self):
+        """Тест ошибки при неизвестном бэкенде"""
+        with pytest.raises(ValueError):
+            create_embedding_model({'bert_model': 'model', 'device': 'cpu', 'backend': 'tensorrt'})
+    
+    def test_hash_backend_is_deterministic(self):
+        """Тест hash-бэкенда: один текст - один вектор, общие слова сближают тексты"""
+        model = create_embedding_model({'bert_model': 'model', 'device': 'cpu', 'backend': 'hash'}, dimension=64)
+        
+        embeddings = model.encode(["нейронные сети", "нейронные сети", "нейронные сети в медицине", "биохимия"])
+        single = create_embedding_model({'bert_model': 'model', 'backend': 'hash'}, dimension=64).encode("нейронные сети")
+        
+        assert embeddings.shape == (4, 64)
+        np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_array_equal(embeddings[0], single)
+        assert embeddings[0] @ embeddings[2] > embeddings[0] @ embeddings[3]
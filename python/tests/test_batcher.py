@@ -0,0 +1,138 @@
+# tests/test_batcher.py
+import pytest
+import threading
+import numpy as np
+
+from src.models.batcher import DynamicBatcher, plan_token_batches
+from src.models.bert_model import RuBERTModel
+
+
+class TestDynamicBatcher:
+    """Тесты динамического микробатчинга"""
+    
+    @staticmethod
+    def _encode(calls):
+        def encode(texts):
+            calls.append(list(texts))
+            return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+        return encode
+    
+    def test_single_call_returns_own_row(self):
+        """Тест одиночного вызова"""
+        calls = []
+        batcher = DynamicBatcher(self._encode(calls), max_batch_size=8, max_wait_ms=1)
+        
+        embedding = batcher.encode("abc")
+        batcher.close()
+        
+        np.testing.assert_array_equal(embedding, [3.0, 1.0])
+        assert calls == [["abc"]]
+    
+    def test_concurrent_calls_are_batched(self):
+        """Тест склейки параллельных вызовов в один батч"""
+        calls = []
+        batcher = DynamicBatcher(self._encode(calls), max_batch_size=16, max_wait_ms=200)
+        texts = ["x" * (i + 1) for i in range(8)]
+        results = {}
+        
+        def worker(text):
+            results[text] = batcher.encode(text)
+        
+        threads = [threading.Thread(target=worker, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+        
+        # Каждый вызывающий получил свою строку
+        for text in texts:
+            assert results[text][0] == len(text)
+        assert len(calls) < len(texts)
+        stats = batcher.stats()
+        assert stats["requests"] == len(texts)
+        assert stats["max_batch_size"] > 1
+    
+    def test_max_batch_size_respected(self):
+        """Тест ограничения размера батча"""
+        calls = []
+        batcher = DynamicBatcher(self._encode(calls), max_batch_size=3, max_wait_ms=50)
+        
+        futures = [batcher.submit(f"text {i}") for i in range(7)]
+        results = [future.result() for future in futures]
+        batcher.close()
+        
+        assert len(results) == 7
+        assert all(len(batch) <= 3 for batch in calls)
+        assert batcher.stats()["max_batch_size"] <= 3
+    
+    def test_errors_propagate_to_callers(self):
+        """Тест передачи ошибки модели всем ожидающим"""
+        def failing(texts):
+            raise RuntimeError("model failed")
+        
+        batcher = DynamicBatcher(failing, max_batch_size=4, max_wait_ms=1)
+        
+        with pytest.raises(RuntimeError):
+            batcher.encode("text")
+        batcher.close()
+    
+    def test_closed_batcher_rejects_calls(self):
+        """Тест отказа после остановки"""
+        batcher = DynamicBatcher(self._encode([]), max_batch_size=4, max_wait_ms=1)
+        batcher.close()
+        
+        with pytest.raises(RuntimeError):
+            batcher.submit("text")
+
+
+class TestTokenBudgetBatches:
+    """Тесты батчей по длине и бюджету токенов"""
+    
+    def test_batches_group_similar_lengths(self):
+        """Тест группировки: длинные тексты отдельно от коротких, паддинг в пределах бюджета"""
+        lengths = [10, 120, 12, 128, 8, 100]
+        
+        batches = plan_token_batches(lengths, max_batch_tokens=256, max_batch_size=8)
+        
+        assert [sorted(rows.tolist()) for rows in batches] == [[1, 3], [2, 5], [0, 4]]
+        for rows in batches:
+            assert len(rows) * max(lengths[i] for i in rows) <= 256
+        assert sorted(np.concatenate(batches).tolist()) == list(range(len(lengths)))
+    
+    def test_batch_size_limit_and_long_texts(self):
+        """Тест ограничения числа текстов и текста длиннее бюджета"""
+        batches = plan_token_batches([1] * 10 + [1000], max_batch_tokens=100, max_batch_size=4)
+        
+        assert batches[0].tolist() == [10]
+        assert [len(rows) for rows in batches[1:]] == [4, 4, 2]
+    
+    def test_encode_batch_restores_order(self):
+        """Тест encode_batch с планированием: строки в исходном порядке, батчи однородны по длине"""
+        class WordModel:
+            def __init__(self):
+                self.calls = []
+            
+            def token_lengths(self, texts):
+                return np.array([len(text.split()) for text in texts])
+            
+            def encode(self, texts, normalize_embeddings=True, batch_size=32, show_progress_bar=False):
+                self.calls.append(list(texts))
+                return np.array([[len(text.split()), i] for i, text in enumerate(texts)], dtype=np.float32)
+        
+        config = {
+            'models': {'bert_model': 'model', 'device': 'cpu', 'backend': 'torch', 'warmup': False},
+            'embeddings': {'dimension': 2, 'normalize': False, 'batch_size': 4, 'max_batch_tokens': 12},
+            'cache': {'enabled': False},
+            'batching': {'enabled': False},
+            'topics': {'predefined_topics': []}
+        }
+        bert_model = RuBERTModel(config)
+        bert_model._embedding_model = model = WordModel()
+        texts = ["a " * 6, "b", "c " * 5, "d d", "e " * 6, "f"]
+        
+        embeddings = bert_model.encode_batch(texts)
+        
+        np.testing.assert_array_equal(embeddings[:, 0], [6, 1, 5, 2, 6, 1])
+        assert [len(batch) for batch in model.calls] == [2, 2, 2]
+
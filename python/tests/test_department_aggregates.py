@@ -0,0 +1,160 @@
+# tests/test_department_aggregates.py
+import hashlib
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src.models.bert_model import RuBERTModel
+from src.services.expert_analyzer import ExpertAnalyzerService
+
+DIMENSION = 16
+
+
+def _vector(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+
+
+@pytest.fixture
+def expert_service():
+    """Сервис экспертов с детерминированными эмбеддингами"""
+    bert_model = Mock(spec=RuBERTModel)
+    bert_model.config = {'embeddings': {'dimension': DIMENSION}}
+    bert_model.encode_text.side_effect = _vector
+    bert_model.encode_batch.side_effect = lambda texts: np.stack([_vector(text) for text in texts])
+    return ExpertAnalyzerService(bert_model)
+
+
+AUTHORS = [
+    {"author_id": "a1", "article_ids": ["d1", "d2"], "article_topics": ["биохимия", "биохимия"]},
+    {"author_id": "a2", "article_ids": ["d3"], "article_topics": ["биохимия"]},
+    {"author_id": "a3", "article_ids": ["d4", "d5"], "article_topics": ["машинное обучение", "анализ данных"]}
+]
+
+DEPARTMENTS = [
+    {"organization_id": "bio", "author_ids": ["a1", "a2"]},
+    {"organization_id": "cs", "author_ids": ["a3", "a2"]}
+]
+
+
+class TestDepartmentAggregates:
+    """Тесты агрегатов кафедр"""
+
+    def test_same_strength_as_request_departments(self, expert_service):
+        """Тест: агрегаты дают те же оценки, что и кафедры со списками тем их авторов"""
+        expert_service.upsert_authors(AUTHORS)
+        expert_service.upsert_departments(DEPARTMENTS)
+        topics_by_author = {author["author_id"]: author["article_topics"] for author in AUTHORS}
+        request_departments = [
+            {**department, "article_topics": [t for a in department["author_ids"] for t in topics_by_author[a]]}
+            for department in DEPARTMENTS
+        ]
+
+        for topic in ["биохимия", "машинное обучение"]:
+            expected = {d["organization_id"]: d for d in expert_service.analyze_departments_by_topic(topic, request_departments)}
+            actual = {d["organization_id"]: d for d in expert_service.analyze_departments_from_aggregates(topic)}
+
+            assert actual.keys() == expected.keys()
+            for organization_id, department in actual.items():
+                assert department == pytest.approx(expected[organization_id])
+
+    def test_coauthored_article_counted_once(self, expert_service):
+        """Тест: статья двух авторов кафедры учитывается один раз, как в запросе с ее статьями"""
+        expert_service.register_articles(
+            ["d1", "d2"], [["a1", "a2"], ["a2"]],
+            [[{"topic_name": "биохимия"}], [{"topic_name": "машинное обучение"}]]
+        )
+        expert_service.upsert_departments([{"organization_id": "bio", "author_ids": ["a1", "a2"]}])
+        request_departments = [{"organization_id": "bio", "author_ids": ["a1", "a2"],
+                                 "article_topics": ["биохимия", "машинное обучение"]}]
+
+        expected = expert_service.analyze_departments_by_topic("биохимия", request_departments)
+        actual = expert_service.analyze_departments_from_aggregates("биохимия")
+
+        assert len(actual) == len(expected) == 1
+        assert actual[0] == pytest.approx(expected[0])
+        assert actual[0]["total_articles"] == 1
+
+        # Статья теряет одного соавтора - вклад в кафедру сохраняется; теряет обоих - исчезает
+        expert_service.register_articles(["d1"], [["a1"]], [[{"topic_name": "биохимия"}]])
+        department = expert_service.analyze_departments_from_aggregates("биохимия")[0]
+        assert department["strength_score"] == pytest.approx(expected[0]["strength_score"])
+        assert department["total_articles"] == 1
+        expert_service.remove_articles(["d1"])
+        assert expert_service.analyze_departments_from_aggregates("биохимия") == []
+
+    def test_key_authors_ranked_by_expertise(self, expert_service):
+        """Тест: ключевые авторы и эксперты кафедры определяются по профилям, а не по порядку в списке"""
+        expert_service.upsert_authors(AUTHORS)
+        expert_service.upsert_departments(DEPARTMENTS)
+
+        departments = {d["organization_id"]: d for d in expert_service.analyze_departments_from_aggregates("биохимия")}
+
+        assert departments["bio"]["key_author_ids"][0] in ("a1", "a2")
+        assert departments["bio"]["expert_count"] == 2
+        assert departments["bio"]["total_articles"] == 3
+        if "cs" in departments:
+            assert departments["cs"]["key_author_ids"][0] == "a2"
+
+    def test_request_departments_without_profiles(self, expert_service):
+        """Тест: авторы кафедр из запроса без профилей не оцениваются, а перечисляются отдельно"""
+        departments = [{"organization_id": "bio", "author_ids": ["x1", "x2", "x3"],
+                        "article_topics": ["биохимия", "биохимия"]}]
+
+        department = expert_service.analyze_departments_by_topic("биохимия", departments)[0]
+        assert department["strength_score"] == pytest.approx(1.0)
+        assert department["expert_count"] == 0
+        assert department["key_author_ids"] == []
+        assert department["unprofiled_author_ids"] == ["x1", "x2", "x3"]
+
+        # Оцениваются только авторы с профилем, остальные перечислены отдельно
+        expert_service.upsert_authors([{"author_id": "x3", "article_ids": ["d1"], "article_topics": ["биохимия"]}])
+        department = expert_service.analyze_departments_by_topic("биохимия", departments)[0]
+        assert department["expert_count"] == 1
+        assert department["key_author_ids"] == ["x3"]
+        assert department["unprofiled_author_ids"] == ["x1", "x2"]
+
+    def test_incremental_update_on_ingest(self, expert_service):
+        """Тест: статья автора сразу меняет агрегат его кафедры"""
+        expert_service.upsert_departments([{"organization_id": "bio", "author_ids": ["a1"]}])
+        assert expert_service.analyze_departments_from_aggregates("биохимия") == []
+
+        expert_service.register_articles(["d1", "d2"], [["a1"], ["a1"]],
+                                         [[{"topic_name": "биохимия"}], [{"topic_name": "биохимия"}]])
+        departments = expert_service.analyze_departments_from_aggregates("биохимия")
+        assert departments[0]["organization_id"] == "bio"
+        assert departments[0]["total_articles"] == 2
+        assert departments[0]["key_author_ids"] == ["a1"]
+
+        # Смена темы статьи: вклад старой темы вычитается
+        expert_service.register_articles(["d2"], [["a1"]], [[{"topic_name": "машинное обучение"}]])
+        assert expert_service.analyze_departments_from_aggregates("биохимия")[0]["total_articles"] == 1
+
+    def test_topic_columns_reclaimed(self, expert_service):
+        """Тест: столбцы тем без статей освобождаются, ширина гистограммы не растет с каждым вариантом темы"""
+        expert_service.upsert_departments([{"organization_id": "bio", "author_ids": ["a1"]}])
+        for i in range(300):
+            expert_service.upsert_authors([{"author_id": "a1", "article_ids": ["d1"],
+                                            "article_topics": [f"биохимия {i}", "биохимия"]}])
+
+        assert expert_service.departments.column_count() == 2
+        assert expert_service.departments._histogram.shape[1] == 256
+        department = expert_service.analyze_departments_from_aggregates("биохимия")[0]
+        assert department["total_articles"] == 1
+
+        expert_service.upsert_departments([{"organization_id": "bio", "author_ids": []}])
+        assert expert_service.departments.column_count() == 0
+
+    def test_membership_survives_save_and_profile_rebuild(self, expert_service, tmp_path):
+        """Тест сохранения состава кафедр и пересчета после замены профилей"""
+        expert_service.upsert_authors(AUTHORS)
+        expert_service.upsert_departments(DEPARTMENTS)
+        path = str(tmp_path / "departments.json")
+        expert_service.departments.save(path)
+        before = expert_service.analyze_departments_from_aggregates("биохимия")
+
+        expert_service.departments.load(path)
+        expert_service.departments.attach(expert_service.profiles)
+
+        assert expert_service.analyze_departments_from_aggregates("биохимия") == before
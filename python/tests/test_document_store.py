@@ -0,0 +1,89 @@
+# tests/test_document_store.py
+from unittest.mock import patch
+
+import numpy as np
+
+from src.services.document_store import DocumentStore, content_hash
+
+
+def _put(store, document_ids, title="заголовок", abstract="аннотация"):
+    count = len(document_ids)
+    store.put_many(
+        document_ids,
+        [content_hash(title, abstract)] * count,
+        np.arange(count * 4, dtype=np.float32).reshape(count, 4),
+        -np.arange(count * 4, dtype=np.float32).reshape(count, 4),
+        [[{"topic_name": "тема", "confidence_score": 0.5}]] * count
+    )
+
+
+class TestDocumentStore:
+    """Тесты хранилища результатов анализа статей"""
+
+    def test_hit_requires_same_hash_and_model(self, tmp_path):
+        """Тест: запись актуальна только при том же тексте и той же модели"""
+        path = str(tmp_path / "documents.sqlite")
+        store = DocumentStore(path, "model-a")
+        _put(store, ["doc1"])
+
+        found = store.get_many(["doc1", "doc1", "doc2"], [
+            content_hash("заголовок", "аннотация"),
+            content_hash("заголовок", "новая аннотация"),
+            content_hash("заголовок", "аннотация")
+        ])
+
+        assert np.array_equal(found[0]["title_embedding"], np.arange(4, dtype=np.float32))
+        assert found[0]["topics"][0]["topic_name"] == "тема"
+        assert found[1] is None
+        assert found[2] is None
+        assert store.stats()["stale"] == 1
+
+        store.close()
+        other_model = DocumentStore(path, "model-b")
+        assert other_model.get_many(["doc1"], [content_hash("заголовок", "аннотация")]) == [None]
+
+    def test_export_batches(self, tmp_path):
+        """Тест пачечной выгрузки матриц эмбеддингов"""
+        store = DocumentStore(str(tmp_path / "documents.sqlite"), "model")
+        _put(store, [f"doc{i}" for i in range(5)])
+
+        batches = list(store.export(batch_size=2, with_topics=True))
+
+        assert [len(batch["document_ids"]) for batch in batches] == [2, 2, 1]
+        titles = np.concatenate([batch["title_embeddings"] for batch in batches])
+        assert np.array_equal(titles, np.arange(20, dtype=np.float32).reshape(5, 4))
+        assert batches[0]["topics"][0][0]["topic_name"] == "тема"
+
+    def test_delete(self, tmp_path):
+        """Тест удаления записей"""
+        store = DocumentStore(str(tmp_path / "documents.sqlite"), "model")
+        _put(store, ["doc1", "doc2"])
+
+        assert store.delete_many(["doc1", "missing"]) == 1
+        assert len(store) == 1
+
+
+class TestMLServiceDocumentStore:
+    """Тесты повторной отправки статей через MLService"""
+
+    def test_resubmission_skips_inference(self, hash_ml_service, tmp_path):
+        """Тест: статья с неизменным текстом не анализируется повторно"""
+        hash_ml_service.document_store = DocumentStore(str(tmp_path / "documents.sqlite"), "model")
+        analyze = hash_ml_service.topic_analyzer.analyze_articles_topics
+        with patch.object(hash_ml_service.topic_analyzer, 'analyze_articles_topics', side_effect=analyze) as mock_analyze:
+            first = hash_ml_service.analyze_article_topics("doc1", "Заголовок", "Аннотация")
+            second = hash_ml_service.analyze_article_topics("doc1", "Заголовок", "Аннотация")
+
+            assert second == first
+            assert mock_analyze.call_count == 1
+
+            batch = hash_ml_service.analyze_articles_topics([
+                {"document_id": "doc1", "title_ru": "Заголовок", "abstract_ru": "Аннотация"},
+                {"document_id": "doc2", "title_ru": "Другой", "abstract_ru": "Текст"}
+            ])
+
+            # В пакете пересчитывается только новая статья
+            assert mock_analyze.call_count == 2
+            assert [article["document_id"] for article in mock_analyze.call_args[0][0]] == ["doc2"]
+            assert [result["document_id"] for result in batch["results"]] == ["doc1", "doc2"]
+            assert batch["results"][0]["title_embedding"] == first["title_embedding"]
@@ -0,0 +1,54 @@
+# tests/test_embedding_cache.py
+import numpy as np
+
+from src.models.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    """Тесты кэша эмбеддингов"""
+    
+    def test_hit_and_miss_counters(self):
+        """Тест счетчиков попаданий и промахов"""
+        cache = EmbeddingCache("model")
+        cache.put_many(["a"], np.ones((1, 4), dtype=np.float32))
+        
+        found = cache.get_many(["a", "b"])
+        
+        assert np.array_equal(found[0], np.ones(4, dtype=np.float32))
+        assert found[1] is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+    
+    def test_key_depends_on_model_name(self):
+        """Тест разделения ключей разных моделей"""
+        assert EmbeddingCache("m1").key("текст") != EmbeddingCache("m2").key("текст")
+    
+    def test_lru_eviction_by_bytes(self):
+        """Тест вытеснения по бюджету байтов"""
+        # Каждая запись 4 * float32 = 16 байт, помещаются две
+        cache = EmbeddingCache("model", max_bytes=32)
+        cache.put_many(["a", "b"], np.zeros((2, 4), dtype=np.float32))
+        cache.get_many(["a"])  # "a" становится самой свежей
+        cache.put_many(["c"], np.zeros((1, 4), dtype=np.float32))
+        
+        found = cache.get_many(["a", "b", "c"])
+        
+        assert found[0] is not None
+        assert found[1] is None
+        assert found[2] is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["memory_bytes"] <= 32
+    
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Тест дискового уровня кэша"""
+        path = str(tmp_path / "embeddings.sqlite")
+        cache = EmbeddingCache("model", disk_path=path)
+        cache.put_many(["статья"], np.arange(4, dtype=np.float32).reshape(1, 4))
+        cache.close()
+        
+        restarted = EmbeddingCache("model", disk_path=path)
+        found = restarted.get_many(["статья"])
+        
+        assert np.array_equal(found[0], np.arange(4, dtype=np.float32))
+        assert restarted.stats()["disk_hits"] == 1
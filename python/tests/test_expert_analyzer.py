@@ -58,29 +58,49 @@ class TestExpertAnalyzerService:
                 assert "total_articles" in dept
                 assert "key_author_ids" in dept
     
-    def test_calculate_expertise_score(self, expert_analyzer_service):
-        """Тест вычисления оценки экспертизы"""
-        author = {
-            "article_topics": ["машинное обучение", "глубокое обучение"]
-        }
-        topic = "искусственный интеллект"
-        topic_vector = np.array([0.1, 0.2, 0.3, 0.4, 0.5])
+    def test_calculate_expertise_scores(self, expert_analyzer_service):
+        """Тест вычисления оценок экспертизы по сегментам"""
+        similarities = np.array([0.4, 0.6, 0.9, 0.2])
+        lengths = np.array([2, 0, 2])
         
-        score = expert_analyzer_service._calculate_expertise_score(
-            author, topic, topic_vector
-        )
+        scores = expert_analyzer_service._calculate_expertise_scores(similarities, lengths)
         
-        assert isinstance(score, float)
-        assert 0.0 <= score <= 1.0
+        assert scores.shape == (3,)
+        assert scores[0] == pytest.approx(0.5 + 0.2)
+        assert scores[1] == 0.0
+        assert scores[2] == pytest.approx(0.55 + 0.2)
+        assert np.all((0.0 <= scores) & (scores <= 1.0))
     
     def test_count_topic_articles(self, expert_analyzer_service):
         """Тест подсчета статей по теме"""
-        author = {
-            "article_topics": ["машинное обучение", "биология", "компьютерное зрение"]
-        }
-        topic = "машинное обучение"
+        similarities = np.array([0.9, 0.1, 0.7, 0.6, 0.3])
+        lengths = np.array([3, 2])
+        
+        counts = expert_analyzer_service._count_topic_articles(similarities, lengths)
+        
+        assert counts.tolist() == [2, 1]
+    
+    def test_calculate_department_strengths(self, expert_analyzer_service):
+        """Тест вычисления силы кафедр"""
+        topic_counts = np.array([1, 0, 10])
+        lengths = np.array([2, 0, 10])
+        
+        strengths = expert_analyzer_service._calculate_department_strengths(topic_counts, lengths)
         
-        count = expert_analyzer_service._count_topic_articles(author, topic)
+        assert strengths[0] == pytest.approx(0.5 + 0.05)
+        assert strengths[1] == 0.0
+        assert strengths[2] == 1.0
+    
+    def test_unique_topics_encoded_once(self, expert_analyzer_service, mock_bert_model, sample_authors_data):
+        """Тест: повторяющиеся темы авторов кодируются одним батчем"""
+        authors = sample_authors_data + [
+            {"author_id": "author_003", "article_topics": ["глубокое обучение", "биохимия"]},
+            {"name": "без идентификатора", "article_topics": ["генетика"]}
+        ]
         
-        assert isinstance(count, int)
-        assert count >= 0
\ No newline at end of file
+        results = expert_analyzer_service.analyze_experts_by_topic("машинное обучение", authors)
+        
+        mock_bert_model.encode_batch.assert_called_once_with(
+            ["глубокое обучение", "компьютерное зрение", "биохимия", "молекулярная биология"]
+        )
+        assert {r["author_id"] for r in results} <= {"author_001", "author_002", "author_003"}
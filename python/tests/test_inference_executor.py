@@ -0,0 +1,63 @@
+# tests/test_inference_executor.py
+import asyncio
+import threading
+import time
+
+from src.services.inference_executor import InferenceExecutor
+
+
+class TestInferenceExecutor:
+    """Тесты пула инференса"""
+    
+    def test_run_in_worker_thread(self):
+        """Тест выполнения вызова вне потока event loop"""
+        executor = InferenceExecutor(max_workers=1)
+        
+        async def main():
+            return await executor.run(lambda x, y=0: (threading.current_thread().name, x + y), 1, y=2)
+        
+        thread_name, value = asyncio.run(main())
+        executor.shutdown()
+        
+        assert thread_name.startswith("inference")
+        assert value == 3
+    
+    def test_event_loop_not_blocked(self):
+        """Тест: пока идет инференс, event loop обслуживает другие корутины"""
+        executor = InferenceExecutor(max_workers=1)
+        
+        async def main():
+            slow = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            responsive_after = time.perf_counter() - start
+            await slow
+            return responsive_after
+        
+        responsive_after = asyncio.run(main())
+        executor.shutdown()
+        
+        assert responsive_after < 0.1
+    
+    def test_concurrency_is_bounded(self):
+        """Тест ограничения числа параллельных вызовов"""
+        executor = InferenceExecutor(max_workers=2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def work():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+        
+        async def main():
+            await asyncio.gather(*[executor.run(work) for _ in range(8)])
+        
+        asyncio.run(main())
+        executor.shutdown()
+        
+        assert max(peak) <= 2
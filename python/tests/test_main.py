@@ -1,7 +1,13 @@
 # tests/test_main.py
 import pytest
+import time
+import json
+import numpy as np
+from fastapi.testclient import TestClient
 from unittest.mock import patch
 
+from src.main import app
+
 
 class TestMainEndpoints:
     """Тесты основных API endpoints"""
@@ -15,6 +21,40 @@ class TestMainEndpoints:
         assert data["status"] == "healthy"
         assert data["service"] == "ai-agent-ml"
     
+    def test_liveness_endpoint(self, client):
+        """Тест liveness: отвечает и до прогрева модели"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.ready = False
+            
+            response = client.get("/health/live")
+            
+            assert response.status_code == 200
+            assert response.json()["status"] == "alive"
+    
+    def test_readiness_endpoint(self, client):
+        """Тест readiness: 503 до прогрева, 200 после"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.ready = False
+            assert client.get("/health/ready").status_code == 503
+            
+            mock_service.ready = True
+            response = client.get("/health/ready")
+            assert response.status_code == 200
+            assert response.json()["status"] == "ready"
+    
+    def test_lifespan_warmup_and_close(self):
+        """Тест прогрева при старте и остановки сервиса при завершении"""
+        with patch('src.main.ml_service') as mock_service:
+            with TestClient(app) as client:
+                client.get("/health/live")
+                # Прогрев идет в пуле инференса в фоне
+                deadline = time.monotonic() + 5
+                while not mock_service.warmup.called and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            
+            mock_service.warmup.assert_called_once()
+            mock_service.close.assert_called_once()
+    
     def test_analyze_article_endpoint(self, client, sample_article_data):
         """Тест анализа статьи"""
         with patch('src.main.ml_service') as mock_service:
@@ -30,9 +70,28 @@ class TestMainEndpoints:
             mock_service.analyze_article_topics.assert_called_once_with(
                 sample_article_data["document_id"],
                 sample_article_data["title_ru"],
-                sample_article_data["abstract_ru"]
+                sample_article_data["abstract_ru"],
+                binary=False
             )
     
+    def test_analyze_articles_endpoint(self, client, sample_article_data):
+        """Тест пакетного анализа статей"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.analyze_articles_topics.return_value = {
+                "results": [{
+                    "document_id": sample_article_data["document_id"],
+                    "topics": [{"topic_name": "AI", "confidence": 0.8, "topic_type": "main"}],
+                    "title_embedding": "test_embedding",
+                    "abstract_embedding": "test_embedding"
+                }]
+            }
+            
+            response = client.post("/api/analyze-articles", json={"articles": [sample_article_data]})
+            
+            assert response.status_code == 200
+            assert response.json()["results"][0]["document_id"] == sample_article_data["document_id"]
+            mock_service.analyze_articles_topics.assert_called_once_with([sample_article_data], binary=False)
+    
     def test_analyze_query_endpoint(self, client, sample_query_data):
         """Тест анализа запроса"""
         with patch('src.main.ml_service') as mock_service:
@@ -48,7 +107,8 @@ class TestMainEndpoints:
             assert response.status_code == 200
             mock_service.analyze_user_query.assert_called_once_with(
                 sample_query_data["user_query"],
-                sample_query_data["context"]
+                sample_query_data["context"],
+                binary=False
             )
     
     def test_analyze_article_missing_fields(self, client):
@@ -78,4 +138,221 @@ class TestMainEndpoints:
                 search_data["query_vector"],
                 search_data["articles"],
                 search_data["max_results"]
-            )
\ No newline at end of file
+            )
+    
+    def test_analyze_article_msgpack(self, client, sample_article_data):
+        """Тест msgpack-транспорта: эмбеддинги передаются сырыми float32-байтами"""
+        msgpack = pytest.importorskip("msgpack")
+        vector = np.arange(4, dtype=np.float32)
+        
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.analyze_article_topics.return_value = {
+                "topics": [],
+                "title_embedding": vector.tobytes(),
+                "abstract_embedding": vector.tobytes()
+            }
+            
+            response = client.post(
+                "/api/analyze-article",
+                content=msgpack.packb(sample_article_data),
+                headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+            )
+            
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/msgpack"
+            data = msgpack.unpackb(response.content)
+            assert np.array_equal(np.frombuffer(data["title_embedding"], dtype=np.float32), vector)
+            mock_service.analyze_article_topics.assert_called_once_with(
+                sample_article_data["document_id"],
+                sample_article_data["title_ru"],
+                sample_article_data["abstract_ru"],
+                binary=True
+            )
+    
+    def test_semantic_search_index_endpoint(self, client):
+        """Тест поиска по серверному индексу (без списка статей)"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.indexed_article_search.return_value = {
+                "results": [{"document_id": "art1", "relevance_score": 0.8}],
+                "total_found": 1
+            }
+            
+            response = client.post("/api/semantic-search", json={"query_text": "нейронные сети", "max_results": 5})
+            
+            assert response.status_code == 200
+            mock_service.indexed_article_search.assert_called_once_with(
+                query_vector=None, query_text="нейронные сети", max_results=5, nprobe=None
+            )
+    
+    def test_index_articles_endpoint(self, client):
+        """Тест регистрации статей в индексе"""
+        articles = [{"document_id": "art1", "title_ru": "test", "abstract_ru": "test"}]
+        
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.upsert_articles.return_value = {"indexed": 1, "index_size": 1}
+            
+            response = client.post("/api/index/articles", json={"articles": articles})
+            
+            assert response.status_code == 200
+            mock_service.upsert_articles.assert_called_once_with(articles)
+    
+    def test_cache_stats_endpoint(self, client):
+        """Тест статистики кэша эмбеддингов"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.get_cache_stats.return_value = {
+                "embedding_cache": {"hits": 3, "misses": 1, "evictions": 0}
+            }
+            
+            response = client.get("/api/cache-stats")
+            
+            assert response.status_code == 200
+            assert response.json()["embedding_cache"]["hits"] == 3
+    
+    def test_batching_stats_endpoint(self, client):
+        """Тест статистики динамического батчинга"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.get_batching_stats.return_value = {
+                "embedding_batcher": {"queue_depth": 0, "avg_batch_size": 4.0}
+            }
+            
+            response = client.get("/api/batching-stats")
+            
+            assert response.status_code == 200
+            assert response.json()["embedding_batcher"]["avg_batch_size"] == 4.0
+    
+    def test_metrics_endpoint(self, client, sample_query_data):
+        """Тест /metrics: гистограмма запросов по шаблону endpoint и этап сериализации"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.analyze_user_query.return_value = {
+                "interpreted_query": "машинное обучение",
+                "key_concepts": ["машинное", "обучение"],
+                "query_vector": "test_vector",
+                "query_type": "article_search"
+            }
+            client.post("/api/analyze-query", json=sample_query_data)
+        
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'ml_http_request_duration_seconds_count{endpoint="/api/analyze-query"}' in response.text
+        assert 'ml_stage_duration_seconds_count{stage="json_parse"}' in response.text
+        assert 'ml_stage_duration_seconds_count{stage="serialization"}' in response.text
+    
+    def test_analyze_experts_ndjson_stream(self, client):
+        """Тест потоковой загрузки авторов и NDJSON-ответа по батчам"""
+        authors = [{"author_id": f"a{i}", "article_topics": ["ИИ"]} for i in range(5)]
+        body = "\n".join(json.dumps(line) for line in [{"topic": "ИИ"}] + authors) + "\n"
+        
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.config = {'streaming': {'batch_size': 2}}
+            mock_service.analyze_experts_by_topic.side_effect = lambda topic, batch: {
+                "experts": [{"author_id": a["author_id"], "expertise_score": 0.5} for a in batch]
+            }
+            
+            response = client.post(
+                "/api/analyze-experts",
+                content=body,
+                headers={"Content-Type": "application/x-ndjson", "Accept": "application/x-ndjson"}
+            )
+            
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert [line["author_id"] for line in lines] == [f"a{i}" for i in range(5)]
+            # Батчи по 2 автора: вход не передается в модель целиком
+            assert mock_service.analyze_experts_by_topic.call_count == 3
+
+    def test_analyze_experts_ndjson_stream_is_globally_ranked(self, client):
+        """Тест NDJSON-потока: ранжирование общее для всех батчей, а не внутри батча"""
+        authors = [{"author_id": f"a{i}", "article_topics": ["ИИ"]} for i in range(5)]
+        body = "\n".join(json.dumps(line) for line in [{"topic": "ИИ", "max_results": 3}] + authors) + "\n"
+
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.config = {'streaming': {'batch_size': 2}}
+            mock_service.analyze_experts_by_topic.side_effect = lambda topic, batch: {
+                "experts": [{"author_id": a["author_id"], "expertise_score": int(a["author_id"][1:]) / 10}
+                            for a in batch]
+            }
+
+            response = client.post(
+                "/api/analyze-experts",
+                content=body,
+                headers={"Content-Type": "application/x-ndjson", "Accept": "application/x-ndjson"}
+            )
+
+            assert response.status_code == 200
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            # Лучшие авторы пришли в последних батчах, но идут первыми
+            assert [line["author_id"] for line in lines] == ["a4", "a3", "a2"]
+    
+    def test_analyze_experts_from_profiles(self, client, sample_authors_data):
+        """Тест поиска экспертов по профилям: запрос без списка авторов"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.upsert_authors.return_value = {"upserted": 2, "profile_count": 2}
+            mock_service.analyze_experts_by_topic.return_value = {"experts": []}
+
+            response = client.post("/api/profiles/authors", json={"authors": sample_authors_data})
+            assert response.status_code == 200
+            mock_service.upsert_authors.assert_called_once_with(sample_authors_data)
+
+            response = client.post("/api/analyze-experts", json={"topic": "ИИ", "max_results": 5})
+            assert response.status_code == 200
+            mock_service.analyze_experts_by_topic.assert_called_once_with("ИИ", None, 5)
+
+    def test_analyze_departments_from_aggregates(self, client, sample_departments_data):
+        """Тест анализа кафедр по агрегатам: запрос без списка кафедр"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.upsert_departments.return_value = {"upserted": 1, "department_count": 1}
+            mock_service.analyze_departments_by_topic.return_value = {"departments": []}
+
+            response = client.post("/api/profiles/departments", json={"departments": sample_departments_data})
+            assert response.status_code == 200
+            mock_service.upsert_departments.assert_called_once_with(sample_departments_data)
+
+            response = client.post("/api/analyze-departments", json={"topic": "ИИ"})
+            assert response.status_code == 200
+            mock_service.analyze_departments_by_topic.assert_called_once_with("ИИ", None, None)
+
+    def test_analyze_departments_ndjson_response(self, client, sample_departments_data):
+        """Тест NDJSON-ответа для обычного JSON-запроса"""
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.config = {'streaming': {'batch_size': 256}}
+            mock_service.analyze_departments_by_topic.return_value = {
+                "departments": [{"organization_id": "dept_001", "strength_score": 0.8}]
+            }
+            
+            response = client.post(
+                "/api/analyze-departments",
+                json={"topic": "ИИ", "departments": sample_departments_data},
+                headers={"Accept": "application/x-ndjson"}
+            )
+            
+            assert response.status_code == 200
+            assert json.loads(response.text.splitlines()[0])["organization_id"] == "dept_001"
+    
+    def test_semantic_search_ndjson_upload_merges_top_k(self, client):
+        """Тест поиска по потоку статей: топ-k сливается по батчам"""
+        articles = [{"document_id": f"d{i}", "score": i / 10} for i in range(6)]
+        body = "\n".join(json.dumps(line) for line in [{"query_vector": "q", "max_results": 2}] + articles)
+        
+        with patch('src.main.ml_service') as mock_service:
+            mock_service.config = {'streaming': {'batch_size': 4}}
+            mock_service.semantic_article_search.side_effect = lambda query, batch, k: {
+                "results": sorted(
+                    [{"document_id": a["document_id"], "relevance_score": a["score"]} for a in batch],
+                    key=lambda r: r["relevance_score"], reverse=True
+                )[:k]
+            }
+            
+            response = client.post(
+                "/api/semantic-search",
+                content=body,
+                headers={"Content-Type": "application/x-ndjson"}
+            )
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert [r["document_id"] for r in data["results"]] == ["d5", "d4"]
+            assert data["total_found"] == 2
+            assert mock_service.semantic_article_search.call_count == 2
@@ -0,0 +1,82 @@
+# tests/test_metrics.py
+import threading
+
+from src.utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Тесты метрик в формате Prometheus"""
+    
+    @staticmethod
+    def _registry():
+        registry = MetricsRegistry()
+        registry.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0))
+        registry.counter("texts_total", "Тексты")
+        return registry
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Тест кумулятивных корзин, суммы и числа наблюдений"""
+        registry = self._registry()
+        for value in (0.05, 0.1, 0.5, 3.0):
+            registry.observe("latency_seconds", value, stage="forward_pass")
+        
+        text = registry.render()
+        
+        assert '# TYPE latency_seconds histogram' in text
+        assert 'latency_seconds_bucket{stage="forward_pass",le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{stage="forward_pass",le="1.0"} 3' in text
+        assert 'latency_seconds_bucket{stage="forward_pass",le="+Inf"} 4' in text
+        assert 'latency_seconds_sum{stage="forward_pass"} 3.65' in text
+        assert 'latency_seconds_count{stage="forward_pass"} 4' in text
+    
+    def test_thread_shards_are_merged(self):
+        """Тест сложения шард разных потоков при сборе"""
+        registry = self._registry()
+        
+        def worker():
+            for _ in range(100):
+                registry.inc("texts_total", 2)
+                registry.observe("latency_seconds", 0.5)
+        
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert registry.counter_value("texts_total") == 800
+        assert registry.histogram_sum("latency_seconds") == (200.0, 400)
+        assert 'texts_total 800' in registry.render()
+    
+    def test_gauge_is_collected_on_render(self):
+        """Тест gauge, вычисляемого при сборе"""
+        registry = self._registry()
+        registry.gauge("throughput", "Тексты в секунду", lambda: {(("backend", "torch"),): 12.5})
+        
+        assert 'throughput{backend="torch"} 12.5' in registry.render()
+    
+    def test_label_values_are_escaped(self):
+        """Тест экранирования значений меток"""
+        registry = self._registry()
+        registry.inc("texts_total", endpoint='a"b\\c')
+        
+        assert 'texts_total{endpoint="a\\"b\\\\c"} 1' in registry.render()
+    
+    def test_disabled_registry_records_nothing(self):
+        """Тест выключенных метрик"""
+        registry = self._registry()
+        registry.enabled = False
+        with registry.timer("latency_seconds"):
+            registry.inc("texts_total")
+        
+        assert registry.counter_value("texts_total") == 0
+        assert registry.histogram_sum("latency_seconds") == (0.0, 0)
+    
+    def test_reset_clears_observations(self):
+        """Тест сброса наблюдений"""
+        registry = self._registry()
+        with registry.timer("latency_seconds"):
+            pass
+        registry.reset()
+        
+        assert registry.histogram_sum("latency_seconds") == (0.0, 0)
@@ -0,0 +1,52 @@
+# tests/test_quantization.py
+import pytest
+import numpy as np
+
+from src.services.quantization import QuantizedMatrix
+
+
+class TestQuantizedMatrix:
+    """Тесты компактного хранения векторов"""
+    
+    @pytest.mark.parametrize("storage,tolerance", [("float16", 1e-3), ("int8", 2e-2)])
+    def test_dot_approximates_float32(self, storage, tolerance):
+        """Тест: скалярные произведения близки к точным"""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((50, 16)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        query = vectors[0]
+        
+        matrix = QuantizedMatrix(16, 50, storage, chunk_size=7)
+        matrix.set_rows(np.arange(50), vectors)
+        
+        np.testing.assert_allclose(matrix.dot(query, count=50), vectors @ query, atol=tolerance)
+        np.testing.assert_allclose(matrix.dot(query, rows=np.array([3, 1])), vectors[[3, 1]] @ query, atol=tolerance)
+    
+    def test_int8_memory(self):
+        """Тест размера: байт на координату плюс масштаб на строку"""
+        matrix = QuantizedMatrix(384, 1000, "int8")
+        
+        assert matrix.nbytes == 1000 * 384 + 1000 * 4
+    
+    def test_zero_vector(self):
+        """Тест нулевого вектора: без деления на ноль"""
+        matrix = QuantizedMatrix(4, 1, "int8")
+        matrix.set_rows([0], np.zeros((1, 4), dtype=np.float32))
+        
+        assert matrix.dot(np.ones(4, dtype=np.float32), count=1)[0] == 0.0
+    
+    def test_move_and_grow(self):
+        """Тест переноса строки и роста емкости"""
+        matrix = QuantizedMatrix(2, 2, "int8")
+        matrix.set_rows([0, 1], np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32))
+        matrix.move_row(1, 0)
+        matrix.grow(8)
+        
+        scores = matrix.dot(np.array([0.0, 1.0], dtype=np.float32), count=2)
+        
+        assert scores[0] == pytest.approx(1.0)
+    
+    def test_unknown_storage(self):
+        """Тест ошибки при неизвестном типе хранения"""
+        with pytest.raises(ValueError):
+            QuantizedMatrix(4, 1, "int4")
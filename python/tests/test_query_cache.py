@@ -0,0 +1,107 @@
+# tests/test_query_cache.py
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.services.query_cache import QueryResultCache
+
+
+class TestQueryResultCache:
+    """Тесты кэша ответов на запросы"""
+
+    def test_hit_after_miss(self):
+        """Тест повторного запроса из кэша"""
+        cache = QueryResultCache()
+        calls = []
+
+        first = cache.get_or_compute("k", lambda: calls.append(1) or {"v": 1})
+        second = cache.get_or_compute("k", lambda: calls.append(1) or {"v": 2})
+
+        assert first == second == {"v": 1}
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_ttl_expiration(self):
+        """Тест устаревания записи по TTL"""
+        now = [0.0]
+        cache = QueryResultCache(ttl_seconds=10, clock=lambda: now[0])
+        cache.get_or_compute("k", lambda: 1)
+
+        now[0] = 11.0
+
+        assert cache.get_or_compute("k", lambda: 2) == 2
+        assert cache.stats()["expirations"] == 1
+
+    def test_lru_eviction(self):
+        """Тест вытеснения по числу записей"""
+        cache = QueryResultCache(max_entries=2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("b", lambda: 2)
+        cache.get_or_compute("a", lambda: 0)  # "a" становится самой свежей
+        cache.get_or_compute("c", lambda: 3)
+
+        assert cache.get_or_compute("a", lambda: 0) == 1
+        assert cache.get_or_compute("b", lambda: 0) == 0
+        assert cache.stats()["evictions"] >= 1
+
+    def test_errors_are_not_cached(self):
+        """Тест: исключение не попадает в кэш"""
+        cache = QueryResultCache()
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+
+        assert cache.get_or_compute("k", lambda: 1) == 1
+
+    def test_single_flight(self):
+        """Тест схлопывания одновременных промахов в одно вычисление"""
+        cache = QueryResultCache()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "value"
+
+        results = []
+        owner = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        owner.start()
+        started.wait(5)
+        waiters = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+                   for _ in range(4)]
+        for thread in waiters:
+            thread.start()
+        while cache.stats()["collapsed"] < 4:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in [owner] + waiters:
+            thread.join(5)
+
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+
+
+class TestMLServiceQueryCache:
+    """Тесты кэширования /api/analyze-query в MLService"""
+
+    def test_same_interpreted_query_computed_once(self, hash_ml_service):
+        """Тест: запросы, совпадающие после интерпретации, считаются один раз"""
+        analyze = hash_ml_service.topic_analyzer.analyze_user_query
+        with patch.object(hash_ml_service.topic_analyzer, 'analyze_user_query', side_effect=analyze) as mock_analyze:
+            first = hash_ml_service.analyze_user_query("Статьи про нейронные сети", "article_search")
+            second = hash_ml_service.analyze_user_query("нейронные   СЕТИ", "article_search")
+
+            assert first == second
+            assert isinstance(first["query_vector"], str)
+            assert mock_analyze.call_count == 1
+
+            # Другой контекст и бинарный ответ - отдельные записи
+            hash_ml_service.analyze_user_query("нейронные сети", "expert_search")
+            binary = hash_ml_service.analyze_user_query("нейронные сети", "article_search", binary=True)
+
+            assert isinstance(binary["query_vector"], bytes)
+            assert mock_analyze.call_count == 3
@@ -1,5 +1,6 @@
 # tests/test_semantic_search.py
 import pytest
+import base64
 import numpy as np
 
 
@@ -56,6 +57,63 @@ class TestSemanticSearchService:
         
         assert results == []
     
+    def test_search_articles_top_k_and_malformed_rows(self, semantic_search_service):
+        """Тест векторного топ-k: порядок как у поэлементного расчета, битые строки пропускаются"""
+        embedding_dim = 384
+        rng = np.random.default_rng(42)
+        query_vector = rng.random(embedding_dim).astype(np.float32)
+        
+        def encode(vector):
+            return base64.b64encode(vector.astype(np.float32).tobytes()).decode("utf-8")
+        
+        articles = []
+        expected = {}
+        for i in range(50):
+            title = rng.random(embedding_dim)
+            abstract = rng.random(embedding_dim)
+            articles.append({
+                "document_id": f"art{i}",
+                "title_embedding": encode(title),
+                "abstract_embedding": encode(abstract)
+            })
+            expected[f"art{i}"] = (
+                0.6 * semantic_search_service._vector_similarity(query_vector, title)
+                + 0.4 * semantic_search_service._vector_similarity(query_vector, abstract)
+            )
+        articles.append({"document_id": "bad_base64", "title_embedding": "###", "abstract_embedding": "###"})
+        articles.append({"document_id": "bad_dim", "title_embedding": encode(np.ones(3)), "abstract_embedding": encode(np.ones(3))})
+        articles.append({"document_id": "missing"})
+        
+        results = semantic_search_service.search_articles(query_vector, articles, max_results=5)
+        
+        top = sorted(expected, key=expected.get, reverse=True)[:5]
+        assert [r["document_id"] for r in results] == top
+        for result in results:
+            assert result["relevance_score"] == pytest.approx(expected[result["document_id"]], abs=1e-5)
+    
+    def test_index_and_search(self, semantic_search_service):
+        """Тест поиска по серверному индексу"""
+        embedding_dim = 384
+        title = np.random.rand(embedding_dim).astype(np.float32)
+        abstract = np.random.rand(embedding_dim).astype(np.float32)
+        
+        indexed = semantic_search_service.index_articles([
+            {
+                "document_id": "art1",
+                "title_embedding": base64.b64encode(title.tobytes()).decode("utf-8"),
+                "abstract_embedding": base64.b64encode(abstract.tobytes()).decode("utf-8")
+            },
+            {"document_id": "art2", "title_ru": "Биология", "abstract_ru": "Исследование в биологии"}
+        ])
+        results = semantic_search_service.search_index(title, max_results=5)
+        
+        assert indexed == 2
+        assert len(results) == 2
+        assert results[0]["document_id"] == "art1"
+        
+        assert semantic_search_service.remove_articles(["art1", "missing"]) == 1
+        assert [r["document_id"] for r in semantic_search_service.search_index(title)] == ["art2"]
+    
     def test_vector_similarity(self, semantic_search_service):
         """Тест вычисления косинусного сходства"""
         vec1 = np.array([1.0, 0.0])
@@ -0,0 +1,37 @@
+# tests/test_shared_memory.py
+import os
+import pytest
+import numpy as np
+
+from src.utils.shared_memory import to_shared
+
+
+class TestSharedMemory:
+    """Тесты массивов в разделяемой памяти"""
+    
+    def test_copy_preserves_values(self):
+        """Тест копирования значений, формы и типа"""
+        array = np.arange(12, dtype=np.float32).reshape(3, 4)
+        
+        shared = to_shared(array)
+        
+        np.testing.assert_array_equal(shared, array)
+        assert shared.dtype == np.float32
+        assert shared.flags['C_CONTIGUOUS']
+    
+    def test_empty_array(self):
+        """Тест пустого массива"""
+        assert to_shared(np.zeros((0, 4), dtype=np.float32)).shape == (0, 4)
+    
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="нужен fork")
+    def test_pages_shared_after_fork(self):
+        """Тест: запись дочернего процесса видна родителю (страницы не копируются)"""
+        shared = to_shared(np.zeros(4, dtype=np.float32))
+        
+        pid = os.fork()
+        if pid == 0:
+            shared[0] = 42.0
+            os._exit(0)
+        os.waitpid(pid, 0)
+        
+        assert shared[0] == 42.0
@@ -0,0 +1,78 @@
+# tests/test_taxonomy.py
+import json
+
+import pytest
+
+from src.topic.intelligent_topics import extended_topics, topic_groups
+from src.topic.taxonomy import Taxonomy, load_taxonomy
+
+
+class TestTaxonomy:
+    """Тесты загрузки таксономии тематик"""
+    
+    def test_duplicates_are_removed(self):
+        """Тест дедупликации: тема из нескольких веток остается в первой"""
+        taxonomy = Taxonomy([
+            ("Химия", "Материалы", "наноматериалы"),
+            ("Нанотехнологии", "Нанотехнологии", "Наноматериалы "),
+            ("Нанотехнологии", "Нанотехнологии", "наносенсоры")
+        ])
+        
+        assert taxonomy.topics == ["наноматериалы", "наносенсоры"]
+        assert taxonomy.paths() == [
+            ("Химия", "Материалы", "наноматериалы"),
+            ("Нанотехнологии", "Нанотехнологии", "наносенсоры")
+        ]
+    
+    def test_offsets_are_contiguous(self):
+        """Тест непрерывных диапазонов: области по доменам, темы по областям"""
+        taxonomy = Taxonomy.from_groups({
+            "A": {"a1": ["t1", "t2"], "a2": ["t3"]},
+            "B": ["t4", "t5"]
+        })
+        
+        assert taxonomy.domains == ["A", "B"]
+        assert taxonomy.areas == ["a1", "a2", "B"]
+        assert taxonomy.area_offsets.tolist() == [0, 2, 3, 5]
+        assert taxonomy.domain_offsets.tolist() == [0, 2, 3]
+    
+    def test_codes_hierarchy(self):
+        """Тест классификатора с кодами: домен, область, листья любой глубины"""
+        taxonomy = Taxonomy.from_codes([
+            ("20", "Информатика"),
+            ("20.19", "Информационные системы"),
+            ("20.19.21", "Базы данных"),
+            ("20.19.21.05", "Реляционные СУБД"),
+            ("20.23", "Искусственный интеллект"),
+            ("27", "Математика")
+        ])
+        
+        assert taxonomy.paths() == [
+            ("Информатика", "Информационные системы", "Реляционные СУБД"),
+            ("Информатика", "Искусственный интеллект", "Искусственный интеллект"),
+            ("Математика", "Математика", "Математика")
+        ]
+    
+    def test_load_json_and_csv(self, tmp_path):
+        """Тест загрузки из JSON (группы и коды) и CSV"""
+        groups = tmp_path / "groups.json"
+        groups.write_text(json.dumps({"A": {"a": ["t1", "t2"]}}, ensure_ascii=False), encoding="utf-8")
+        codes = tmp_path / "codes.json"
+        codes.write_text(json.dumps([{"code": "1", "name": "A"}, {"code": "1.1", "name": "t1"}]), encoding="utf-8")
+        paths = tmp_path / "paths.csv"
+        paths.write_text("domain,area,topic\nA,a,t1\nB,,t2\n", encoding="utf-8")
+        
+        assert Taxonomy.load(str(groups)).topics == ["t1", "t2"]
+        assert Taxonomy.load(str(codes)).paths() == [("A", "t1", "t1")]
+        assert Taxonomy.load(str(paths)).paths() == [("A", "a", "t1"), ("B", "B", "t2")]
+        with pytest.raises(ValueError):
+            Taxonomy.load(str(tmp_path / "taxonomy.xml"))
+    
+    def test_builtin_taxonomy(self):
+        """Тест встроенной таксономии: группы-домены, плоский список без повторов"""
+        taxonomy = load_taxonomy({'predefined_topics': extended_topics})
+        
+        assert taxonomy.topics == extended_topics
+        assert len(set(extended_topics)) == len(extended_topics)
+        assert taxonomy.domains == list(topic_groups)
+        assert load_taxonomy({'predefined_topics': ["x", "y"]}).topics == ["x", "y"]
@@ -25,6 +25,22 @@ class TestTopicAnalyzerService:
         assert isinstance(result["title_embedding"], bytes)
         assert isinstance(result["abstract_embedding"], bytes)
     
+    def test_analyze_article_single_forward_pass(self, topic_analyzer_service, mock_bert_model):
+        """Тест одного прохода модели на статью: батч из заголовка и аннотации, векторы переиспользуются"""
+        result = topic_analyzer_service.analyze_article_topics(
+            "test_doc", "Искусственный интеллект в медицине", "Применение ИИ для диагностики заболеваний",
+            binary=True
+        )
+        
+        mock_bert_model.encode_batch.assert_called_once_with(
+            ["Искусственный интеллект в медицине", "Применение ИИ для диагностики заболеваний"]
+        )
+        mock_bert_model.encode_text.assert_not_called()
+        mock_bert_model.analyze_topics.assert_not_called()
+        embeddings = mock_bert_model.analyze_topics_from_embeddings.call_args[0][0]
+        assert result["title_embedding"] == embeddings[0].astype(np.float32).tobytes()
+        assert result["abstract_embedding"] == embeddings[1].astype(np.float32).tobytes()
+    
     def test_analyze_user_query(self, topic_analyzer_service):
         """Тест анализа пользовательского запроса"""
         user_query = "найти статьи про машинное обучение"
@@ -87,4 +103,24 @@ class TestTopicAnalyzerService:
         
         for concept in concepts:
             assert isinstance(concept, str)
-            assert len(concept) > 3  # Слова длиннее 3 символов
\ No newline at end of file
+            assert len(concept) > 3  # Слова длиннее 3 символов
+    
+    def test_analyze_articles_topics(self, topic_analyzer_service, mock_bert_model):
+        """Тест пакетного анализа тематик статей"""
+        articles = [
+            {"document_id": "doc1", "title_ru": "Нейронные сети", "abstract_ru": "Глубокое обучение"},
+            {"document_id": "doc2", "title_ru": "Генетика", "abstract_ru": ""}
+        ]
+        
+        results = topic_analyzer_service.analyze_articles_topics(articles)
+        
+        assert [r["document_id"] for r in results] == ["doc1", "doc2"]
+        for result in results:
+            assert isinstance(result["topics"], list)
+            assert isinstance(result["title_embedding"], str)
+            assert isinstance(result["abstract_embedding"], str)
+        
+        # Все тексты кодируются одним батчем
+        mock_bert_model.encode_batch.assert_called_once_with(
+            ["Нейронные сети", "Генетика", "Глубокое обучение", ""]
+        )
@@ -0,0 +1,96 @@
+# tests/test_topic_index.py
+import numpy as np
+
+from src.topic.topic_index import TopicIndex, HierarchicalTopicIndex
+from src.topic.taxonomy import Taxonomy
+
+
+class TestTopicIndex:
+    """Тесты матрицы эмбеддингов тематик"""
+    
+    def test_matrix_is_normalized_float32(self):
+        """Тест нормализации матрицы тематик"""
+        index = TopicIndex(["a", "b"], np.array([[3.0, 4.0], [0.0, 2.0]]))
+        
+        assert index.matrix.dtype == np.float32
+        assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0)
+    
+    def test_match_threshold_and_order(self):
+        """Тест порога релевантности и сортировки по уверенности"""
+        topics = ["x", "y", "z"]
+        index = TopicIndex(topics, np.eye(3, dtype=np.float32))
+        text = np.array([0.2, 0.9, 0.5], dtype=np.float32)
+        
+        result = index.match(text, threshold=0.3, main_threshold=0.7, top_k=5)[0]
+        
+        assert [t["topic_name"] for t in result] == ["y", "z"]
+        assert result[0]["topic_type"] == "main"
+        assert result[1]["topic_type"] == "secondary"
+        assert result[0]["confidence"] > result[1]["confidence"]
+    
+    def test_match_top_k_batch(self):
+        """Тест топ-k для батча текстов"""
+        rng = np.random.default_rng(0)
+        index = TopicIndex([f"t{i}" for i in range(20)], rng.random((20, 8)))
+        texts = rng.random((4, 8))
+        
+        results = index.match(texts, threshold=0.0, top_k=3)
+        
+        assert len(results) == 4
+        similarities = index.score(texts)
+        for row, topics in zip(similarities, results):
+            expected = [f"t{i}" for i in np.argsort(-row)[:3]]
+            assert [t["topic_name"] for t in topics] == expected
+    
+    def test_zero_vector_has_no_topics(self):
+        """Тест пустого текста (нулевой эмбеддинг)"""
+        index = TopicIndex(["a"], np.ones((1, 4)))
+        
+        assert index.match(np.zeros(4)) == [[]]
+
+
+class TestHierarchicalTopicIndex:
+    """Тесты иерархического скоринга тематик"""
+    
+    @staticmethod
+    def _index(**options):
+        rng = np.random.default_rng(0)
+        paths, vectors = [], []
+        for d in range(6):
+            domain = rng.standard_normal(16) * 3
+            for a in range(4):
+                area = domain + rng.standard_normal(16)
+                for t in range(5):
+                    paths.append((f"d{d}", f"a{d}.{a}", f"t{d}.{a}.{t}"))
+                    vectors.append(area + 0.5 * rng.standard_normal(16))
+        vectors = np.array(vectors, dtype=np.float32)
+        return HierarchicalTopicIndex(Taxonomy(paths), vectors, **options), vectors
+    
+    def test_small_taxonomy_uses_flat_match(self):
+        """Тест полного перебора для таксономии меньше min_topics"""
+        index, vectors = self._index(domain_beam=1, area_beam=1, min_topics=1000)
+        flat = TopicIndex(index.topics, vectors)
+        
+        assert index.match(vectors[:3], threshold=-1.0, top_k=10) == flat.match(vectors[:3], threshold=-1.0, top_k=10)
+    
+    def test_beam_search_matches_flat_top(self):
+        """Тест совпадения лучших тем с полным перебором и формата результата"""
+        index, vectors = self._index(domain_beam=2, area_beam=2, min_topics=0)
+        flat = TopicIndex(index.topics, vectors)
+        texts = vectors[[0, 37, 119]] + 0.05
+        
+        results = index.match(texts, threshold=0.3, main_threshold=0.7, top_k=3)
+        expected = flat.match(texts, threshold=0.3, main_threshold=0.7, top_k=3)
+        
+        assert [[t["topic_name"] for t in row] for row in results] == \
+            [[t["topic_name"] for t in row] for row in expected]
+        assert set(results[0][0]) == {"topic_name", "confidence", "topic_type"}
+    
+    def test_beam_limits_expanded_branches(self):
+        """Тест раскрытия только выбранных веток"""
+        index, vectors = self._index(domain_beam=1, area_beam=1, min_topics=0)
+        
+        topics = index.match(vectors[0], threshold=-1.0, top_k=20)[0]
+        
+        assert len(topics) == 5
+        assert all(t["topic_name"].startswith("t0.0.") for t in topics)